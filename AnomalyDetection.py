@@ -0,0 +1,226 @@
+"""
+FILE NAME - AnomalyDetection.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Flags unusual expenses as they are added, without reading the history of the user's transactions.
+    Each category (the description without numbers, see Deduplication) and currency of a user's expenses keeps a
+    running count, mean and sum of squared differences (Welford's method), so the mean and standard deviation are
+    updated in O(1) time per expense, and a t-digest, a sketch of the distribution made of a few hundred weighted
+    centroids (growing only with the log of the count), so the share of past expenses smaller than a new one is read
+    with a binary search instead of from the history.
+    An expense is unusual when its category has at least minimumCount expenses, it is more than zScoreThreshold
+    standard deviations above the mean and it is larger than quantileThreshold of the past expenses. Needing both
+    stops a category with a long tail, eg - car repairs - flagging every large expense, while the quantile on its own
+    would flag the largest expense of every category now and then.
+    Only amounts are used, so categories are compared by the size of their expenses (positive amounts).
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import json
+import math
+import bisect
+
+minimumCount = 10  # Expenses a category needs before its new ones can be flagged
+zScoreThreshold = 3.0
+quantileThreshold = 0.99
+compression = 100  # The larger, the more centroids a t-digest keeps and the more exact it is
+
+
+class RunningStats:
+    """
+    The running count, mean and sum of squared differences from the mean of a stream of values (Welford's method).
+    """
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        """
+        Initializes the statistics, empty or as they were saved.
+        :param count: How many values have been added.
+        :param mean: The mean of the values.
+        :param m2: The sum of the squared differences of the values from the mean.
+        """
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def Add(self, value: float):
+        """
+        Adds a value.
+        :param value: The value.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def StandardDeviation(self):
+        """
+        Gets the sample standard deviation of the values.
+        :return: The standard deviation, 0 if there are fewer than two values.
+        """
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def ZScore(self, value: float):
+        """
+        Gets how many standard deviations a value is from the mean.
+        :param value: The value.
+        :return: The z-score, infinite if every value so far was the same and this one is larger.
+        """
+        deviation = self.StandardDeviation()
+        if deviation == 0:
+            return math.inf if value > self.mean else 0.0
+        return (value - self.mean) / deviation
+
+
+class TDigest:
+    """
+    A merging t-digest, a sketch of the distribution of a stream of values that keeps the tails more exactly than the
+    middle. New values are kept in a buffer and merged into the centroids once it has compression values.
+    """
+
+    def __init__(self, means: list = None, weights: list = None, buffer: list = None, minimum: float = math.inf,
+                 maximum: float = -math.inf):
+        """
+        Initializes the digest, empty or as it was saved.
+        :param means: The means of the centroids, in increasing order.
+        :param weights: The number of values in each centroid.
+        :param buffer: The values not merged into the centroids yet.
+        :param minimum: The smallest value added.
+        :param maximum: The largest value added.
+        """
+        self.means = means or []
+        self.weights = weights or []
+        self.buffer = buffer or []
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cumulativeWeights = self.CumulativeWeights()
+        self.centroidWeight = sum(self.weights)
+
+    def CumulativeWeights(self):
+        """
+        Gets the weight of the centroids before each centroid plus half its own, where the digest puts its mean.
+        :return: List of the cumulative weights.
+        """
+        cumulativeWeights, total = [], 0.0
+        for weight in self.weights:
+            cumulativeWeights.append(total + weight / 2)
+            total += weight
+        return cumulativeWeights
+
+    def Count(self):
+        """
+        Gets how many values have been added.
+        :return: The count.
+        """
+        return self.centroidWeight + len(self.buffer)
+
+    def Add(self, value: float):
+        """
+        Adds a value.
+        :param value: The value.
+        """
+        self.buffer.append(value)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if len(self.buffer) >= compression:
+            self.Compress()
+
+    def Compress(self):
+        """Merges the buffer into the centroids, keeping the centroids near the tails small."""
+        if not self.buffer:
+            return
+        points = sorted(zip(self.means + self.buffer, self.weights + [1.0] * len(self.buffer)))
+        total = sum(weight for _, weight in points)
+        means, weights, weightBefore = [], [], 0.0
+        mean, weight = points[0]
+        for nextMean, nextWeight in points[1:]:
+            # A centroid can hold at most about 4 * total * q * (1 - q) / compression values, q being its quantile
+            quantile = (weightBefore + (weight + nextWeight) / 2) / total
+            if weight + nextWeight <= max(1.0, 4 * total * quantile * (1 - quantile) / compression):
+                weight += nextWeight
+                mean += (nextMean - mean) * nextWeight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                weightBefore += weight
+                mean, weight = nextMean, nextWeight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights, self.buffer = means, weights, []
+        self.cumulativeWeights = self.CumulativeWeights()
+        self.centroidWeight = total
+
+    def Cdf(self, value: float):
+        """
+        Estimates the share of the values added that are smaller than a value.
+        :param value: The value.
+        :return: The share between 0 and 1.
+        """
+        count = self.Count()
+        if count == 0 or value < self.minimum:
+            return 0.0
+        if value >= self.maximum:
+            return 1.0
+        below = 0.0
+        if self.means:
+            # Interpolates between the points (mean, cumulative weight) of the centroids either side of the value,
+            # and the minimum and maximum at the ends
+            index = bisect.bisect_right(self.means, value)
+            leftValue, leftWeight = ((self.minimum, 0.0) if index == 0 else
+                                     (self.means[index - 1], self.cumulativeWeights[index - 1]))
+            rightValue, rightWeight = ((self.maximum, self.centroidWeight) if index == len(self.means) else
+                                       (self.means[index], self.cumulativeWeights[index]))
+            share = (value - leftValue) / (rightValue - leftValue) if rightValue > leftValue else 1.0
+            below = leftWeight + (rightWeight - leftWeight) * min(max(share, 0.0), 1.0)
+        below += sum(1 for buffered in self.buffer if buffered < value)
+        return below / count
+
+    def ToJson(self):
+        """
+        Saves the digest as JSON.
+        :return: The JSON text.
+        """
+        return json.dumps({'means': self.means, 'weights': self.weights, 'buffer': self.buffer,
+                           'minimum': self.minimum, 'maximum': self.maximum})
+
+    @staticmethod
+    def FromJson(text: str):
+        """
+        Loads a digest saved with ToJson.
+        :param text: The JSON text.
+        :return: The TDigest.
+        """
+        return TDigest(**json.loads(text))
+
+    @staticmethod
+    def FromValues(values: list):
+        """
+        Makes a digest of many values at once.
+        :param values: List of values.
+        :return: The TDigest.
+        """
+        digest = TDigest(buffer=list(values), minimum=min(values, default=math.inf),
+                         maximum=max(values, default=-math.inf))
+        digest.Compress()
+        return digest
+
+
+def Score(stats: RunningStats, digest: TDigest, value: float):
+    """
+    Scores an expense against its category before it is added to it.
+    :param stats: The category's running statistics.
+    :param digest: The category's t-digest.
+    :param value: The size of the expense (a positive amount).
+    :return: Tuple of the expense's z-score and the share of the category's past expenses smaller than it.
+    """
+    return stats.ZScore(value), digest.Cdf(value)
+
+
+def IsUnusual(count: int, zScore: float, quantile: float):
+    """
+    Checks whether a scored expense is unusual.
+    :param count: How many expenses the category had before it.
+    :param zScore: The expense's z-score.
+    :param quantile: The share of the category's past expenses smaller than it.
+    :return: True if the expense is unusual.
+    """
+    return count >= minimumCount and zScore > zScoreThreshold and quantile >= quantileThreshold
@@ -0,0 +1,206 @@
+"""
+FILE NAME - ArchiveHandler.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Archives closed years of transactions into one database file per year, next to the main database eg -
+    'finance management archive 2021.db' - so the live transactions table only holds the recent years the app shows.
+    The total income, expenses and count of every user, date and currency that is archived are kept in the
+    archived_totals table, so balances and the balance plot stay exact without reading the archives.
+    PullTransactionsRange reads a date range from the live table and only the archives of the years it covers.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import glob
+from datetime import datetime
+from contextlib import contextmanager
+import pandas as pd
+import DatabaseHandler
+import Profiler
+
+archiveAfterYears = 2  # Years that ended more than this many years ago are archived
+archiveSchema = 'archive'  # The name an archive is attached as
+
+
+def ArchiveFilePath(year: int):
+    """
+    Gets the path of the archive of a year.
+    :param year: The year eg - 2021 -
+    :return: The path of the archive file, next to the main database.
+    """
+    return f'{os.path.splitext(DatabaseHandler.databaseFilePath)[0]} archive {year}.db'
+
+
+def ArchivedYears():
+    """
+    Finds the years that have an archive.
+    :return: Sorted list of years.
+    """
+    pattern = glob.escape(os.path.splitext(DatabaseHandler.databaseFilePath)[0]) + ' archive [0-9][0-9][0-9][0-9].db'
+    return sorted(int(path[-7:-3]) for path in glob.glob(pattern))
+
+
+def YearRange(year: int):
+    """
+    Gets the first and last date of a year in the app's YY/MM/DD format.
+    :param year: The year eg - 2021 -
+    :return: Tuple of the first and last date.
+    """
+    return f'{year % 100:02d}/01/01', f'{year % 100:02d}/12/31'
+
+
+def CreateArchiveTable():
+    """
+    Creates the transactions table in the attached archive, or adds the columns the live table has gained since.
+    :return: List of the names of the columns the live and archive tables share.
+    """
+    columns = DatabaseHandler.Fetch('PRAGMA main.table_info(transactions)')
+    existingColumns = {row[1] for row in DatabaseHandler.Fetch(f'PRAGMA {archiveSchema}.table_info(transactions)')}
+    # Columns added later keep their default, so the rows archived before them get it
+    definitions = {name: 'INTEGER PRIMARY KEY' if name == 'id' else
+                   f'{columnType} DEFAULT {default}' if default is not None else columnType
+                   for _, name, columnType, _, default, _ in columns}
+    if not existingColumns:
+        columnList = ',\n    '.join(f'{name} {definition}' for name, definition in definitions.items())
+        DatabaseHandler.ExecuteScript(f'CREATE TABLE {archiveSchema}.transactions (\n    {columnList}\n)',
+                                      f'CREATE INDEX {archiveSchema}.transactions_user_date '
+                                      f'ON transactions (user_id, date)')
+    else:
+        DatabaseHandler.ExecuteScript(*[f'ALTER TABLE {archiveSchema}.transactions ADD COLUMN {name} {definition}'
+                                        for name, definition in definitions.items() if name not in existingColumns])
+    return list(definitions)
+
+
+@contextmanager
+def AttachedArchive(year: int):
+    """
+    Context manager that attaches the archive of a year to the shared connection as 'archive', creating it if it
+    doesn't exist, and detaches it when the block ends. It can't be used inside a transaction.
+    :param year: The year eg - 2021 -
+    :return: List of the names of the columns of the archived transactions.
+    """
+    conn = DatabaseHandler.GetConnection()
+    conn.execute(f'ATTACH DATABASE ? AS {archiveSchema}', (ArchiveFilePath(year),))
+    try:
+        yield CreateArchiveTable()
+    finally:
+        conn.execute(f'DETACH DATABASE {archiveSchema}')
+
+
+# Adds the totals of the transactions of a date range in a table to archived_totals
+archivedTotalsQuery = '''
+INSERT INTO main.archived_totals (user_id, date, currency, income, expenses, count)
+SELECT user_id, date, currency, TOTAL(CASE WHEN amount > 0 THEN amount END),
+       TOTAL(CASE WHEN amount < 0 THEN amount END), COUNT(*)
+FROM {table}
+WHERE date BETWEEN ? AND ? AND typeof(amount) != 'text'
+GROUP BY user_id, date, currency
+ON CONFLICT (user_id, date, currency) DO UPDATE SET
+    income = income + excluded.income, expenses = expenses + excluded.expenses, count = count + excluded.count
+'''
+
+# Adds the fingerprints of the transactions of a date range in a table to archived_fingerprints
+archivedFingerprintsQuery = '''
+INSERT OR IGNORE INTO main.archived_fingerprints (fingerprint, occurrence)
+SELECT fingerprint, occurrence FROM {table}
+WHERE date BETWEEN ? AND ? AND typeof(amount) != 'text' AND fingerprint IS NOT NULL
+'''
+
+
+@Profiler.Timed('db')
+def ArchiveClosedPeriods(beforeYear: int = None):
+    """
+    Moves the transactions of every year before beforeYear into the archive of their year, and adds their totals to
+    archived_totals and their fingerprints to archived_fingerprints. Each year is moved in one transaction.
+    Encrypted transactions stay live, as their totals can't be kept without giving them away. The archived expenses
+    are taken off the spending of their budgets, which is added up from the live transactions.
+    The live row replaces an archived row with the same ID, so a year can be archived again after a crash left its
+    rows in both. Archiving isn't in the statement log, as the archives aren't attached when it is replayed, so it is
+    saved in archive_log and RestoreToPointInTime doesn't restore across it. Take a backup after archiving.
+    :param beforeYear: The first year that is kept live, by default the year archiveAfterYears years ago.
+    :return: Dictionary of year to the number of transactions archived.
+    """
+    if beforeYear is None:
+        beforeYear = datetime.now().year - archiveAfterYears
+    oldestDate = DatabaseHandler.FetchOne('SELECT MIN(date) FROM transactions')[0]
+    archived = {}
+    if oldestDate is None:
+        return archived
+    for year in range(2000 + int(oldestDate[:2]), beforeYear):
+        firstDate, lastDate = YearRange(year)
+        if DatabaseHandler.FetchOne("SELECT 1 FROM transactions WHERE date BETWEEN ? AND ? "
+                                    "AND typeof(amount) != 'text' LIMIT 1", (firstDate, lastDate)) is None:
+            continue
+        # The archive is written before the live rows are deleted. The main database uses WAL, where a transaction
+        # across files isn't atomic, so a crash can leave rows in both but can't lose them
+        with AttachedArchive(year) as columns, DatabaseHandler.Transaction():
+            columnList = ', '.join(columns)
+            DatabaseHandler.Execute(f'INSERT OR REPLACE INTO {archiveSchema}.transactions ({columnList}) '
+                                    f'SELECT {columnList} FROM main.transactions '
+                                    f"WHERE date BETWEEN ? AND ? AND typeof(amount) != 'text'",
+                                    (firstDate, lastDate), log=False)
+            DatabaseHandler.Execute(archivedTotalsQuery.format(table='main.transactions'), (firstDate, lastDate),
+                                    log=False)
+            DatabaseHandler.Execute(archivedFingerprintsQuery.format(table='main.transactions'),
+                                    (firstDate, lastDate), log=False)
+            removed = DatabaseHandler.Fetch("SELECT id, user_id, amount, date, description, currency "
+                                            "FROM main.transactions "
+                                            "WHERE date BETWEEN ? AND ? AND typeof(amount) != 'text' ORDER BY id",
+                                            (firstDate, lastDate))
+            archived[year] = DatabaseHandler.Execute("DELETE FROM main.transactions "
+                                                     "WHERE date BETWEEN ? AND ? AND typeof(amount) != 'text'",
+                                                     (firstDate, lastDate), log=False)
+            DatabaseHandler.UpdateBudgetSpend([], removed)
+            DatabaseHandler.Execute('INSERT INTO main.archive_log (time, year, count) VALUES (?, ?, ?)',
+                                    (datetime.now().isoformat(timespec='microseconds'), year, archived[year]),
+                                    log=False)
+    return archived
+
+
+@Profiler.Timed('db')
+def RebuildArchivedTotals():
+    """
+    Rebuilds archived_totals and archived_fingerprints from the archives.
+    :return: The number of archived transactions counted.
+    """
+    years = ArchivedYears()
+    DatabaseHandler.Execute('DELETE FROM archived_totals', log=False)
+    DatabaseHandler.Execute('DELETE FROM archived_fingerprints', log=False)
+    for year in years:
+        with AttachedArchive(year):
+            for query in (archivedTotalsQuery, archivedFingerprintsQuery):
+                DatabaseHandler.Execute(query.format(table=f'{archiveSchema}.transactions'), YearRange(year),
+                                        log=False)
+    return DatabaseHandler.FetchOne('SELECT TOTAL(count) FROM archived_totals')[0]
+
+
+@Profiler.Timed('db')
+def PullTransactionsRange(user_id: int, startDate: str = None, endDate: str = None):
+    """
+    Retrieves a user's transactions in a date range, from the live table and the archives of the years in the range.
+    :param user_id: The ID of the user.
+    :param startDate: The first date (YY/MM/DD), or None for no start.
+    :param endDate: The last date (YY/MM/DD), or None for no end.
+    :return: DataFrame with the same columns as PullTransactionsData, ordered by date.
+    """
+    startDate = startDate or '00/01/01'
+    endDate = endDate or '99/12/31'
+    columns = 'amount, date, description, currency, id'
+    query = f'SELECT {columns} FROM {{table}} WHERE user_id = ? AND date BETWEEN ? AND ?'
+    frames = [DatabaseHandler.ReadFrame(query.format(table='main.transactions'), (user_id, startDate, endDate))]
+    for year in ArchivedYears():
+        firstDate, lastDate = YearRange(year)
+        if lastDate < startDate or firstDate > endDate:
+            continue
+        with AttachedArchive(year):
+            frames.append(DatabaseHandler.ReadFrame(query.format(table=f'{archiveSchema}.transactions'),
+                                                    (user_id, startDate, endDate)))
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    transactions = pd.concat(frames, ignore_index=True).sort_values(['date', 'id'], kind='stable', ignore_index=True)
+    return DatabaseHandler.DecryptTransactions(user_id, transactions)
+
+
+if __name__ == '__main__':
+    DatabaseHandler.Open()
+    for archivedYear, count in ArchiveClosedPeriods().items():
+        print(f'{archivedYear}: archived {count} transactions to {ArchiveFilePath(archivedYear)}')
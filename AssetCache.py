@@ -0,0 +1,144 @@
+"""
+FILE NAME - AssetCache.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Loads the sidebar icons already scaled to the size they are shown at. The icon PNGs are about 800 pixels
+    wide, so opening, decoding and shrinking all twelve of them took most of the time spent on images when the main
+    page was made. The first time a theme is needed at a size, its icons are scaled once and saved side by side as one
+    raw RGBA sprite sheet in cacheFolderPath, after a one line JSON header recording the size, the icon names and the
+    modification time and size of each PNG the sheet was made from. Later launches read the sheet with one read and
+    no decoding, and make it again if any PNG has changed. Each theme is only loaded when it is first shown.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import json
+from PIL import Image
+
+iconFolderPath = 'images/icons'
+cacheFolderPath = os.path.join(iconFolderPath, 'cache')
+cacheVersion = 1  # Change when the sheets are made differently, so the saved ones are made again
+iconSize = (50, 50)  # The size the icons are shown at before the window's scaling
+iconNames = ('Home', 'Goals', 'Balance', 'Stats', 'Investments', 'Budgets')
+# The folder and file name of the icons of each theme
+themes = {'Light': ('lightMode', '{}Icon.png'), 'Dark': ('darkMode', '{}IconDarkMode.png')}
+
+loadedIcons = {}  # Icons already loaded this run, by (theme, pixel size)
+
+
+def SourcePaths(theme: str):
+    """
+    Gets the paths of a theme's icon PNGs.
+    :param theme: 'Light' or 'Dark'.
+    :return: Dictionary of icon name to path.
+    """
+    folder, fileName = themes[theme]
+    return {name: os.path.join(iconFolderPath, folder, fileName.format(name)) for name in iconNames}
+
+
+def SourceStamps(theme: str):
+    """
+    Gets the modification time and size of a theme's icon PNGs, which a sheet is only valid for.
+    :param theme: 'Light' or 'Dark'.
+    :return: Dictionary of icon name to [modification time in ns, size in bytes].
+    """
+    stamps = {}
+    for name, path in SourcePaths(theme).items():
+        status = os.stat(path)
+        stamps[name] = [status.st_mtime_ns, status.st_size]
+    return stamps
+
+
+def ScaleIcons(theme: str, size: tuple):
+    """
+    Opens a theme's icon PNGs and scales them, the slow path the sheets replace.
+    :param theme: 'Light' or 'Dark'.
+    :param size: The size in pixels (width, height).
+    :return: Dictionary of icon name to RGBA Image.
+    """
+    icons = {}
+    for name, path in SourcePaths(theme).items():
+        with Image.open(path) as image:
+            # Scaled the same way CTkImage scales images, so the icons look the same as before
+            icons[name] = image.convert('RGBA').resize(size)
+    return icons
+
+
+def SheetPath(theme: str, size: tuple):
+    """
+    Gets the path of a theme's sprite sheet at a size.
+    :param theme: 'Light' or 'Dark'.
+    :param size: The size of each icon in pixels (width, height).
+    :return: The path.
+    """
+    return os.path.join(cacheFolderPath, f'{theme} {size[0]}x{size[1]}.rgba')
+
+
+def ReadSheet(theme: str, size: tuple, stamps: dict):
+    """
+    Reads a theme's icons from its sprite sheet.
+    :param theme: 'Light' or 'Dark'.
+    :param size: The size of each icon in pixels (width, height).
+    :param stamps: The current stamps of the theme's PNGs.
+    :return: Dictionary of icon name to RGBA Image, or None if there is no sheet or it is out of date.
+    """
+    try:
+        with open(SheetPath(theme, size), 'rb') as file:
+            header = json.loads(file.readline())
+            pixels = file.read()
+    except (OSError, ValueError):
+        return None
+    width, height = size
+    if (header.get('version') != cacheVersion or header.get('size') != [width, height] or
+            header.get('names') != list(iconNames) or header.get('stamps') != stamps or
+            len(pixels) != width * height * 4 * len(iconNames)):
+        return None
+    sheet = Image.frombytes('RGBA', (width * len(iconNames), height), pixels)
+    return {name: sheet.crop((i * width, 0, (i + 1) * width, height)) for i, name in enumerate(iconNames)}
+
+
+def WriteSheet(theme: str, size: tuple, stamps: dict, icons: dict):
+    """
+    Saves a theme's icons as a sprite sheet. The cache is only there to save time, so a sheet that can't be written,
+    eg - the images folder is read only - is skipped.
+    :param theme: 'Light' or 'Dark'.
+    :param size: The size of each icon in pixels (width, height).
+    :param stamps: The stamps of the PNGs the icons were made from.
+    :param icons: Dictionary of icon name to RGBA Image.
+    """
+    width, height = size
+    sheet = Image.new('RGBA', (width * len(iconNames), height))
+    for i, name in enumerate(iconNames):
+        sheet.paste(icons[name], (i * width, 0))
+    header = {'version': cacheVersion, 'size': [width, height], 'names': list(iconNames), 'stamps': stamps}
+    path = SheetPath(theme, size)
+    # Saved under a name of its own and then renamed, so another copy of the app never reads a half written sheet
+    temporaryPath = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(cacheFolderPath, exist_ok=True)
+        with open(temporaryPath, 'wb') as file:
+            file.write(json.dumps(header).encode() + b'\n')
+            file.write(sheet.tobytes())
+        os.replace(temporaryPath, path)
+    except OSError:
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+
+
+def LoadIcons(theme: str, size: tuple):
+    """
+    Gets a theme's icons at a size, from this run's icons, the sprite sheet or, if neither has them, the PNGs (saving
+    a sheet of them for next time).
+    :param theme: 'Light' or 'Dark'.
+    :param size: The size of each icon in pixels (width, height).
+    :return: Dictionary of icon name to RGBA Image.
+    """
+    key = (theme, tuple(size))
+    if key not in loadedIcons:
+        stamps = SourceStamps(theme)
+        icons = ReadSheet(theme, size, stamps)
+        if icons is None:
+            icons = ScaleIcons(theme, size)
+            WriteSheet(theme, size, stamps, icons)
+        loadedIcons[key] = icons
+    return loadedIcons[key]
@@ -0,0 +1,295 @@
+"""
+FILE NAME - BackupHandler.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Takes online backups of the database with the SQLite backup API, verifies them with a checksum and
+    restores the database to a point in time by replaying the statement log on top of the newest backup before it.
+    Each backup has a copy of the archives of closed years as they were, so they are restored with the database.
+    The backup copies a few pages at a time and sleeps in between, so the app can keep writing while it runs.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+import DatabaseHandler
+import ArchiveHandler
+
+backupFolderPath = 'backups'
+manifestFileName = 'manifest.json'
+
+
+def FileChecksum(path: str, chunkSize: int = 1 << 20):
+    """
+    Calculates the SHA-256 checksum of a file.
+    :param path: The path of the file.
+    :param chunkSize: How many bytes are read at a time.
+    :return: The checksum as a hex string.
+    """
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunkSize), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def LoadManifest(folder: str = backupFolderPath):
+    """
+    Loads the list of backups that have been taken.
+    :param folder: The folder the backups are saved in.
+    :return: List of backup entries, oldest first.
+    """
+    path = os.path.join(folder, manifestFileName)
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)
+
+
+def SaveManifest(entries: list, folder: str = backupFolderPath):
+    """
+    Saves the list of backups that have been taken.
+    :param entries: List of backup entries.
+    :param folder: The folder the backups are saved in.
+    """
+    path = os.path.join(folder, manifestFileName)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(entries, file, indent=2)
+    os.replace(path + '.tmp', path)  # Replace in one step so a crash never leaves half a manifest
+
+
+def CopyDatabase(sourcePath: str, destinationPath: str, **kwargs):
+    """
+    Copies a database file with the SQLite backup API, so it can be written to while it is copied.
+    :param sourcePath: The path of the database to copy.
+    :param destinationPath: The path of the copy, replaced if it exists.
+    :param kwargs: Keyword arguments passed on to sqlite3.Connection.backup.
+    """
+    source = sqlite3.connect(sourcePath)
+    destination = sqlite3.connect(destinationPath)
+    try:
+        source.backup(destination, **kwargs)
+        destination.execute('PRAGMA journal_mode = DELETE')  # Keep the copy in one file, the database uses WAL
+    finally:
+        destination.close()
+        source.close()
+
+
+def BackupDatabase(folder: str = backupFolderPath, pagesPerStep: int = 1024, sleepSeconds: float = 0.001,
+                   progress=None):
+    """
+    Takes an online backup of the database, and copies the archives of closed years with it.
+    The pages are copied in steps with a short sleep between them, which lets other connections write in between.
+    :param folder: The folder the backup is saved in.
+    :param pagesPerStep: How many database pages are copied in each step.
+    :param sleepSeconds: How long to sleep between steps.
+    :param progress: Optional function called after each step with (status, remaining, total).
+    :return: The manifest entry of the backup, including its checksum and throughput.
+    """
+    os.makedirs(folder, exist_ok=True)
+    fileName = datetime.now().strftime('backup-%Y%m%d-%H%M%S-%f.db')
+    path = os.path.join(folder, fileName)
+
+    startTime = time.perf_counter()
+    CopyDatabase(DatabaseHandler.databaseFilePath, path, pages=pagesPerStep, progress=progress, sleep=sleepSeconds)
+    # The last statement in the backup tells the restore where to start replaying from
+    conn = sqlite3.connect(path)
+    try:
+        changeSeq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM statement_log").fetchone()[0]
+    finally:
+        conn.close()
+    archives = {}
+    for year in ArchiveHandler.ArchivedYears():
+        archiveFileName = f'{os.path.splitext(fileName)[0]} archive {year}.db'
+        CopyDatabase(ArchiveHandler.ArchiveFilePath(year), os.path.join(folder, archiveFileName))
+        archives[str(year)] = {'file': archiveFileName, 'checksum': FileChecksum(os.path.join(folder, archiveFileName))}
+    seconds = time.perf_counter() - startTime
+
+    size = os.path.getsize(path) + sum(os.path.getsize(os.path.join(folder, archive['file']))
+                                       for archive in archives.values())
+    entry = {
+        'file': fileName,
+        'time': datetime.now().isoformat(timespec='microseconds'),
+        'changeSeq': changeSeq,
+        'checksum': FileChecksum(path),
+        'archives': archives,
+        'bytes': size,
+        'seconds': round(seconds, 3),
+        'megabytesPerSecond': round(size / (1 << 20) / seconds, 1) if seconds > 0 else None,
+    }
+    entries = LoadManifest(folder)
+    entries.append(entry)
+    SaveManifest(entries, folder)
+    return entry
+
+
+def BackupDatabaseInBackground(onFinished=None, **kwargs):
+    """
+    Takes an online backup on a separate thread so the window doesn't freeze.
+    :param onFinished: Optional function called with the manifest entry once the backup is done.
+    :param kwargs: Keyword arguments passed on to BackupDatabase.
+    :return: The thread running the backup.
+    """
+
+    def Run():
+        entry = BackupDatabase(**kwargs)
+        if onFinished is not None:
+            onFinished(entry)
+
+    thread = threading.Thread(target=Run, daemon=True)
+    thread.start()
+    return thread
+
+
+def BackupProblem(entry: dict, folder: str = backupFolderPath):
+    """
+    Finds what is wrong with a backup, checking it and the archives copied with it against the checksums saved when it
+    was taken, and that SQLite can read it.
+    :param entry: The manifest entry of the backup.
+    :param folder: The folder the backups are saved in.
+    :return: A description of the problem, or None if the backup is intact.
+    """
+    for file, checksum in [(entry['file'], entry['checksum'])] + [(archive['file'], archive['checksum'])
+                                                                  for archive in entry.get('archives', {}).values()]:
+        path = os.path.join(folder, file)
+        if not os.path.exists(path):
+            return f'{file} is missing'
+        if FileChecksum(path) != checksum:
+            return f"{file}'s checksum doesn't match"
+    conn = sqlite3.connect(f'file:{os.path.join(folder, entry["file"])}?mode=ro', uri=True)
+    try:
+        result = conn.execute('PRAGMA quick_check').fetchone()[0]
+        return None if result == 'ok' else f'quick_check found {result}'
+    except sqlite3.DatabaseError as e:
+        return f"SQLite can't read it: {e}"
+    finally:
+        conn.close()
+
+
+def VerifyBackup(entry: dict, folder: str = backupFolderPath):
+    """
+    Verifies a backup, see BackupProblem.
+    :param entry: The manifest entry of the backup.
+    :param folder: The folder the backups are saved in.
+    :return: True if the backup is intact, otherwise False.
+    """
+    return BackupProblem(entry, folder) is None
+
+
+def RestoreArchives(entry: dict, folder: str = backupFolderPath):
+    """
+    Copies the archives saved with a backup over the archives of closed years, and deletes the archives of the years
+    archived after it, whose transactions are live in the backup. Backups taken before archives were backed up don't
+    list them, so the archives are left as they are.
+    :param entry: The manifest entry of the backup.
+    :param folder: The folder the backups are saved in.
+    """
+    if 'archives' not in entry:
+        return
+    for year in ArchiveHandler.ArchivedYears():
+        if str(year) not in entry['archives']:
+            os.remove(ArchiveHandler.ArchiveFilePath(year))
+    for year, archive in entry['archives'].items():
+        CopyDatabase(os.path.join(folder, archive['file']), ArchiveHandler.ArchiveFilePath(int(year)))
+
+
+def PlanRestore(pointInTime: datetime, folder: str = backupFolderPath):
+    """
+    Works out how the database would be restored to a point in time, without changing anything: the newest verified
+    backup taken before that time and the statements logged after it and up to that time.
+    Archiving isn't in the statement log, so a point in time after transactions were archived can only be restored
+    from a backup taken after they were.
+    :param pointInTime: The time to restore the database to.
+    :param folder: The folder the backups are saved in.
+    :return: Tuple of the manifest entry of the backup and the list of (seq, time, statement, params) to replay.
+    """
+    candidates = [entry for entry in LoadManifest(folder) if datetime.fromisoformat(entry['time']) <= pointInTime]
+    backup = None
+    for entry in reversed(candidates):
+        problem = BackupProblem(entry, folder)
+        if problem is None:
+            backup = entry
+            break
+        print(f"Skipping backup {entry['file']}: {problem}")
+    if backup is None:
+        raise ValueError(f'No verified backup was taken before {pointInTime}')
+
+    live = sqlite3.connect(DatabaseHandler.databaseFilePath)
+    try:
+        archivedTime = live.execute('SELECT MIN(time) FROM archive_log WHERE time > ? AND time <= ?',
+                                    (backup['time'], pointInTime.isoformat(timespec='microseconds'))).fetchone()[0]
+        if archivedTime is not None:
+            raise ValueError(f"Transactions were archived at {archivedTime}, after the backup {backup['file']} was "
+                             f"taken, restore to a point before then or take a backup after archiving")
+        statements = live.execute('''
+            SELECT seq, time, statement, params FROM statement_log
+            WHERE seq > ? AND time <= ?
+            ORDER BY seq
+        ''', (backup['changeSeq'], pointInTime.isoformat(timespec='microseconds'))).fetchall()
+    finally:
+        live.close()
+    return backup, statements
+
+
+def RestoreToPointInTime(pointInTime: datetime, folder: str = backupFolderPath):
+    """
+    Restores the database to how it was at a point in time, see PlanRestore.
+    The backup is copied over the database, then the statements are replayed on top of it, and the archives are
+    restored from the backup.
+    :param pointInTime: The time to restore the database to.
+    :param folder: The folder the backups are saved in.
+    :return: The manifest entry of the backup that was restored.
+    """
+    # The statements to replay are read before the database is overwritten by the backup
+    backup, statements = PlanRestore(pointInTime, folder)
+    live = sqlite3.connect(DatabaseHandler.databaseFilePath)
+    try:
+        source = sqlite3.connect(os.path.join(folder, backup['file']))
+        try:
+            source.backup(live)
+        finally:
+            source.close()
+        lastBackupId = live.execute('SELECT COALESCE(MAX(id), 0) FROM transactions').fetchone()[0]
+
+        for seq, statementTime, statement, params in statements:
+            live.execute(statement, json.loads(params))
+            live.execute("INSERT INTO statement_log (seq, time, statement, params) VALUES (?, ?, ?, ?)",
+                         (seq, statementTime, statement, params))
+        live.commit()
+    finally:
+        live.close()
+    RestoreArchives(backup, folder)
+    RebuildDerivedData(lastBackupId)
+    return backup
+
+
+def RebuildDerivedData(lastBackupId: int):
+    """
+    Works out the tables that are kept up to date without being logged again after a restore, as replaying the
+    statement log doesn't change them. The monthly rollup is kept by triggers, so it is already right.
+    The spending statistics are added up from the transactions in the backup, then the replayed transactions are
+    scored in the order they were added, so their unusual expenses are alerted as they were the first time. The
+    budgets' spending is added up again from the restored transactions.
+    :param lastBackupId: The ID of the last transaction in the backup.
+    """
+    DatabaseHandler.RebuildSpendingStats(lastBackupId)
+    replayed = DatabaseHandler.Fetch("SELECT user_id, id, amount, description, currency FROM transactions "
+                                     "WHERE id > ? AND typeof(amount) != 'text' ORDER BY id", (lastBackupId,))
+    userRows = {}
+    for user_id, transactionId, amount, description, currency in replayed:
+        userRows.setdefault(user_id, []).append((transactionId, amount, description, currency))
+    for user_id, rows in userRows.items():
+        DatabaseHandler.UpdateSpendingStats(user_id, rows)
+    DatabaseHandler.RebuildBudgetSpend()
+
+
+if __name__ == '__main__':
+    DatabaseHandler.Open()
+    # Take a backup and report its throughput
+    newEntry = BackupDatabase()
+    print(f"{newEntry['file']}: {newEntry['bytes'] / (1 << 20):.1f} MB in {newEntry['seconds']} s "
+          f"({newEntry['megabytesPerSecond']} MB/s), {BackupProblem(newEntry) or 'verified'}")
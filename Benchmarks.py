@@ -0,0 +1,491 @@
+"""
+FILE NAME - Benchmarks.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Benchmarks for the database and main page code. Every benchmark runs against a new database in a
+    temporary folder filled by DataGenerator, so 'finance management.db' is never changed. The results are compared
+    with the saved baseline and any case slower than the threshold is reported as a regression.
+    Run it with - python Benchmarks.py - or save a new baseline with - python Benchmarks.py --save-baseline -
+    The main page cases need a display. Without one they run on a virtual display when Xvfb and pyvirtualdisplay are
+    installed, and are skipped otherwise.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import sys
+import atexit
+import json
+import time
+import sqlite3
+import argparse
+import itertools
+import tempfile
+import multiprocessing
+import importlib.util
+import tkinter
+import DatabaseHandler
+import DataGenerator
+import Encryption
+import FinanceService
+import UserModel
+
+baselineFilePath = 'benchmark baseline.json'
+regressionThreshold = 1.25  # A case is a regression when it takes 25% longer than its baseline
+noiseSeconds = 0.0005  # and at least this much longer, as cases under a millisecond vary more than 25% between runs
+benchmarkSizes = (1000, 10000, 100000)  # Transactions per user
+
+
+def UseTemporaryDatabase():
+    """
+    Points DatabaseHandler at a new, empty database in a temporary folder.
+    :return: The path of the temporary database.
+    """
+    folder = tempfile.mkdtemp(prefix='budget-benchmark-')
+    DatabaseHandler.Open(os.path.join(folder, 'benchmark.db'))
+    return DatabaseHandler.databaseFilePath
+
+
+def TimeIt(function, repeat: int = 3):
+    """
+    Times a function, keeping the fastest of a few runs.
+    :param function: The function to time.
+    :param repeat: How many times the function is run.
+    :return: The fastest run in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        startTime = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - startTime)
+    return best
+
+
+def LegacyExecute(query: str, params: tuple, returnRows: bool = False):
+    """
+    The per-call path queries used to take: open a connection, execute, commit and close for every query.
+    :param query: SQL query string to execute.
+    :param params: The parameters of the query.
+    :param returnRows: Whether the rows of the query are returned.
+    :return: List of rows if returnRows is True, otherwise None.
+    """
+    conn = sqlite3.connect(DatabaseHandler.databaseFilePath)
+    c = conn.cursor()
+    c.execute(query, params)
+    conn.commit()
+    rows = c.fetchall() if returnRows else None
+    c.close()
+    conn.close()
+    return rows
+
+
+def BenchmarkQueryApi(rowCount: int = 2000):
+    """
+    Compares the old per-call path with the query API for inserting and selecting single rows.
+    :param rowCount: How many rows are inserted and selected by each case.
+    :return: Dictionary of case name to seconds.
+    """
+    UseTemporaryDatabase()
+    insertQuery = "INSERT INTO transactions (user_id, amount, date, description) VALUES (?, ?, ?, ?)"
+    selectQuery = "SELECT amount, date, description FROM transactions WHERE id = ?"
+    rows = [(1, float(i), '24/01/01', f'Transaction {i}') for i in range(rowCount)]
+    ids = [(i,) for i in range(1, rowCount + 1)]
+
+    results = {
+        'legacy insert per call': TimeIt(lambda: [LegacyExecute(insertQuery, row) for row in rows], 1),
+        'Execute insert per call': TimeIt(lambda: [DatabaseHandler.Execute(insertQuery, row, log=False)
+                                                   for row in rows], 1),
+        'ExecuteMany insert batch': TimeIt(lambda: DatabaseHandler.ExecuteMany(insertQuery, rows, log=False), 1),
+        'legacy select per call': TimeIt(lambda: [LegacyExecute(selectQuery, i, True) for i in ids]),
+        'Fetch select per call': TimeIt(lambda: [DatabaseHandler.Fetch(selectQuery, i) for i in ids]),
+    }
+    print(f'Query API ({rowCount} rows per case)')
+    for name, seconds in results.items():
+        print(f'  {name:<28}{seconds * 1000:>10.1f} ms{seconds / rowCount * 1e6:>10.1f} us/row')
+    return results
+
+
+def ConcurrentWriter(databasePath: str, writerId: int, insertCount: int):
+    """
+    Inserts transactions one at a time, the way the app does, from its own process.
+    :param databasePath: The database to write to.
+    :param writerId: The number of this writer, used as the user ID of its transactions.
+    :param insertCount: How many transactions to insert.
+    :return: The number of inserts that failed.
+    """
+    DatabaseHandler.databaseFilePath = databasePath
+    failed = 0
+    for i in range(insertCount):
+        try:
+            DatabaseHandler.AddTransaction(writerId, float(i), '24/01/01', f'Writer {writerId}')
+        except sqlite3.OperationalError as e:
+            print(f'Writer {writerId} insert {i} failed: {e}')
+            failed += 1
+    return failed
+
+
+def BenchmarkConcurrentWriters(writerCount: int = 4, insertCount: int = 500):
+    """
+    Runs several processes inserting into the same database at once, like copies of the app running together, and
+    checks that no insert failed or was lost.
+    :param writerCount: How many processes write at once.
+    :param insertCount: How many transactions each process inserts.
+    :return: Dictionary of case name to seconds.
+    """
+    databasePath = UseTemporaryDatabase()
+    DatabaseHandler.CloseConnection()  # Each process opens its own connection
+    startTime = time.perf_counter()
+    with multiprocessing.Pool(writerCount) as pool:
+        failed = sum(pool.starmap(ConcurrentWriter, [(databasePath, writerId, insertCount)
+                                                     for writerId in range(1, writerCount + 1)]))
+    seconds = time.perf_counter() - startTime
+    saved = DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions')[0]
+    expected = writerCount * insertCount
+    print(f'Concurrent writers ({writerCount} processes x {insertCount} inserts)')
+    print(f'  {saved} of {expected} inserts saved, {failed} failed, {seconds * 1000:.1f} ms, '
+          f'{expected / seconds:.0f} inserts/s')
+    if failed or saved != expected:
+        raise RuntimeError(f'{failed} inserts failed and {expected - saved} were lost')
+    return {f'concurrent writers x{writerCount}': seconds}
+
+
+def BenchmarkMemory(size: int = 1000000):
+    """
+    Compares the memory a user's transactions take with the dtypes read_sql_query guesses and with the User model's
+    schema, and times loading them into the model.
+    :param size: How many transactions the user has.
+    :return: Dictionary of case name to seconds.
+    """
+    UseTemporaryDatabase()
+    username = DataGenerator.GenerateData(1, size)[0]
+    user = UserModel.User()
+    user.LoadUserData(username)
+    inferred = DatabaseHandler.PullTransactionsData(user.id)
+    typed = UserModel.TypedFrame(inferred, UserModel.transactionSchema)
+    print(f'Memory ({size} transactions)')
+    for name, frame in (('inferred dtypes', inferred), ('User model schema', typed)):
+        megabytes = frame.memory_usage(deep=True).sum() / 2 ** 20
+        print(f'  {name:<24}{megabytes:>10.1f} MB{megabytes / size * 1e6:>10.1f} MB per million transactions')
+        for column, columnBytes in frame.memory_usage(deep=True, index=False).items():
+            print(f'    {column:<22}{str(frame[column].dtype):<16}{columnBytes / 2 ** 20:>8.1f} MB')
+    seconds = TimeIt(user.LoadTransactionData)
+    print(f'  User.LoadTransactionData{seconds * 1000:>24.1f} ms')
+    return {f'User.LoadTransactionData@{size}': seconds}
+
+
+def BenchmarkEncryption(size: int = 100000):
+    """
+    Compares loading a user's transactions unencrypted, encrypted the first time in a session (decrypting every row)
+    and encrypted again (from the session's decrypted transactions, after one row has changed and after none have).
+    :param size: How many transactions the user has.
+    :return: Dictionary of case name to seconds.
+    """
+    UseTemporaryDatabase()
+    username = DataGenerator.GenerateData(1, size)[0]
+    userId = DatabaseHandler.PullUsersData(username)[0][0]
+    results = {f'PullTransactionsData plain@{size}': TimeIt(lambda: DatabaseHandler.PullTransactionsData(userId))}
+    DatabaseHandler.EnableEncryption(username, DataGenerator.generatedPassword, 'answer')
+
+    def PullFirstTime():
+        Encryption.decryptedTransactions.clear()
+        DatabaseHandler.PullTransactionsData(userId)
+
+    def PullAfterChange():
+        DatabaseHandler.AddTransaction(userId, 1.0, '24/01/01', 'Benchmark')
+        DatabaseHandler.PullTransactionsData(userId)
+
+    results[f'PullTransactionsData encrypted first@{size}'] = TimeIt(PullFirstTime)
+    results[f'PullTransactionsData encrypted changed@{size}'] = TimeIt(PullAfterChange)
+    results[f'PullTransactionsData encrypted cached@{size}'] = TimeIt(
+        lambda: DatabaseHandler.PullTransactionsData(userId))
+    DatabaseHandler.LockUser(userId)
+    print(f'Encryption ({size} transactions)')
+    for name, seconds in results.items():
+        print(f'  {name:<48}{seconds * 1000:>10.1f} ms')
+    return results
+
+
+def BenchmarkImport(size: int = 100000):
+    """
+    Times importing a statement that overlaps the transactions already saved: finding its duplicates and near
+    duplicates, then adding it, which skips the half that was already imported.
+    :param size: How many transactions the user has, the statement has the same number.
+    :return: Dictionary of case name to seconds.
+    """
+    UseTemporaryDatabase()
+    username = DataGenerator.GenerateData(1, size)[0]
+    userId = DatabaseHandler.PullUsersData(username)[0][0]
+    results = {f'FillFingerprints@{size}': TimeIt(lambda: DatabaseHandler.FillFingerprints(userId), repeat=1)}
+    transactions = DatabaseHandler.PullTransactionsData(userId)
+    saved = list(zip(transactions['amount'], transactions['date'], transactions['description'],
+                     transactions['currency']))
+    # The second half of the statement is new, the same transactions four years (a whole leap cycle) later
+    later = [(amount, f'{int(date[:2]) + 4:02d}{date[2:]}', description, currency)
+             for amount, date, description, currency in saved[size // 2:]]
+    statement = saved[size // 2:] + later
+    results[f'FindDuplicates@{size}'] = TimeIt(lambda: DatabaseHandler.FindDuplicates(userId, statement))
+    results[f'AddTransactions overlapping@{size}'] = TimeIt(lambda: DatabaseHandler.AddTransactions(userId, statement),
+                                                            repeat=1)
+    print(f'Import ({size} transactions)')
+    for name, seconds in results.items():
+        print(f'  {name:<48}{seconds * 1000:>10.1f} ms')
+    return results
+
+
+def BenchmarkSpendingStats(sizes=(1000, 100000)):
+    """
+    Times rebuilding the spending statistics and adding one expense for users with different numbers of transactions,
+    scoring an expense shouldn't take longer for a longer history.
+    :param sizes: How many transactions the users have.
+    :return: Dictionary of case name to seconds.
+    """
+    results = {}
+    for size in sizes:
+        UseTemporaryDatabase()
+        username = DataGenerator.GenerateData(1, size)[0]
+        userId = DatabaseHandler.PullUsersData(username)[0][0]
+        results[f'RebuildSpendingStats@{size}'] = TimeIt(DatabaseHandler.RebuildSpendingStats, repeat=1)
+        results[f'AddTransaction scored@{size}'] = TimeIt(
+            lambda: DatabaseHandler.AddTransaction(userId, -12.5, '24/01/01', 'Groceries'), repeat=10)
+    print('Spending statistics')
+    for name, seconds in results.items():
+        print(f'  {name:<48}{seconds * 1000:>10.1f} ms')
+    return results
+
+
+def BenchmarkReports(userCount: int = 4, size: int = 10000, monthCount: int = 6):
+    """
+    Times making the monthly statements of a few users in this process and in a pool of processes, then again with
+    their charts cached.
+    :param userCount: How many users get statements.
+    :param size: How many transactions each user has.
+    :param monthCount: How many months of statements each user gets.
+    :return: Dictionary of case name to seconds.
+    """
+    import shutil
+    import ReportHandler
+    databasePath = UseTemporaryDatabase()
+    users = []
+    for username in DataGenerator.GenerateData(userCount, size, startDate='24/01/01', days=365):
+        users.append(UserModel.User())
+        users[-1].LoadData(username)
+    months = ReportHandler.MonthRange('24/01', f'24/{monthCount:02d}')
+    folder = os.path.join(os.path.dirname(databasePath), 'reports')
+    cases = {f'GenerateStatements serial@{userCount}x{monthCount}': 1,
+             f'GenerateStatements pool@{userCount}x{monthCount}': None}
+    results = {}
+    for name, processes in cases.items():
+        shutil.rmtree(folder, ignore_errors=True)
+        results[name] = TimeIt(lambda: ReportHandler.GenerateStatements(users, months, DatabaseHandler.defaultCurrency,
+                                                                        folder=folder, processes=processes), repeat=1)
+    results[f'GenerateStatements cached@{userCount}x{monthCount}'] = TimeIt(
+        lambda: ReportHandler.GenerateStatements(users, months, DatabaseHandler.defaultCurrency, folder=folder))
+    print(f'Reports ({userCount} users, {monthCount} months, {size} transactions each)')
+    for name, seconds in results.items():
+        print(f'  {name:<48}{seconds * 1000:>10.1f} ms')
+    return results
+
+
+def LoadBudgetManager():
+    """
+    Imports Budget Manager.py, which can't be imported by name because of the space in its file name.
+    :return: The imported module.
+    """
+    spec = importlib.util.spec_from_file_location('BudgetManager', 'Budget Manager.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def StartVirtualDisplay():
+    """
+    Starts a virtual display for the main page cases when there is no display, eg - on a server. It needs Xvfb and
+    pyvirtualdisplay, and is stopped when the benchmarks end.
+    :return: The virtual display, or None if there is a display already or a virtual one couldn't be started.
+    """
+    if os.environ.get('DISPLAY') or not sys.platform.startswith('linux'):
+        return None
+    try:
+        from pyvirtualdisplay import Display
+        display = Display(visible=False, size=(1280, 800))
+        display.start()
+    except (ImportError, OSError) as e:  # pyvirtualdisplay or Xvfb isn't installed
+        print(f'No virtual display: {e}')
+        return None
+    atexit.register(display.stop)
+    return display
+
+
+def CreateMainPage(budgetManager):
+    """
+    Creates the main window for the main page cases, on a virtual display if there isn't a display.
+    :param budgetManager: The imported Budget Manager module.
+    :return: The main window, or None if there is no display to create it on.
+    """
+    StartVirtualDisplay()
+    try:
+        return budgetManager.MainPage()
+    except tkinter.TclError as e:
+        print(f'Skipping the main page cases: {e}')
+        return None
+
+
+def BenchmarkStartup():
+    """
+    Times loading the sidebar icons the old way (opening and scaling every PNG), from the PNGs the first time and from
+    the cached sprite sheets after that, then making the main page, which needs a display.
+    :return: Dictionary of case name to seconds.
+    """
+    import shutil
+    from PIL import Image
+    import AssetCache
+    AssetCache.cacheFolderPath = tempfile.mkdtemp(prefix='budget-benchmark-icons-')
+
+    def LoadIconsUncached():
+        # What the main page did before the sprite sheets, both themes' PNGs scaled for each launch
+        for theme in AssetCache.themes:
+            for path in AssetCache.SourcePaths(theme).values():
+                Image.open(path).resize(AssetCache.iconSize)
+
+    def LoadIconsFirstTime():
+        shutil.rmtree(AssetCache.cacheFolderPath, ignore_errors=True)
+        AssetCache.loadedIcons.clear()
+        AssetCache.LoadIcons('Light', AssetCache.iconSize)
+
+    def LoadIconsCached():
+        AssetCache.loadedIcons.clear()
+        AssetCache.LoadIcons('Light', AssetCache.iconSize)
+
+    results = {'Icons uncached': TimeIt(LoadIconsUncached), 'Icons first time': TimeIt(LoadIconsFirstTime),
+               'Icons cached': TimeIt(LoadIconsCached)}
+    budgetManager = LoadBudgetManager()
+    UseTemporaryDatabase()
+    startTime = time.perf_counter()
+    app = CreateMainPage(budgetManager)
+    if app is not None:
+        results['MainPage()'] = time.perf_counter() - startTime
+        app.destroy()
+    print('Startup')
+    for name, seconds in results.items():
+        print(f'  {name:<48}{seconds * 1000:>10.1f} ms')
+    return results
+
+
+def BenchmarkEndToEnd(sizes=benchmarkSizes):
+    """
+    Times the paths the app runs when signing in and switching tabs, for a user with each number of transactions.
+    :param sizes: The numbers of transactions per user to time.
+    :return: Dictionary of case name to seconds.
+    """
+    budgetManager = LoadBudgetManager()
+    UseTemporaryDatabase()
+    app = CreateMainPage(budgetManager)
+    results = {}
+    appearanceModes = itertools.cycle(('Dark', 'Light'))
+
+    def SwitchAppearanceMode():
+        # Switches to the other mode and draws everything the switch changed, with the tables full
+        app.ChangeAppearanceModeEvent(next(appearanceModes))
+        app.update_idletasks()
+    for size in sizes:
+        UseTemporaryDatabase()
+        username = DataGenerator.GenerateData(1, size, goalsPerUser=max(20, size // 100))[0]
+        user = UserModel.User()
+        results[f'CheckUser@{size}'] = TimeIt(lambda: DatabaseHandler.CheckUser(username, 'password'), 1)
+        results[f'User.LoadData@{size}'] = TimeIt(lambda: user.LoadData(username))
+        results[f'FinanceService.SplitTransactions@{size}'] = TimeIt(
+            lambda: FinanceService.SplitTransactions(user.transactions, 'date', 'amount'))
+        results[f'FinanceService.CumulativeBalance@{size}'] = TimeIt(
+            lambda: FinanceService.CumulativeBalance(user.transactions))
+        results[f'FinanceService.CashFlowTotals@{size}'] = TimeIt(
+            lambda: FinanceService.CashFlowTotals(user.transactions))
+        results[f'FinanceService.RollupTotals@{size}'] = TimeIt(lambda: FinanceService.RollupTotals(user.monthlyTotals))
+        for bucket in ('day', 'month'):
+            results[f'DatabaseHandler.Aggregate {bucket}@{size}'] = TimeIt(
+                lambda: DatabaseHandler.Aggregate(user.id, bucket=bucket))
+        results[f'User.BalanceOverTime month@{size}'] = TimeIt(
+            lambda: user.BalanceOverTime(DatabaseHandler.defaultCurrency, bucket='month'))
+        if app is not None:
+            app.user.LoadData(username)
+            app.goalSortBy.set(0)
+            results[f'MainPage.LoadTransactions@{size}'] = TimeIt(app.LoadTransactions)
+            results[f'MainPage.UpdateCashFlowPlot@{size}'] = TimeIt(app.UpdateCashFlowPlot)
+            results[f'MainPage.SortGoals@{size}'] = TimeIt(app.SortGoals)
+            results[f'MainPage switch appearance mode@{size}'] = TimeIt(SwitchAppearanceMode)
+    if app is not None:
+        app.destroy()
+
+    print('End to end')
+    for name, seconds in results.items():
+        print(f'  {name:<40}{seconds * 1000:>10.1f} ms')
+    return results
+
+
+def CompareWithBaseline(results: dict, baselinePath: str = baselineFilePath, threshold: float = regressionThreshold):
+    """
+    Compares results with the saved baseline. Cases that are less than noiseSeconds slower aren't regressions.
+    :param results: Dictionary of case name to seconds.
+    :param baselinePath: The path of the baseline file.
+    :param threshold: How many times slower than its baseline a case can be before it is a regression.
+    :return: List of the names of the cases that regressed.
+    """
+    if not os.path.exists(baselinePath):
+        print(f'No baseline at {baselinePath}, save one with --save-baseline')
+        return []
+    with open(baselinePath) as file:
+        baseline = json.load(file)
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name] * threshold and seconds - baseline[name] >= noiseSeconds:
+            regressions.append(name)
+            print(f'REGRESSION {name}: {seconds * 1000:.1f} ms, baseline {baseline[name] * 1000:.1f} ms')
+    return regressions
+
+
+def SaveBaseline(results: dict, baselinePath: str = baselineFilePath):
+    """
+    Saves results as the new baseline, keeping the baseline of cases that weren't run.
+    :param results: Dictionary of case name to seconds.
+    :param baselinePath: The path of the baseline file.
+    """
+    baseline = {}
+    if os.path.exists(baselinePath):
+        with open(baselinePath) as file:
+            baseline = json.load(file)
+    baseline.update({name: round(seconds, 6) for name, seconds in results.items()})
+    with open(baselinePath, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+
+# The benchmarks that can be run, by the name used on the command line
+benchmarks = {
+    'query': lambda arguments: BenchmarkQueryApi(),
+    'startup': lambda arguments: BenchmarkStartup(),
+    'endtoend': lambda arguments: BenchmarkEndToEnd(arguments.sizes),
+    'concurrent': lambda arguments: BenchmarkConcurrentWriters(),
+    'encryption': lambda arguments: BenchmarkEncryption(),
+    'memory': lambda arguments: BenchmarkMemory(),
+    'import': lambda arguments: BenchmarkImport(),
+    'spending': lambda arguments: BenchmarkSpendingStats(),
+    'reports': lambda arguments: BenchmarkReports(),
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the benchmarks and compare them with the baseline.')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f"The benchmarks to run, all of them by default. Choose from: {', '.join(benchmarks)}")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(benchmarkSizes),
+                        help='Transactions per user for the end to end benchmark.')
+    parser.add_argument('--threshold', type=float, default=regressionThreshold)
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the new baseline.')
+    arguments = parser.parse_args()
+    for benchmarkName in arguments.names:
+        if benchmarkName not in benchmarks:
+            parser.error(f'Unknown benchmark: {benchmarkName}')
+
+    allResults = {}
+    for benchmarkName in arguments.names or benchmarks:
+        allResults.update(benchmarks[benchmarkName](arguments))
+    if arguments.save_baseline:
+        SaveBaseline(allResults)
+    elif CompareWithBaseline(allResults, threshold=arguments.threshold):
+        sys.exit(1)
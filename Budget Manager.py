@@ -17,7 +17,16 @@ import sqlite3
 from CTkToolTip import CTkToolTip
 import pandas as pd
 import DatabaseHandler
-from PIL import Image
+from UserModel import User
+import FinanceService
+from FinanceService import FormatMoney
+import ExportHandler
+from ChangeWatcher import ChangeWatcher
+import BackupHandler
+import Profiler
+import QueryStats
+import AssetCache
+import Theme
 from tkinter import messagebox
 import tkinter.ttk
 import customtkinter
@@ -27,6 +36,28 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 
+# The column each transaction table's sort radio button sorts by, the default (2) keeps them in order
+transactionSortColumns = {0: 'date', 1: 'amount'}
+# The options of the statistics plot's bucket menu and the buckets they total by
+statisticsBuckets = {'Day': 'day', 'Week': 'week', 'Month': 'month', 'Year': 'year'}
+
+# The currencies of the symbols amounts can be typed with, other currencies are typed with their three letter code
+symbolCurrencies = {symbol: currency for currency, symbol in FinanceService.currencySymbols.items()}
+
+# The tables each view shows data from, a view is only redrawn after one of them has changed
+viewTables = {
+    # The budget alerts listed on the Home tab change with the budgets and the transactions they cover
+    'home': {'transactions', 'goal', 'budgets'},
+    'goals': {'goal'},
+    'transactions': {'transactions'},
+    'statistics': {'transactions'},
+    'budget': {'budgets', 'transactions'},  # The spending of budgets changes with the transactions
+}
+changePollMs = 1000  # How often the database is checked for changes made by another copy of the app
+alertsShown = 5  # The most unusual expenses and budget alerts listed on the Home tab
+progressBarWidth = 10  # Characters in the progress bars of the goals table
+
+
 class CustomPlot:
     """
     A class to create and manage a custom plot using matplotlib within a Tkinter application.
@@ -64,6 +95,7 @@ class CustomPlot:
         self.line, = self.ax.plot(df['date'], df['amount'])
         self.fig.autofmt_xdate()  # Rotate and align the tick labels, so they look better.
 
+    @Profiler.Timed('matplotlib')
     def UpdatePlot(self, df, x, y):
         """
         Updates the plot with new data.
@@ -80,63 +112,14 @@ class CustomPlot:
         self.fig.autofmt_xdate()  # Rotate and align the tick labels, so they look better.
         self.canvas.draw()
 
-
-class User:
-    """
-    A class for a user with their associated financial data.
-    """
-
-    def __init__(self):
-        """Initializes a User object with default values and empty DataFrames."""
-        self.id: int = -1
-        self.name: str = ''
-        self.goals: pd.DataFrame = pd.DataFrame()
-        self.transactions: pd.DataFrame = pd.DataFrame()
-        self.investments: pd.DataFrame = pd.DataFrame()
-        self.budgets: pd.DataFrame = pd.DataFrame()
-
-    def EmptyData(self):
-        """Resets all user data to default values and empty DataFrames."""
-        self.id: int = -1
-        self.name: str = ''
-        self.goals: pd.DataFrame = pd.DataFrame()
-        self.transactions: pd.DataFrame = pd.DataFrame()
-        self.investments: pd.DataFrame = pd.DataFrame()
-        self.budgets: pd.DataFrame = pd.DataFrame()
-
-    def LoadData(self, username: str):
-        """
-        Loads all user data based on the provided username.
-        :param username: The username of the user to load data for.
+    def ApplyTheme(self, palette: dict):
         """
-        self.LoadUserData(username)
-        self.LoadGoalData()
-        self.LoadTransactionData()
-        self.LoadInvestmentData()
-        self.LoadBudgetData()
-
-    def LoadUserData(self, username: str):
-        """
-        Loads basic user data from the database.
-        :param username: The username of the user to load data for.
+        Colors the plot for an appearance mode. It is redrawn once Tk is idle, so switching modes isn't held up.
+        :param palette: The colors of the mode, see Theme.BuildPalettes.
+        :return:
         """
-        self.id, self.name, username, password, factorQ, factorA = DatabaseHandler.PullUsersData(username)[0]
-
-    def LoadGoalData(self):
-        """Loads the user's financial goals from the database."""
-        self.goals = DatabaseHandler.PullGoalsData(self.id)
-
-    def LoadTransactionData(self):
-        """Loads the user's transactions from the database."""
-        self.transactions = DatabaseHandler.PullTransactionsData(self.id)
-
-    def LoadInvestmentData(self):
-        """Loads the user's investments from the database."""
-        self.investments = DatabaseHandler.PullInvestmentsData(self.id)
-
-    def LoadBudgetData(self):
-        """Loads the user's budgets from the database."""
-        self.budgets = DatabaseHandler.PullBudgetsData(self.id)
+        Theme.ApplyPlotTheme(self.fig, self.ax, palette)
+        self.canvas.draw_idle()
 
 
 class SignInPage(customtkinter.CTkToplevel):
@@ -241,6 +224,9 @@ class SignInPage(customtkinter.CTkToplevel):
             # Failed the sign in
             messagebox.showerror('Error', "Couldn't sign in")
             return
+        if not DatabaseHandler.UnlockUser(username, password):
+            messagebox.showerror('Error', "Couldn't unlock your encrypted data")
+            return
 
         # Sign-in successful
         self.mainWindow.LogIn(username)
@@ -296,7 +282,7 @@ class SignInPage(customtkinter.CTkToplevel):
         if not DatabaseHandler.CheckTwoFactor(username, num, answer):
             messagebox.showerror('Failed', "Couldn't verify your details.")
             return
-        if not DatabaseHandler.ChangePassword(username, newPassword):
+        if not DatabaseHandler.ChangePassword(username, newPassword, answer):
             messagebox.showerror('Error', "Couldn't change password")
             return
         # Success
@@ -420,6 +406,50 @@ class CreateAccountPage(customtkinter.CTkToplevel):
             messagebox.showerror(title="Error", message="Username Already Taken\nPlease Try Again.")
 
 
+class ProfilerOverlay(customtkinter.CTkToplevel):
+    """
+    A window that shows the profiler's timings on top of the application, refreshed while it is open.
+    """
+    refreshMs = 500
+
+    def __init__(self):
+        """Initialises the overlay window and starts refreshing it."""
+        super().__init__()
+        self.geometry('560x420')
+        self.title('Profiler')
+        self.attributes('-topmost', True)
+        self.summaryText = customtkinter.CTkTextbox(self, width=540, height=350,
+                                                    font=customtkinter.CTkFont(family='Courier', size=12))
+        self.summaryText.grid(row=0, column=0, columnspan=2, padx=10, pady=10)
+        customtkinter.CTkButton(self, text='Save Trace', command=self.SaveTrace).grid(row=1, column=0)
+        customtkinter.CTkButton(self, text='Reset', command=Profiler.Reset).grid(row=1, column=1)
+        self.Refresh()
+
+    def Refresh(self):
+        """Shows the latest timings, slowest total first, and schedules the next refresh."""
+        if not self.winfo_exists():
+            return
+        lines = [] if Profiler.enabled else ['Profiling is off, turn it on from the Home tab', '']
+        lines.append(f"{'Name':<46}{'Count':>6}{'Total ms':>10}{'Max ms':>9}")
+        for name, count, total, maximum in Profiler.Summary()[:50]:
+            lines.append(f'{name[-46:]:<46}{count:>6}{total:>10.1f}{maximum:>9.1f}')
+        lines += ['', f"{'Query':<46}{'Count':>6}{'Total ms':>10}{'Max ms':>9}"]
+        for statement, count, total, maximum, rows in QueryStats.Summary()[:20]:
+            lines.append(f'{statement[:46]:<46}{count:>6}{total:>10.1f}{maximum:>9.1f}')
+        for slowQuery in QueryStats.RecentSlowQueries(5):
+            lines += ['', f"Slow query {slowQuery['ms']:.1f} ms: {slowQuery['statement']}", slowQuery['plan']]
+        self.summaryText.configure(state='normal')
+        self.summaryText.delete('1.0', 'end')
+        self.summaryText.insert('1.0', '\n'.join(lines))
+        self.summaryText.configure(state='disabled')
+        self.after(self.refreshMs, self.Refresh)
+
+    def SaveTrace(self):
+        """Saves the recorded spans to a Chrome trace file."""
+        path = Profiler.SaveTrace()
+        messagebox.showinfo('Saved', f'Trace saved to {path}\nOpen it in chrome://tracing or Perfetto')
+
+
 class MainPage(customtkinter.CTk):
     """
     The Main page of the Application.
@@ -442,46 +472,41 @@ class MainPage(customtkinter.CTk):
         self.sidebarFrame = customtkinter.CTkFrame(self, width=140, height=1100, corner_radius=0)
         self.sidebarFrame.grid(row=0, column=0, sticky='nsew')
 
-        # When loading the images, two are loaded. The first is the light mode and second is dark mode
-        homeImage = customtkinter.CTkImage(Image.open('images/icons/lightMode/HomeIcon.png'),
-                                           Image.open('images/icons/darkMode/HomeIconDarkMode.png'), (50, 50))
+        # The icons are loaded already scaled from AssetCache, only for the theme being shown, the other theme's
+        # are loaded when the appearance mode first changes to it
+        self.icons = {}
+        homeImage = self.IconImage('Home')
         self.homeButton = customtkinter.CTkButton(self.sidebarFrame, text='', command=self.HomeSelected,
                                                   image=homeImage,
                                                   fg_color="transparent")
         self.homeButton.grid(row=0, column=0, pady=(5, 67 / 2))
         CTkToolTip(self.homeButton, 'Home')
 
-        goalsImage = customtkinter.CTkImage(Image.open('images/icons/lightMode/GoalsIcon.png'),
-                                            Image.open('images/icons/darkMode/GoalsIconDarkMode.png'), (50, 50))
+        goalsImage = self.IconImage('Goals')
         self.goalsButton = customtkinter.CTkButton(self.sidebarFrame, text='', command=self.GoalsSelected,
                                                    image=goalsImage, fg_color='transparent')
         self.goalsButton.grid(row=1, column=0, pady=67 / 2)
         CTkToolTip(self.goalsButton, 'Goals')
 
-        balanceIcon = customtkinter.CTkImage(Image.open('images/icons/lightMode/BalanceIcon.png'),
-                                             Image.open('images/icons/darkMode/BalanceIconDarkMode.png'), (50, 50))
+        balanceIcon = self.IconImage('Balance')
         self.balanceButton = customtkinter.CTkButton(self.sidebarFrame, text='', command=self.CashFlowSelected,
                                                      image=balanceIcon, fg_color='transparent')
         self.balanceButton.grid(row=2, column=0, pady=67 / 2)
 
         CTkToolTip(self.balanceButton, 'Balance')
-        statsIcon = customtkinter.CTkImage(Image.open('images/icons/lightMode/StatsIcon.png'),
-                                           Image.open('images/icons/darkMode/StatsIconDarkMode.png'), (50, 50))
+        statsIcon = self.IconImage('Stats')
         self.statsButton = customtkinter.CTkButton(self.sidebarFrame, text='', command=self.StatisticsSelected,
                                                    image=statsIcon, fg_color='transparent')
         self.statsButton.grid(row=3, column=0, pady=67 / 2)
         CTkToolTip(self.statsButton, 'Statistics')
 
-        investmentsIcon = customtkinter.CTkImage(Image.open('images/icons/lightMode/InvestmentsIcon.png'),
-                                                 Image.open('images/icons/darkMode/InvestmentsIconDarkMode.png'),
-                                                 (50, 50))
+        investmentsIcon = self.IconImage('Investments')
         self.investmentsButton = customtkinter.CTkButton(self.sidebarFrame, text='', command=self.InvestmentsSelected,
                                                          image=investmentsIcon, fg_color='transparent')
         self.investmentsButton.grid(row=4, column=0, pady=67 / 2)
         CTkToolTip(self.investmentsButton, 'Investment Tracking')
 
-        budgetIcon = customtkinter.CTkImage(Image.open('images/icons/lightMode/BudgetsIcon.png'),
-                                            Image.open('images/icons/darkMode/BudgetsIconDarkMode.png'), (50, 50))
+        budgetIcon = self.IconImage('Budgets')
         self.budgetButton = customtkinter.CTkButton(self.sidebarFrame, text='', command=self.BudgetSelected,
                                                     image=budgetIcon, fg_color='transparent')
         self.budgetButton.grid(row=5, column=0, pady=(67 / 2, 5))
@@ -499,11 +524,30 @@ class MainPage(customtkinter.CTk):
         self.balanceLabel.grid(row=2, column=0)
         self.nextGoalLabel = customtkinter.CTkLabel(self.homeFrame, text='Next Goal:\nGOAL')
         self.nextGoalLabel.grid(row=2, column=1)
+        self.alertsLabel = customtkinter.CTkLabel(self.homeFrame, text='Unusual expenses:\nNONE', justify='left')
+        self.alertsLabel.grid(row=3, column=0, columnspan=3, pady=(20, 5))
+        self.dismissAlertsButton = customtkinter.CTkButton(self.homeFrame, command=self.DismissAlerts,
+                                                           text='Dismiss Alerts')
+        self.dismissAlertsButton.grid(row=4, column=0, pady=(0, 20))
         customtkinter.CTkOptionMenu(self.homeFrame, values=["System", "Light", "Dark"],
                                     command=self.ChangeAppearanceModeEvent).grid(row=6, column=1, padx=20,
                                                                                  pady=(10, 10))
         self.ChangeAppearanceModeEvent('System')
         customtkinter.CTkButton(self.homeFrame, command=self.LogOut, text='Log Out').grid(row=6, column=2)
+        customtkinter.CTkButton(self.homeFrame, command=self.ExportData, text='Export Data').grid(row=6, column=0)
+        customtkinter.CTkButton(self.homeFrame, command=self.BackupData, text='Backup').grid(row=7, column=0)
+        self.profilingSwitch = customtkinter.CTkSwitch(self.homeFrame, text='Profiling', command=self.ToggleProfiling)
+        self.profilingSwitch.grid(row=7, column=1)
+        if Profiler.enabled:
+            self.profilingSwitch.select()
+        self.profilerOverlay: ProfilerOverlay = None
+        self.bind('<F12>', lambda event: self.ToggleProfilerOverlay())
+        # The currency balances and totals are shown in
+        self.reportingCurrency = DatabaseHandler.defaultCurrency
+        self.currencyMenu = customtkinter.CTkOptionMenu(self.homeFrame, values=[self.reportingCurrency],
+                                                        command=self.ChangeReportingCurrency)
+        self.currencyMenu.grid(row=7, column=2)
+        CTkToolTip(self.currencyMenu, 'Reporting currency')
 
         # Configure Goals Frame with all widgets needed
         self.goalsFrame = customtkinter.CTkFrame(self)
@@ -518,28 +562,24 @@ class MainPage(customtkinter.CTk):
                                                                                                              pady=(
                                                                                                                  10, 0))
 
-        # Treeview Customisation (theme colors are selected)
-        bg_color = self._apply_appearance_mode(customtkinter.ThemeManager.theme["CTkFrame"]["fg_color"])
-        text_color = self._apply_appearance_mode(customtkinter.ThemeManager.theme["CTkLabel"]["text_color"])
-        selected_color = self._apply_appearance_mode(customtkinter.ThemeManager.theme["CTkButton"]["fg_color"])
-
-        treeStyle = tkinter.ttk.Style()
-        treeStyle.theme_use('default')
-        treeStyle.configure("Treeview", background=bg_color, foreground=text_color, fieldbackground=bg_color,
-                            borderwidth=0)
-        treeStyle.map('Treeview', background=[('selected', bg_color)], foreground=[('selected', selected_color)])
+        # Treeview Customisation, the colors of both modes are worked out once and applied by ApplyTheme
+        self.palettes = Theme.BuildPalettes(self)
+        self.treeStyle = tkinter.ttk.Style()
+        self.treeStyle.theme_use('default')
         self.bind("<<TreeviewSelect>>", lambda event: self.focus_set())
         self.goalsTable = tkinter.ttk.Treeview(self.goalsFrame)  # configure  the goals table
-        self.goalsTable['columns'] = ('Name', 'Description', 'Date', 'Money')
+        self.goalsTable['columns'] = ('Name', 'Description', 'Date', 'Money', 'Progress')
         self.goalsTable.column('#0', width=0, minwidth=0)
         self.goalsTable.column('Name', width=70, minwidth=25)
         self.goalsTable.column('Description', width=100, minwidth=25)
         self.goalsTable.column('Date', width=70, anchor='center', minwidth=25)
         self.goalsTable.column('Money', width=70, minwidth=25)
+        self.goalsTable.column('Progress', width=130, minwidth=25)
         self.goalsTable.heading('Name', text='Name')
         self.goalsTable.heading('Description', text='Description')
         self.goalsTable.heading('Date', text='Date')
         self.goalsTable.heading('Money', text='Money')
+        self.goalsTable.heading('Progress', text='Progress')
         self.goalsTable.grid(row=2, column=0, columnspan=4, padx=20, pady=20)
 
         self.goalSortBy = tkinter.IntVar(value=5)
@@ -566,6 +606,10 @@ class MainPage(customtkinter.CTk):
         customtkinter.CTkButton(self.goalsFrame, text='Create', command=self.AddNewGoal).grid(row=4, column=5)
         customtkinter.CTkButton(self.goalsFrame, text='Delete Selected', command=self.DeleteSelectedGoal).grid(row=4,
                                                                                                                column=3)
+        customtkinter.CTkButton(self.goalsFrame, text='Shift Dates', command=self.ShiftSelectedGoals).grid(row=4,
+                                                                                                           column=2)
+        customtkinter.CTkButton(self.goalsFrame, text='Contribute', command=self.ContributeToSelectedGoal).grid(
+            row=4, column=1)
 
         # configure cash flow page
         self.transactionsFrame = customtkinter.CTkFrame(self)
@@ -638,6 +682,11 @@ class MainPage(customtkinter.CTk):
         customtkinter.CTkButton(self.transactionsFrame, text='Delete Selected',
                                 command=self.DeleteSelectedExpense).grid(
             row=9, column=5)
+        # These act on the selected rows of both tables
+        customtkinter.CTkButton(self.transactionsFrame, text='Set Description',
+                                command=self.RecategoriseSelectedTransactions).grid(row=10, column=0)
+        customtkinter.CTkButton(self.transactionsFrame, text='Shift Dates',
+                                command=self.ShiftSelectedTransactions).grid(row=10, column=1)
 
         # configure statistics page
         self.statisticsFrame = customtkinter.CTkFrame(self)
@@ -646,6 +695,29 @@ class MainPage(customtkinter.CTk):
             row=0, column=0)
 
         self.transactionsPlot = CustomPlot(self.statisticsFrame, "Plot 1", "Date", "Amount")
+        # The date range and bucket of the plot, None for either end of the user's history
+        self.statisticsRange = (None, None)
+        self.plottedDates = (None, None)  # The first and last dates shown, which zooming works from
+        self.statisticsRangeFrame = customtkinter.CTkFrame(self.statisticsFrame, fg_color='transparent')
+        self.statisticsRangeFrame.grid(row=2, column=0, pady=10)
+        self.startStatisticsEntry = customtkinter.CTkEntry(self.statisticsRangeFrame,
+                                                           placeholder_text='From "YY/MM/DD"')
+        self.startStatisticsEntry.grid(row=0, column=0)
+        self.endStatisticsEntry = customtkinter.CTkEntry(self.statisticsRangeFrame, placeholder_text='To "YY/MM/DD"')
+        self.endStatisticsEntry.grid(row=0, column=1)
+        self.bucketMenu = customtkinter.CTkOptionMenu(self.statisticsRangeFrame, values=list(statisticsBuckets),
+                                                      command=lambda _: self.UpdateCashFlowPlot())
+        self.bucketMenu.grid(row=0, column=2)
+        customtkinter.CTkButton(self.statisticsRangeFrame, text='Show', command=self.ShowStatisticsRange).grid(
+            row=1, column=0)
+        customtkinter.CTkButton(self.statisticsRangeFrame, text='Zoom In',
+                                command=lambda: self.ZoomStatistics(0.5)).grid(row=1, column=1)
+        customtkinter.CTkButton(self.statisticsRangeFrame, text='Zoom Out',
+                                command=lambda: self.ZoomStatistics(2)).grid(row=1, column=2)
+        customtkinter.CTkButton(self.statisticsRangeFrame, text='All', command=self.ShowAllStatistics).grid(
+            row=1, column=3)
+        self.ApplyTheme(customtkinter.get_appearance_mode())
+        customtkinter.AppearanceModeTracker.add(self.ApplyTheme, self)
 
         # configure investments page
         self.investmentsFrame = customtkinter.CTkFrame(self)
@@ -658,17 +730,46 @@ class MainPage(customtkinter.CTk):
         self.budgetsFrame.grid(row=0, column=1, padx=10, pady=10, sticky='news')
         customtkinter.CTkLabel(self.budgetsFrame, text='Budgets Page', font=customtkinter.CTkFont(size=20)).grid(row=0,
                                                                                                                  column=0)
+        # A budget covers the expenses described as its name from the first day of its end date's month
+        self.nameBudgetEntry = customtkinter.CTkEntry(self.budgetsFrame, placeholder_text='Name eg - Groceries')
+        self.nameBudgetEntry.grid(row=1, column=0)
+        self.moneyBudgetEntry = customtkinter.CTkEntry(self.budgetsFrame, placeholder_text='Amount')
+        self.moneyBudgetEntry.grid(row=1, column=1)
+        self.dateBudgetEntry = customtkinter.CTkEntry(self.budgetsFrame, placeholder_text='End date "YY/MM/DD"')
+        self.dateBudgetEntry.grid(row=1, column=2)
+        customtkinter.CTkButton(self.budgetsFrame, text='Create', command=self.AddNewBudget).grid(row=1, column=3)
+        self.budgetsTable = tkinter.ttk.Treeview(self.budgetsFrame)
+        self.budgetsTable['columns'] = ('Name', 'Amount', 'Spent', 'Ends')
+        self.budgetsTable.column('#0', width=0, minwidth=0)
+        self.budgetsTable.column('Name', width=100, minwidth=25)
+        self.budgetsTable.column('Amount', width=80, anchor='center', minwidth=25)
+        self.budgetsTable.column('Spent', width=200, minwidth=25)
+        self.budgetsTable.column('Ends', width=70, anchor='center', minwidth=25)
+        self.budgetsTable.heading('Name', text='Name')
+        self.budgetsTable.heading('Amount', text='Amount')
+        self.budgetsTable.heading('Spent', text='Spent')
+        self.budgetsTable.heading('Ends', text='Ends')
+        self.budgetsTable.grid(row=2, column=0, columnspan=4, padx=20, pady=20)
+
+        # Views are only redrawn when the data they show has changed, in this window or another copy of the app
+        self.changeWatcher = ChangeWatcher()
+        self.dirtyViews = set(viewTables)
+        self.currentView = 'home'
+        self.after(changePollMs, self.PollChanges)
 
         self.signInWindow: SignInPage = None
         self.LogOut()
 
+    @Profiler.Timed('gui')
     def HomeSelected(self):
         """
         Handles the event when the Home button is selected.
-        Loads the Home frame and updates button states.
+        Loads the Home frame if its data has changed and updates button states.
         :return:
         """
-        self.LoadHome()
+        self.currentView = 'home'
+        if 'home' in self.dirtyViews:
+            self.LoadHome()
         self.homeFrame.tkraise()
         self.homeButton.configure(state='disabled', fg_color=('grey', '#494949'))
         self.goalsButton.configure(state='normal', fg_color='transparent')
@@ -677,6 +778,7 @@ class MainPage(customtkinter.CTk):
         self.investmentsButton.configure(state='normal', fg_color='transparent')
         self.budgetButton.configure(state='normal', fg_color='transparent')
 
+    @Profiler.Timed('gui')
     def LoadHome(self):
         """
         Loads the Home frame with user-specific data.
@@ -686,25 +788,61 @@ class MainPage(customtkinter.CTk):
         name = self.user.name
         self.nameLabel.configure(text=f'Welcome {name.title()}')
         self.LoadTransactions()  # we load transaction data here because it will change the balance label in it
-        df = self.user.goals.copy()
-        df['date'] = pd.to_datetime(df['date'], format='%y/%m/%d')
-        today = pd.Timestamp(datetime.now().date())
-        df = df[df['date'] >= today]
-        df['difference'] = (df['date'] - today).abs()
-        if not df.empty and not df['difference'].empty:
-            closest_date_index = df['difference'].idxmin()
-            closest_date = df.loc[closest_date_index, 'date'].date()
+        closest_date = FinanceService.NextGoalDate(self.user.goals, datetime.now().date(),
+                                                   cacheKey=self.user.goalsVersion)
+        if closest_date is not None:
             self.nextGoalLabel.configure(text=f'Next Goal:\n{closest_date}')
         else:
             self.nextGoalLabel.configure(text=f'Next Goal:\nNONE')
+        self.LoadAlerts()
+        self.dirtyViews.discard('home')
+
+    def LoadAlerts(self):
+        """
+        Lists the user's newest unusual expenses on the Home frame, with the usual expense of their category, and the
+        budgets whose spending has gone past 80% or 100% of their amount.
+        :return:
+        """
+        alerts = self.user.alerts.head(alertsShown)
+        lines = [f'{date}  {FormatMoney(-amount, currency)}  {description}  (usually {FormatMoney(mean, currency)})'
+                 for date, amount, description, currency, mean in
+                 zip(FinanceService.FormatDates(alerts['date']), alerts['amount'].tolist(),
+                     alerts['description'].tolist(), alerts['currency'].tolist(), alerts['mean'].tolist())]
+        if len(self.user.alerts) > alertsShown:
+            lines.append(f'and {len(self.user.alerts) - alertsShown} more')
+        budgetAlerts = self.user.budgetAlerts.head(alertsShown)
+        budgetLines = [f'{name}  {FormatMoney(spent, currency)} of {FormatMoney(amount, currency)} spent '
+                       f'({"over budget" if threshold >= 100 else f"past {threshold}%"}, ends {endDate})'
+                       for name, spent, amount, currency, threshold, endDate in
+                       zip(budgetAlerts['name'].tolist(), budgetAlerts['spent'].tolist(),
+                           budgetAlerts['amount'].tolist(), budgetAlerts['currency'].tolist(),
+                           budgetAlerts['threshold'].tolist(), FinanceService.FormatDates(budgetAlerts['end_date']))]
+        if len(self.user.budgetAlerts) > alertsShown:
+            budgetLines.append(f'and {len(self.user.budgetAlerts) - alertsShown} more')
+        self.alertsLabel.configure(text='Unusual expenses:\n' + ('\n'.join(lines) or 'NONE') + '\n\nBudgets:\n'
+                                   + ('\n'.join(budgetLines) or 'NONE'))
+        self.dismissAlertsButton.configure(state='normal' if lines or budgetLines else 'disabled')
+
+    def DismissAlerts(self):
+        """
+        Dismisses the user's unusual expense and budget alerts.
+        :return:
+        """
+        DatabaseHandler.DismissSpendingAlerts(self.user.id)
+        DatabaseHandler.DismissBudgetAlerts(self.user.id)
+        self.user.LoadAlertData()
+        self.LoadAlerts()
 
+    @Profiler.Timed('gui')
     def GoalsSelected(self):
         """
         Handles the event when the Goals button is selected.
-        Loads the Goals frame and updates button states.
+        Loads the Goals frame if its data has changed and updates button states.
         :return:
         """
-        self.LoadGoals()
+        self.currentView = 'goals'
+        if 'goals' in self.dirtyViews:
+            self.SortGoals()  # The goals were reloaded unsorted, so the chosen sort is applied again
         self.goalsFrame.tkraise()
         self.homeButton.configure(state='normal', fg_color='transparent')
         self.goalsButton.configure(state='disabled', fg_color=('grey', '#494949'))
@@ -713,27 +851,52 @@ class MainPage(customtkinter.CTk):
         self.investmentsButton.configure(state='normal', fg_color='transparent')
         self.budgetButton.configure(state='normal', fg_color='transparent')
 
-    def LoadGoals(self):
+    @Profiler.Timed('gui')
+    def LoadGoals(self, goals: pd.DataFrame = None):
         """
         Loads the Goals frame with user-specific goals data.
         Clears existing data in the Treeview and inserts new goals.
+        :param goals: The user's goals in the order they are shown, by default the order they were loaded in.
+        :return:
+        """
+        if goals is None:
+            goals = self.user.goals
+        with Profiler.Span('Refresh goals table', 'treeview'):
+            for i in self.goalsTable.get_children():
+                self.goalsTable.delete(i)
+            # The columns are read straight from the goals frame, without making a copy of each row
+            for index, name, description, date, amount, saved in zip(goals.index.tolist(), goals['name'].tolist(),
+                                                                      goals['description'].tolist(),
+                                                                      FinanceService.FormatDates(goals['date']),
+                                                                      goals['amount'].tolist(),
+                                                                      goals['saved'].tolist()):
+                self.goalsTable.insert('', 'end', iid=index,
+                                       values=(name, description, date, amount, ProgressBar(saved, amount)))
+        self.dirtyViews.discard('goals')
+
+    @Profiler.Timed('gui')
+    def UpdateGoalProgress(self):
+        """
+        Updates only the progress column of the goals table, after the contributions have changed.
         :return:
         """
-        for i in self.goalsTable.get_children():
-            self.goalsTable.delete(i)
-        for index, row in self.user.goals.iterrows():
-            self.goalsTable.insert('', 'end', iid=index,
-                                   values=(row['name'], row['description'], row['date'], row['amount']))
+        goals = self.user.goals
+        for index, amount, saved in zip(goals.index.tolist(), goals['amount'].tolist(), goals['saved'].tolist()):
+            if self.goalsTable.exists(index):
+                self.goalsTable.set(index, 'Progress', ProgressBar(saved, amount))
 
+    @Profiler.Timed('gui')
     def CashFlowSelected(self):
         """
         Handles the event when the Cash Flow button is selected.
-        Loads the Transactions frame and updates button states.
+        Loads the Transactions frame if its data or sorting has changed and updates button states.
         :return:
         """
-        self.expenseVariable.set(2)
-        self.incomeVariable.set(2)
-        self.LoadTransactions()
+        self.currentView = 'transactions'
+        if 'transactions' in self.dirtyViews or self.expenseVariable.get() != 2 or self.incomeVariable.get() != 2:
+            self.expenseVariable.set(2)
+            self.incomeVariable.set(2)
+            self.LoadTransactions()
         self.transactionsFrame.tkraise()
         self.homeButton.configure(state='normal', fg_color='transparent')
         self.goalsButton.configure(state='normal', fg_color='transparent')
@@ -742,13 +905,16 @@ class MainPage(customtkinter.CTk):
         self.investmentsButton.configure(state='normal', fg_color='transparent')
         self.budgetButton.configure(state='normal', fg_color='transparent')
 
+    @Profiler.Timed('gui')
     def StatisticsSelected(self):
         """
         Handles the event when the Statistics button is selected.
-        Loads the Statistics frame and updates button states.
+        Loads the Statistics frame if its data has changed and updates button states.
         :return:
         """
-        self.LoadStatistics()
+        self.currentView = 'statistics'
+        if 'statistics' in self.dirtyViews:
+            self.LoadStatistics()
         self.statisticsFrame.tkraise()
         self.homeButton.configure(state='normal', fg_color='transparent')
         self.goalsButton.configure(state='normal', fg_color='transparent')
@@ -757,12 +923,14 @@ class MainPage(customtkinter.CTk):
         self.investmentsButton.configure(state='normal', fg_color='transparent')
         self.budgetButton.configure(state='normal', fg_color='transparent')
 
+    @Profiler.Timed('gui')
     def LoadStatistics(self):
         """
         Loads the Statistics frame with updated cash flow data.
         :return:
         """
         self.UpdateCashFlowPlot()
+        self.dirtyViews.discard('statistics')
 
     def InvestmentsSelected(self):
         """
@@ -770,6 +938,7 @@ class MainPage(customtkinter.CTk):
         Loads the Investments frame and updates button states.
         :return:
         """
+        self.currentView = 'investments'
         self.investmentsFrame.tkraise()
         self.homeButton.configure(state='normal', fg_color='transparent')
         self.goalsButton.configure(state='normal', fg_color='transparent')
@@ -784,6 +953,9 @@ class MainPage(customtkinter.CTk):
         Loads the Budget frame and updates button states.
         :return:
         """
+        self.currentView = 'budget'
+        if 'budget' in self.dirtyViews:
+            self.LoadBudgets()
         self.budgetsFrame.tkraise()
         self.homeButton.configure(state='normal', fg_color='transparent')
         self.goalsButton.configure(state='normal', fg_color='transparent')
@@ -792,19 +964,73 @@ class MainPage(customtkinter.CTk):
         self.investmentsButton.configure(state='normal', fg_color='transparent')
         self.budgetButton.configure(state='disabled', fg_color=('grey', '#494949'))
 
+    @Profiler.Timed('gui')
+    def LoadBudgets(self):
+        """
+        Loads the Budgets frame with the user's budgets and how much of each has been spent.
+        :return:
+        """
+        for i in self.budgetsTable.get_children():
+            self.budgetsTable.delete(i)
+        budgets = self.user.budgets
+        for index, name, amount, currency, spent, endDate in zip(budgets.index.tolist(), budgets['name'].tolist(),
+                                                                 budgets['amount'].tolist(),
+                                                                 budgets['currency'].tolist(),
+                                                                 budgets['spent'].tolist(),
+                                                                 FinanceService.FormatDates(budgets['end_date'])):
+            # Spending isn't kept for users with encryption on
+            spentText = '' if spent != spent else f'{FormatMoney(spent, currency)} {ProgressBar(spent, amount)}'
+            self.budgetsTable.insert('', 'end', iid=index, values=(name, FormatMoney(amount, currency), spentText,
+                                                                   endDate))
+        self.dirtyViews.discard('budget')
+
+    def AddNewBudget(self):
+        """
+        Adds a new budget for the user.
+        Validates input and updates the budgets list.
+        :return:
+        """
+        passed = True
+        name = self.nameBudgetEntry.get().strip()
+        date = self.dateBudgetEntry.get().strip()
+        money = self.moneyBudgetEntry.get().strip()
+        if name == '':
+            passed = False
+            self.nameBudgetEntry.configure(border_color='red')
+        else:
+            self.nameBudgetEntry.configure(border_color='grey')
+        if date == '' or not IsValidDate(date):
+            passed = False
+            self.dateBudgetEntry.configure(border_color='red')
+        else:
+            self.dateBudgetEntry.configure(border_color='grey')
+        if not IsValidCurrency(money):
+            passed = False
+            self.moneyBudgetEntry.configure(border_color='red')
+        else:
+            self.moneyBudgetEntry.configure(border_color='grey')
+        if not passed:
+            return
+        money, currency = SplitCurrency(money)
+        DatabaseHandler.AddBudget(self.user.id, name, float(money), date, currency)
+        self.RefreshChanges()
+
     def LogOut(self):
         """
         Logs out the current user.
-        Clears user data and opens the sign-in window.
+        Clears user data, forgets their data key and opens the sign-in window.
         :return:
         """
+        DatabaseHandler.LockUser(self.user.id)
         self.user.EmptyData()
+        self.SetStatisticsRange(None, None)
         if self.signInWindow is None or not self.signInWindow.winfo_exists():
             self.signInWindow = SignInPage(self)
             self.withdraw()
         else:
             self.signInWindow.focus()
 
+    @Profiler.Timed('gui')
     def LogIn(self, username):
         """
         Logs in a user with the given username.
@@ -816,8 +1042,56 @@ class MainPage(customtkinter.CTk):
         self.deiconify()
         self.user.LoadData(username)
         self.goalSortBy.set(3)
+        self.currencyMenu.configure(values=DatabaseHandler.PullCurrencies())
+        self.changeWatcher.Reset(self.user.id)
+        self.dirtyViews = set(viewTables)
         self.HomeSelected()
 
+    def IconImage(self, name: str):
+        """
+        Makes the image of a sidebar icon from the pre-scaled icons of the current theme.
+        :param name: The name of the icon, see AssetCache.iconNames.
+        :return: The CTkImage.
+        """
+        theme = customtkinter.get_appearance_mode()
+        icon = AssetCache.LoadIcons(theme, self.IconPixelSize())[name]
+        # Until the other theme is loaded, CTkImage shows this theme's icon in both modes
+        self.icons[name] = customtkinter.CTkImage(**{f'{theme.lower()}_image': icon}, size=AssetCache.iconSize)
+        return self.icons[name]
+
+    def IconPixelSize(self):
+        """
+        Gets the size the icons are drawn at, their size times the window's scaling (eg - 2 on a high DPI screen).
+        :return: Tuple of the width and height in pixels.
+        """
+        scaling = customtkinter.ScalingTracker.get_widget_scaling(self)
+        return round(AssetCache.iconSize[0] * scaling), round(AssetCache.iconSize[1] * scaling)
+
+    @Profiler.Timed('gui')
+    def ApplyTheme(self, theme: str):
+        """
+        Gives the widgets customtkinter doesn't draw, the icons, tables and plot, the colors of an appearance mode.
+        Called whenever the appearance mode changes, customtkinter recolors its own widgets.
+        :param theme: 'Light' or 'Dark'.
+        :return:
+        """
+        palette = self.palettes[theme]
+        self.LoadIconTheme(theme)
+        Theme.ApplyTreeviewStyle(self.treeStyle, palette)
+        self.transactionsPlot.ApplyTheme(palette)
+
+    def LoadIconTheme(self, theme: str):
+        """
+        Gives the sidebar icons their images for a theme, if it is the first time it is shown.
+        :param theme: 'Light' or 'Dark'.
+        :return:
+        """
+        key = f'{theme.lower()}_image'
+        if any(image.cget(key) is None for image in self.icons.values()):
+            icons = AssetCache.LoadIcons(theme, self.IconPixelSize())
+            for name, image in self.icons.items():
+                image.configure(**{key: icons[name]})
+
     def ChangeAppearanceModeEvent(self, new_appearance_mode: str):
         """
         Changes the appearance mode of the application.
@@ -826,6 +1100,110 @@ class MainPage(customtkinter.CTk):
         """
         customtkinter.set_appearance_mode(new_appearance_mode)
 
+    def PollChanges(self):
+        """
+        Checks for changes to the user's data every changePollMs, so changes made by another copy of the app are shown.
+        :return:
+        """
+        if self.user.id != -1:
+            self.RefreshChanges()
+        self.after(changePollMs, self.PollChanges)
+
+    @Profiler.Timed('gui')
+    def RefreshChanges(self):
+        """
+        Reloads the user's data that has changed, marks the views that show it as needing a redraw and redraws the
+        current view if it is one of them.
+        :return:
+        """
+        changedTables = self.changeWatcher.Poll()
+        if not changedTables:
+            return
+        if 'transactions' in changedTables:
+            self.user.LoadTransactionData()
+        if 'goal' in changedTables:
+            self.user.LoadGoalData()
+        elif 'goal_contributions' in changedTables:
+            # Only the totals contributed have changed, so they are read and set in the goals table in place
+            self.user.LoadGoalProgress()
+            self.UpdateGoalProgress()
+        if changedTables & {'budgets', 'transactions'}:
+            self.user.LoadBudgetData()  # The budgets' spending changes with the transactions
+        if 'investments' in changedTables:
+            self.user.LoadInvestmentData()
+        self.dirtyViews.update(view for view, tables in viewTables.items() if tables & changedTables)
+        self.RenderCurrentView()
+
+    def RenderCurrentView(self):
+        """
+        Redraws the current view if its data has changed.
+        :return:
+        """
+        if self.currentView not in self.dirtyViews:
+            return
+        if self.currentView == 'home':
+            self.LoadHome()
+        elif self.currentView == 'goals':
+            self.SortGoals()
+        elif self.currentView == 'transactions':
+            self.LoadTransactions()
+        elif self.currentView == 'statistics':
+            self.LoadStatistics()
+        elif self.currentView == 'budget':
+            self.LoadBudgets()
+
+    def ChangeReportingCurrency(self, currency: str):
+        """
+        Changes the currency balances and totals are shown in.
+        :param currency: The currency code chosen.
+        :return:
+        """
+        self.reportingCurrency = currency
+        self.dirtyViews.update(view for view, tables in viewTables.items() if 'transactions' in tables)
+        self.RenderCurrentView()
+
+    def ToggleProfiling(self):
+        """
+        Turns profiling on or off from the switch on the Home tab, and opens the overlay when it is turned on.
+        :return:
+        """
+        Profiler.Enable(self.profilingSwitch.get() == 1)
+        if Profiler.enabled and (self.profilerOverlay is None or not self.profilerOverlay.winfo_exists()):
+            self.profilerOverlay = ProfilerOverlay()
+
+    def ToggleProfilerOverlay(self):
+        """
+        Opens the profiler overlay, or closes it if it is already open.
+        :return:
+        """
+        if self.profilerOverlay is None or not self.profilerOverlay.winfo_exists():
+            self.profilerOverlay = ProfilerOverlay()
+        else:
+            self.profilerOverlay.destroy()
+
+    def ExportData(self):
+        """
+        Exports a snapshot of the user's transactions, goals and budgets to Parquet files.
+        :return:
+        """
+        if self.user.encrypted and not messagebox.askokcancel(
+                'Export', 'Your transactions are encrypted, but the export will be in plain text\nExport anyway?'):
+            return
+        try:
+            snapshotFolder = ExportHandler.ExportUserData(self.user.id)
+        except ImportError:  # pyarrow isn't installed
+            messagebox.showerror('Error', "Couldn't export data\nPlease install pyarrow")
+            return
+        messagebox.showinfo('Success', f'Data exported to {snapshotFolder}')
+
+    def BackupData(self):
+        """
+        Takes an online backup of the database on a separate thread, so the app can still be used while it runs.
+        :return:
+        """
+        BackupHandler.BackupDatabaseInBackground(
+            lambda entry: self.after(0, lambda: messagebox.showinfo('Success', f"Backup saved to {entry['file']}")))
+
     def AddNewGoal(self):
         """
         Adds a new goal for the user.
@@ -854,32 +1232,68 @@ class MainPage(customtkinter.CTk):
             self.moneyGoalEntry.configure(border_color='grey')
         if not passed:
             return
-        money = money.replace('$', '')
-        DatabaseHandler.AddGoal(self.user.id, name, description, date, money)
-        self.user.LoadGoalData()
-        self.LoadGoals()
+        money, currency = SplitCurrency(money)
+        DatabaseHandler.AddGoal(self.user.id, name, description, date, float(money), currency)
+        self.RefreshChanges()
 
     def DeleteSelectedGoal(self):
         """
-        Deletes the selected goal from the user's goals list.
+        Deletes the selected goals from the user's goals list.
         Updates the goals list after deletion.
         :return:
         """
-        selected_item = self.goalsTable.selection()
-        if selected_item:
-            selected_iid = selected_item[0]
-            goal_row = self.user.goals.loc[int(selected_iid)]
-            goal_id = int(goal_row['id'])
-            DatabaseHandler.DeleteGoal(goal_id)
-            self.user.LoadGoalData()
-            self.LoadGoals()
+        goalIds = self.SelectedGoalIds()
+        if goalIds:
+            DatabaseHandler.DeleteGoals(goalIds)
+            self.RefreshChanges()
+
+    def ShiftSelectedGoals(self):
+        """
+        Moves the dates of the selected goals by a number of days the user enters.
+        Updates the goals list after the change.
+        :return:
+        """
+        goalIds = self.SelectedGoalIds()
+        if not goalIds:
+            return
+        days = AskDays()
+        if days is None:
+            return
+        DatabaseHandler.ShiftGoalDates(goalIds, days)
+        self.RefreshChanges()
+
+    def ContributeToSelectedGoal(self):
+        """
+        Adds an amount the user enters to the selected goal, dated today.
+        Updates the goal's progress after the change.
+        :return:
+        """
+        selectedIids = [int(iid) for iid in self.goalsTable.selection()]
+        if len(selectedIids) != 1:
+            messagebox.showerror('Error', 'Please select one goal')
+            return
+        goal = self.user.goals.loc[selectedIids[0]]
+        amount = AskAmount(goal['currency'])
+        if amount is None:
+            return
+        DatabaseHandler.AddGoalContribution(self.user.id, int(goal['id']), amount, datetime.now().strftime('%y/%m/%d'))
+        self.RefreshChanges()
+
+    def SelectedGoalIds(self):
+        """
+        Gets the database IDs of the goals selected in the goals table.
+        :return: List of goal IDs.
+        """
+        selectedIids = [int(iid) for iid in self.goalsTable.selection()]
+        return [int(i) for i in self.user.goals.loc[selectedIids, 'id']]
 
+    @Profiler.Timed('gui')
     def SortGoals(self):
         """
-        Sorts the user's goals based on the selected sorting criterion.
+        Sorts the user's loaded goals based on the selected sorting criterion. The goals are only read again when they
+        change, by RefreshChanges.
         :return:
         """
-        self.user.LoadGoalData()
         sortInt = self.goalSortBy.get()
         if sortInt == 3 or sortInt == 5:
             self.LoadGoals()
@@ -891,8 +1305,8 @@ class MainPage(customtkinter.CTk):
             sortColumn = 'amount'
         elif sortInt == 2:
             sortColumn = 'name'
-        self.user.goals.sort_values(by=[sortColumn.lower()], inplace=True)
-        self.LoadGoals()
+        # Sorted into a new frame, as the User's frames are shared and mustn't be changed
+        self.LoadGoals(self.user.goals.sort_values(by=[sortColumn.lower()], kind='stable'))
 
     def AddNewTransaction(self):
         """
@@ -916,85 +1330,203 @@ class MainPage(customtkinter.CTk):
             self.moneyTransactionEntry.configure(border_color='grey')
         if not passed:
             return
-        money = money.replace('$', '')
-        DatabaseHandler.AddTransaction(self.user.id, money, date, description)
-        self.user.LoadTransactionData()
-        self.LoadTransactions()
+        money, currency = SplitCurrency(money)
+        DatabaseHandler.AddTransaction(self.user.id, money, date, description, currency)
+        self.RefreshChanges()
 
+    @Profiler.Timed('gui')
     def LoadTransactions(self):
         """
         Loads the user's transactions into the respective Treeviews.
         Clears existing data and inserts new transactions.
         :return:
         """
-        for i in self.incomeTable.get_children():
-            self.incomeTable.delete(i)
-        for i in self.expenseTable.get_children():
-            self.expenseTable.delete(i)
-        self.incomeDf = self.user.transactions[self.user.transactions['amount'] > 0].copy()
-        self.expenseDf = self.user.transactions[self.user.transactions['amount'] < 0].copy()
-        if self.incomeVariable.get() == 0:
-            self.incomeDf.sort_values(by=['date'], inplace=True)
-        elif self.incomeVariable.get() == 1:
-            self.incomeDf.sort_values(by=['amount'], inplace=True)
-        if self.expenseVariable.get() == 0:
-            self.expenseDf.sort_values(by=['date'], inplace=True)
-        elif self.expenseVariable.get() == 1:
-            self.expenseDf.sort_values(by=['amount'], inplace=True)
-        for index, row in self.incomeDf.iterrows():
-            self.incomeTable.insert('', 'end', iid=index, values=(row['date'], row['amount'], row['description']))
-        for index, row in self.expenseDf.iterrows():
-            self.expenseTable.insert('', 'end', iid=index, values=(row['date'], row['amount'], row['description']))
-        totalIncome = self.incomeDf['amount'].sum()
-        totalExpenses = self.expenseDf['amount'].sum()
-        net_cash = totalIncome + totalExpenses
-        self.incomeLabel.configure(text=f'${totalIncome:.2f}')
-        self.expenseLabel.configure(text=f'${totalExpenses:.2f}')
-        self.netCashLabel.configure(text=f"Net Cash: ${net_cash:.2f}")
-        self.balanceLabel.configure(text=f'Balance:\n${net_cash:.2f}')
+        with Profiler.Span('Clear transaction tables', 'treeview'):
+            for i in self.incomeTable.get_children():
+                self.incomeTable.delete(i)
+            for i in self.expenseTable.get_children():
+                self.expenseTable.delete(i)
+        self.incomeDf, self.expenseDf = FinanceService.SplitTransactions(
+            self.user.transactions, transactionSortColumns.get(self.incomeVariable.get()),
+            transactionSortColumns.get(self.expenseVariable.get()), cacheKey=self.user.transactionsVersion)
+        with Profiler.Span('Fill transaction tables', 'treeview'):
+            # The columns are read straight from the frames, without making a copy of each row
+            for df, table in ((self.incomeDf, self.incomeTable), (self.expenseDf, self.expenseTable)):
+                for index, date, amount, currency, description in zip(df.index.tolist(),
+                                                                      FinanceService.FormatDates(df['date']),
+                                                                      df['amount'].tolist(), df['currency'].tolist(),
+                                                                      df['description'].tolist()):
+                    table.insert('', 'end', iid=index, values=(date, FormatMoney(amount, currency), description))
+        # The totals are in the reporting currency, read from the monthly totals or converted at each date's rate
+        totalIncome, totalExpenses, net_cash = self.user.CashFlowTotals(self.reportingCurrency)
+        self.dirtyViews.discard('transactions')
+        self.incomeLabel.configure(text=FormatMoney(totalIncome, self.reportingCurrency))
+        self.expenseLabel.configure(text=FormatMoney(totalExpenses, self.reportingCurrency))
+        self.netCashLabel.configure(text=f"Net Cash: {FormatMoney(net_cash, self.reportingCurrency)}")
+        self.balanceLabel.configure(text=f'Balance:\n{FormatMoney(net_cash, self.reportingCurrency)}')
 
     def DeleteSelectedIncome(self):
         """
-        Deletes the selected income transaction from the user's transactions list.
+        Deletes the selected income transactions from the user's transactions list.
         Updates the transactions list after deletion.
         :return:
         """
-        selected_item = self.incomeTable.selection()
-        if selected_item:
-            selected_iid = selected_item[0]
-            incomeRow = self.incomeDf.loc[int(selected_iid)]
-            incomeId = int(incomeRow['id'])
-            DatabaseHandler.DeleteTransaction(incomeId)
-            self.user.LoadTransactionData()
-            self.LoadTransactions()
+        incomeIds = [int(i) for i in self.incomeDf.loc[[int(iid) for iid in self.incomeTable.selection()], 'id']]
+        if incomeIds:
+            DatabaseHandler.DeleteTransactions(incomeIds)
+            self.RefreshChanges()
 
     def DeleteSelectedExpense(self):
         """
-        Deletes the selected expense transaction from the user's transactions list.
+        Deletes the selected expense transactions from the user's transactions list.
         Updates the transactions list after deletion.
         :return:
         """
-        selected_item = self.expenseTable.selection()
-        if selected_item:
-            selected_iid = selected_item[0]
-            expenseRow = self.expenseDf.loc[int(selected_iid)]
-            expenseId = int(expenseRow['id'])
-            DatabaseHandler.DeleteTransaction(expenseId)
-            self.user.LoadTransactionData()
-            self.LoadTransactions()
+        expenseIds = [int(i) for i in self.expenseDf.loc[[int(iid) for iid in self.expenseTable.selection()], 'id']]
+        if expenseIds:
+            DatabaseHandler.DeleteTransactions(expenseIds)
+            self.RefreshChanges()
+
+    def RecategoriseSelectedTransactions(self):
+        """
+        Gives the selected incomes and expenses a new description the user enters.
+        Updates the transactions list after the change.
+        :return:
+        """
+        transactionIds = self.SelectedTransactionIds()
+        if not transactionIds:
+            return
+        description = customtkinter.CTkInputDialog(text='New description:', title='Set Description').get_input()
+        if description is None:
+            return
+        DatabaseHandler.UpdateTransactionsDescription(transactionIds, description.strip())
+        self.RefreshChanges()
+
+    def ShiftSelectedTransactions(self):
+        """
+        Moves the dates of the selected incomes and expenses by a number of days the user enters.
+        Updates the transactions list after the change.
+        :return:
+        """
+        transactionIds = self.SelectedTransactionIds()
+        if not transactionIds:
+            return
+        days = AskDays()
+        if days is None:
+            return
+        DatabaseHandler.ShiftTransactionDates(transactionIds, days)
+        self.RefreshChanges()
 
+    def SelectedTransactionIds(self):
+        """
+        Gets the database IDs of the transactions selected in both the income and expense tables.
+        :return: List of transaction IDs.
+        """
+        incomeIids = [int(iid) for iid in self.incomeTable.selection()]
+        expenseIids = [int(iid) for iid in self.expenseTable.selection()]
+        return ([int(i) for i in self.incomeDf.loc[incomeIids, 'id']] +
+                [int(i) for i in self.expenseDf.loc[expenseIids, 'id']])
+
+    @Profiler.Timed('gui')
     def UpdateCashFlowPlot(self):
         """
         Updates the cash flow plot with the user's transaction data.
         :return:
         """
-        df = self.user.transactions.copy()
-        df['date'] = pd.to_datetime(df['date'], format='%y/%m/%d')
-        df.sort_values(by=['date'], inplace=True)
-        total_over_time_df = df.groupby('date')[
-            'amount'].sum().reset_index()  # Combine all the rows that have the same date and sum the amount
-        total_over_time_df['cumulative_total'] = total_over_time_df['amount'].cumsum()  # Get the cumulative total
+        start, end = self.statisticsRange
+        total_over_time_df = self.user.BalanceOverTime(self.reportingCurrency, start, end,
+                                                       statisticsBuckets[self.bucketMenu.get()])
         self.transactionsPlot.UpdatePlot(total_over_time_df, 'date', 'cumulative_total')
+        if total_over_time_df.empty:
+            self.plottedDates = (None, None)
+        else:
+            self.plottedDates = (total_over_time_df['date'].iloc[0], total_over_time_df['date'].iloc[-1])
+
+    def SetStatisticsRange(self, start: str, end: str):
+        """
+        Sets the date range of the cash flow plot and shows it in the entries, without redrawing the plot.
+        :param start: The first date (YY/MM/DD), None for the first the user has.
+        :param end: The last date (YY/MM/DD), None for the last the user has.
+        :return:
+        """
+        self.statisticsRange = (start, end)
+        for entry, date in ((self.startStatisticsEntry, start), (self.endStatisticsEntry, end)):
+            entry.delete(0, 'end')
+            if date is not None:
+                entry.insert(0, date)
+
+    def ShowStatisticsRange(self):
+        """
+        Shows the cash flow plot for the dates entered, an empty date leaving that end of the range open.
+        Validates the dates first.
+        :return:
+        """
+        dates = []
+        for entry in (self.startStatisticsEntry, self.endStatisticsEntry):
+            date = entry.get().strip()
+            if date != '' and not IsValidDate(date):
+                entry.configure(border_color='red')
+                return
+            entry.configure(border_color='grey')
+            dates.append(date or None)
+        if None not in dates and dates[0] > dates[1]:
+            self.endStatisticsEntry.configure(border_color='red')
+            return
+        self.statisticsRange = tuple(dates)
+        self.UpdateCashFlowPlot()
+
+    def ShowAllStatistics(self):
+        """
+        Shows the cash flow plot for the user's whole history.
+        :return:
+        """
+        self.SetStatisticsRange(None, None)
+        self.UpdateCashFlowPlot()
+
+    def ZoomStatistics(self, factor: float):
+        """
+        Zooms the cash flow plot in or out around the middle of the dates it shows. Only the new range is read.
+        :param factor: How many times longer the new range is, eg - 0.5 to zoom in or 2 to zoom out.
+        :return:
+        """
+        start, end = (pd.Timestamp(datetime.strptime(date, '%y/%m/%d')) if date else plotted
+                      for date, plotted in zip(self.statisticsRange, self.plottedDates))
+        if start is None or end is None:
+            return
+        middle = start + (end - start) / 2
+        halfSpan = max((end - start) * factor / 2, pd.Timedelta(days=1))
+        self.SetStatisticsRange((middle - halfSpan).strftime('%y/%m/%d'), (middle + halfSpan).strftime('%y/%m/%d'))
+        self.UpdateCashFlowPlot()
+
+
+def AskDays():
+    """
+    Asks the user how many days to move dates by.
+    :return: The number of days, or None if the dialog was cancelled or the input isn't a whole number.
+    """
+    daysString = customtkinter.CTkInputDialog(text='Days to move by (eg - 7 or -7):', title='Shift Dates').get_input()
+    if daysString is None:
+        return None
+    if not re.match(r'^[+-]?\d+$', daysString.strip()):
+        messagebox.showerror('Error', 'Please enter a whole number of days')
+        return None
+    return int(daysString)
+
+
+def AskAmount(currency: str):
+    """
+    Asks the user for an amount to put towards a goal.
+    :param currency: The currency code of the goal.
+    :return: The amount, or None if the dialog was cancelled or the input isn't an amount.
+    """
+    amountString = customtkinter.CTkInputDialog(text=f'Amount in {currency} (negative to take money out):',
+                                                title='Contribute').get_input()
+    if amountString is None:
+        return None
+    if not re.match(r'^[+-]?\d+(?:\.\d{1,2})?$', amountString.strip()):
+        messagebox.showerror('Error', 'Please enter an amount eg - 50 or 12.50')
+        return None
+    return float(amountString)
 
 
 def IsValidDate(dateString: str):
@@ -1012,6 +1544,11 @@ def IsValidDate(dateString: str):
         return False
 
 
+# An amount with an optional currency symbol, or a three letter currency code before or after it
+# eg - $12.50, -€3, 12.50 USD, NZD 40 -
+currencyPattern = re.compile(r'^(?:([A-Za-z]{3})\s*)?(-?)([$€£¥]?)(\d+(?:\.\d{2})?)(?:\s*([A-Za-z]{3}))?$')
+
+
 def IsValidCurrency(amountString: str, allowNegative: bool = False):
     """
     Validates if the provided currency string is in the correct format.
@@ -1019,23 +1556,51 @@ def IsValidCurrency(amountString: str, allowNegative: bool = False):
     :param allowNegative: Boolean to allow negative amounts.
     :return: True if the currency string is valid, False otherwise.
     """
-    # Define a regex pattern for currency validation
-    if allowNegative:
-        pattern = re.compile(r'^-?\$?\d+(\.\d{2})?$')  # Has the -? matches an optional negative sign
-    else:
-        pattern = re.compile(r'^\$?\d+(\.\d{2})?$')
-    # ^ and $ denote the start and end of the string, respectively.
-    # \$? matches an optional dollar sign.
+    # The groups are the code before the amount, the negative sign, the symbol, the number and the code after it
     # \d+ matches one or more digits.
-    # (\.\d{2})? matches an optional decimal point followed by exactly two digits.
-
-    # Match the pattern with the provided string
-    if pattern.match(amountString):
-        return True
-    else:
+    # (?:\.\d{2})? matches an optional decimal point followed by exactly two digits.
+    match = currencyPattern.match(amountString)
+    if not match:
+        return False
+    codeBefore, sign, symbol, number, codeAfter = match.groups()
+    if sign and not allowNegative:
         return False
+    # Only one of the symbol and the codes can give the currency
+    return sum(1 for part in (codeBefore, symbol, codeAfter) if part) <= 1
+
+
+def SplitCurrency(amountString: str):
+    """
+    Splits a valid currency string into its amount and currency.
+    :param amountString: The currency string, checked by IsValidCurrency.
+    :return: Tuple of the amount string and the currency code, the default currency if none was given.
+    """
+    codeBefore, sign, symbol, number, codeAfter = currencyPattern.match(amountString).groups()
+    currency = (codeBefore or codeAfter or '').upper() or symbolCurrencies.get(symbol, DatabaseHandler.defaultCurrency)
+    return sign + number, currency
+
+
+def ProgressBar(saved: float, target: float):
+    """
+    Draws how much of a goal has been saved as text, as a Treeview cell can't hold a widget.
+    :param saved: The total contributed to the goal.
+    :param target: The amount of the goal.
+    :return: The bar and percentage eg - '██████░░░░ 60%' - or an empty string if the goal has no amount.
+    """
+    if not target or target != target or target <= 0:  # target != target is True for NaN
+        return ''
+    share = max(saved / target, 0.0)
+    filled = min(round(share * progressBarWidth), progressBarWidth)
+    return f"{'█' * filled}{'░' * (progressBarWidth - filled)} {share:.0%}"
+
+
+def Main():
+    """Starts the application."""
+    DatabaseHandler.Open()
+    app = MainPage()
 
+    app.mainloop()
 
-app = MainPage()
 
-app.mainloop()
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,57 @@
+"""
+FILE NAME - BudgetAlerts.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - The rules that decide when a budget's spending is alerted. A budget covers the expenses whose category
+    (the description without numbers, see Deduplication) is the budget's name, in the budget's currency, from the first
+    day of the month of its end date to its end date, eg - a 'Groceries' budget ending on 24/03/31 covers the
+    groceries bought in March 2024.
+    Each budget keeps a running total of its spending, updated by the transactions added, deleted or changed instead of
+    adding its expenses up again, and its level, the highest threshold (as a percent of its amount) its spending has
+    reached. An alert is saved when a transaction takes the level past a threshold, and taken away again if the
+    spending drops back below it, so going past it again alerts again.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import Deduplication
+
+thresholds = (80, 100)  # The percents of a budget's amount that are alerted when its spending reaches them
+
+
+def Categories(names):
+    """
+    Gets the categories budgets and expenses are matched by.
+    :param names: List of budget names or transaction descriptions.
+    :return: List of the categories.
+    """
+    return Deduplication.NormaliseDescriptions(names, keepNumbers=False).tolist()
+
+
+def PeriodStart(endDate: str):
+    """
+    Gets the first date a budget covers.
+    :param endDate: The budget's end date (YY/MM/DD).
+    :return: The first day of the end date's month (YY/MM/DD).
+    """
+    return f'{endDate[:5]}/01'
+
+
+def Level(spent: float, amount: float):
+    """
+    Gets the highest threshold a budget's spending has reached.
+    :param spent: The total spent.
+    :param amount: The budget's amount.
+    :return: The threshold, 0 if none has been reached.
+    """
+    # A little is allowed for floating point error, so spending exactly the amount reaches 100
+    return max((threshold for threshold in thresholds if spent * 100 >= threshold * amount - 1e-6), default=0)
+
+
+def Crossed(oldLevel: int, newLevel: int):
+    """
+    Gets the thresholds a budget's spending has gone past.
+    :param oldLevel: The level before.
+    :param newLevel: The level after.
+    :return: List of the thresholds above oldLevel up to newLevel.
+    """
+    return [threshold for threshold in thresholds if oldLevel < threshold <= newLevel]
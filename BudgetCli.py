@@ -0,0 +1,407 @@
+"""
+FILE NAME - BudgetCli.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Command line entry point for reports and batch jobs, eg - python BudgetCli.py summary USERNAME -
+    It uses DatabaseHandler and the User model without loading customtkinter or matplotlib, so it starts quickly and
+    can run where there is no display. Commands:
+        import USERNAME FILE     - adds the transactions in a CSV file with date, amount, description and currency,
+                                   skipping the ones already imported and reporting near duplicates
+        export USERNAME          - saves a snapshot of the user's data to Parquet or Arrow files
+        fx-import FILE           - adds the exchange rates in a CSV file with date, currency and rate columns
+        budget USERNAME NAME AMOUNT END_DATE - adds a budget for the expenses described as NAME in END_DATE's month
+        summary USERNAME         - prints the balance, incomes, expenses, next goal, monthly net, unusual expenses and
+                                   budget alerts
+        forecast USERNAME        - projects the balance forward from the average monthly net
+        report USERNAME...       - writes monthly statements of one or more users as HTML and PDF files
+        archive                  - moves the transactions of closed years into per year archive files and takes a
+                                   backup
+        restore TIME             - restores the database to how it was at a point in time, or shows how it would
+        encrypt USERNAME         - encrypts the amount and description of the user's transactions
+        check                    - checks the monthly rollup against the transactions
+        recompute                - rebuilds derived data and refreshes SQLite's query planner statistics
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import sys
+import getpass
+import argparse
+from datetime import datetime
+import pandas as pd
+import DatabaseHandler
+import ArchiveHandler
+import BackupHandler
+import Deduplication
+import FinanceService
+from UserModel import User
+
+
+def LoadUser(username: str):
+    """
+    Loads a user and all their data, asking for their password if their data is encrypted.
+    :param username: The username of the user.
+    :return: The loaded User.
+    """
+    users = DatabaseHandler.PullUsersData(username)
+    if not users:
+        sys.exit(f'No user called {username}')
+    if DatabaseHandler.IsEncrypted(users[0][0]) and not DatabaseHandler.UnlockUser(
+            username, getpass.getpass(f'Password for {username}: ')):
+        sys.exit(f"Couldn't unlock the data of {username}")
+    user = User()
+    user.LoadData(username)
+    return user
+
+
+def ImportCommand(arguments):
+    """
+    Adds the transactions in a CSV file to a user. Rows with a bad date or amount are skipped and reported, as are rows
+    that have already been imported. Near duplicates, the same amount and description a few days from a saved
+    transaction, are reported and only skipped if asked to.
+    :param arguments: The parsed command line arguments.
+    """
+    user = LoadUser(arguments.username)
+    df = pd.read_csv(arguments.file, dtype={'date': str, 'description': str})
+    if not {'date', 'amount'}.issubset(df.columns):
+        sys.exit('The file needs date and amount columns')
+    # Dates can be in the app's YY/MM/DD format or YYYY-MM-DD, they are saved as YY/MM/DD
+    dates = pd.to_datetime(df['date'], format='%y/%m/%d', errors='coerce')
+    dates = dates.fillna(pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce'))
+    amounts = pd.to_numeric(df['amount'].astype(str).str.replace('$', '', regex=False), errors='coerce')
+    valid = dates.notna() & amounts.notna()
+    descriptions = df['description'].fillna('') if 'description' in df.columns else pd.Series('', index=df.index)
+    currencies = (df['currency'].fillna(arguments.currency).str.strip().str.upper() if 'currency' in df.columns
+                  else pd.Series(arguments.currency, index=df.index))
+
+    rows = list(zip(amounts[valid].round(2).tolist(), dates[valid].dt.strftime('%y/%m/%d').tolist(),
+                    descriptions[valid].str.strip().tolist(), currencies[valid].tolist()))
+    isExact, isNear = DatabaseHandler.FindDuplicates(user.id, rows, windowDays=arguments.window)
+    lines = df.index[valid] + 2
+    if isNear.any():
+        print(f"{isNear.sum()} rows are within {arguments.window} days of a saved transaction with the same amount and "
+              f"description{', skipped' if arguments.skip_near_duplicates else ''}:")
+        nearRows = [(line, row) for line, row, near in zip(lines, rows, isNear) if near]
+        for line, (amount, date, description, currency) in nearRows[:20]:
+            print(f'    line {line}: {date} {amount:.2f} {currency} {description}')
+    if arguments.skip_near_duplicates:
+        rows = [row for row, near in zip(rows, isNear) if not near]
+    added = DatabaseHandler.AddTransactions(user.id, rows)
+    print(f'Imported {added} transactions for {arguments.username}')
+    if added < len(rows):
+        print(f'Skipped {len(rows) - added} rows that were already imported')
+    if not valid.all():
+        print(f'Skipped {(~valid).sum()} rows with a bad date or amount (file lines '
+              f"{', '.join(str(i + 2) for i in df.index[~valid][:20])})")
+
+
+def FxImportCommand(arguments):
+    """
+    Adds the exchange rates in a CSV file. Each rate is the value of one unit of the currency in the default currency.
+    :param arguments: The parsed command line arguments.
+    """
+    df = pd.read_csv(arguments.file, dtype={'date': str, 'currency': str})
+    if not {'date', 'currency', 'rate'}.issubset(df.columns):
+        sys.exit('The file needs date, currency and rate columns')
+    dates = pd.to_datetime(df['date'], format='%y/%m/%d', errors='coerce')
+    dates = dates.fillna(pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce'))
+    rates = pd.to_numeric(df['rate'], errors='coerce')
+    valid = dates.notna() & (rates > 0) & df['currency'].notna()
+    rows = list(zip(df['currency'][valid].str.strip().str.upper().tolist(),
+                    dates[valid].dt.strftime('%y/%m/%d').tolist(), rates[valid].tolist()))
+    print(f'Imported {DatabaseHandler.AddFxRates(rows)} exchange rates')
+    if not valid.all():
+        print(f'Skipped {(~valid).sum()} rows with a bad date, currency or rate')
+
+
+def ExportCommand(arguments):
+    """
+    Saves a snapshot of a user's transactions, goals and budgets.
+    :param arguments: The parsed command line arguments.
+    """
+    import ExportHandler
+    user = LoadUser(arguments.username)
+    print(ExportHandler.ExportUserData(user.id, arguments.format, arguments.folder))
+    if user.encrypted:
+        print(f'{arguments.username} has encryption on, but the snapshot is written in plain text')
+
+
+def BudgetCommand(arguments):
+    """
+    Adds a budget for a user, which covers their expenses described as its name from the first day of its end date's
+    month to its end date.
+    :param arguments: The parsed command line arguments.
+    """
+    users = DatabaseHandler.PullUsersData(arguments.username)
+    if not users:
+        sys.exit(f'No user called {arguments.username}')
+    try:
+        datetime.strptime(arguments.end_date, '%y/%m/%d')
+    except ValueError:
+        sys.exit('The end date must be YY/MM/DD')
+    if arguments.amount <= 0:
+        sys.exit('The amount must be more than 0')
+    DatabaseHandler.AddBudget(users[0][0], arguments.name, arguments.amount, arguments.end_date, arguments.currency)
+    print(f'Added a budget of {arguments.amount:.2f} {arguments.currency} for {arguments.name} ending on '
+          f'{arguments.end_date}')
+
+
+def SummaryCommand(arguments):
+    """
+    Prints a summary of a user's finances.
+    :param arguments: The parsed command line arguments.
+    """
+    user = LoadUser(arguments.username)
+    totalIncome, totalExpenses, balance = user.CashFlowTotals(arguments.currency)
+    print(f'{user.name} ({arguments.username}), amounts in {arguments.currency}')
+    archivedCount = int(user.archivedTotals['count'].sum()) if not user.archivedTotals.empty else 0
+    print(f'Transactions: {len(user.transactions)} live, {archivedCount} archived')
+    print(f'Income: {FinanceService.FormatMoney(totalIncome, arguments.currency)}  '
+          f'Expenses: {FinanceService.FormatMoney(totalExpenses, arguments.currency)}  '
+          f'Balance: {FinanceService.FormatMoney(balance, arguments.currency)}')
+
+    upcoming = FinanceService.UpcomingGoals(user.goals, datetime.now().date())
+    if upcoming.empty:
+        print('Next goal: NONE')
+    else:
+        nextGoal = upcoming.iloc[0]
+        print(f"Next goal: {nextGoal['name']} on {nextGoal['date'].date()} "
+              f"({FinanceService.FormatMoney(nextGoal['saved'], nextGoal['currency'])} of "
+              f"{FinanceService.FormatMoney(nextGoal['amount'], nextGoal['currency'])} saved)")
+
+    monthlyNet = user.MonthlyNet(arguments.currency)[0]
+    if not monthlyNet.empty:
+        print(f'Monthly net (last {arguments.months} months):')
+        for month, net in monthlyNet.tail(arguments.months).items():
+            print(f'  {month}  {FinanceService.FormatMoney(net, arguments.currency):>13}')
+
+    if not user.alerts.empty:
+        print(f'Unusual expenses ({len(user.alerts)}):')
+        for date, amount, description, currency, mean in zip(user.alerts['date'], user.alerts['amount'],
+                                                             user.alerts['description'], user.alerts['currency'],
+                                                             user.alerts['mean']):
+            print(f'  {date.date()}  {-amount:>12.2f} {currency}  {description} (usually {mean:.2f})')
+
+    if not user.budgetAlerts.empty:
+        print(f'Budget alerts ({len(user.budgetAlerts)}):')
+        for name, spent, amount, currency, threshold, endDate in zip(
+                user.budgetAlerts['name'], user.budgetAlerts['spent'], user.budgetAlerts['amount'],
+                user.budgetAlerts['currency'], user.budgetAlerts['threshold'], user.budgetAlerts['end_date']):
+            print(f'  {name}  {spent:.2f} of {amount:.2f} {currency} spent, past {threshold}% (ends {endDate.date()})')
+
+
+def ForecastCommand(arguments):
+    """
+    Projects a user's balance forward using the average net of their recent months.
+    :param arguments: The parsed command line arguments.
+    """
+    user = LoadUser(arguments.username)
+    monthlyNet = user.MonthlyNet(arguments.currency)[0]
+    if monthlyNet.empty:
+        sys.exit(f'{arguments.username} has no transactions to forecast from')
+    thisMonth = pd.Timestamp(datetime.now().date()).to_period('M')
+    balance, averageNet, projection = FinanceService.Forecast(monthlyNet, arguments.months, arguments.history,
+                                                              thisMonth)
+    print(f'Amounts in {arguments.currency}')
+    print(f'Balance now: {FinanceService.FormatMoney(balance, arguments.currency)}, average monthly net over the '
+          f'last {arguments.history} months: {FinanceService.FormatMoney(averageNet, arguments.currency)}')
+    for month, projectedBalance in projection.items():
+        print(f'  {month}  {FinanceService.FormatMoney(projectedBalance, arguments.currency):>13}')
+
+
+def ReportCommand(arguments):
+    """
+    Writes the monthly statements of one or more users, last month's by default.
+    :param arguments: The parsed command line arguments.
+    """
+    import ReportHandler  # Loads matplotlib, which the other commands don't need
+    lastMonth = (pd.Timestamp(datetime.now().date()).to_period('M') - 1).strftime('%y/%m')
+    months = ReportHandler.MonthRange(arguments.first_month or lastMonth, arguments.last_month)
+    users = [LoadUser(username) for username in arguments.usernames]
+    paths, drawn = ReportHandler.GenerateStatements(users, months, arguments.currency, tuple(arguments.format),
+                                                    arguments.folder, arguments.processes)
+    for path in paths:
+        print(path)
+    print(f'Wrote {len(paths)} files, drew {drawn} charts (the others were cached)')
+    encryptedUsers = [username for username, user in zip(arguments.usernames, users) if user.encrypted]
+    if encryptedUsers:
+        print(f"{', '.join(encryptedUsers)} {'has' if len(encryptedUsers) == 1 else 'have'} encryption on, but the "
+              f"statements are written in plain text")
+
+
+def ArchiveCommand(arguments):
+    """
+    Moves the transactions of closed years into the archive of their year, then takes a backup, as a point in time
+    after archiving can only be restored from a backup taken after it.
+    :param arguments: The parsed command line arguments.
+    """
+    archived = ArchiveHandler.ArchiveClosedPeriods(arguments.before_year)
+    for year, count in archived.items():
+        print(f'{year}: archived {count} transactions to {ArchiveHandler.ArchiveFilePath(year)}')
+    if not archived:
+        print('There was nothing to archive')
+        return
+    entry = BackupHandler.BackupDatabase()
+    print(f"Backed up to {os.path.join(BackupHandler.backupFolderPath, entry['file'])}")
+
+
+def RestoreCommand(arguments):
+    """
+    Restores the database to a point in time from the newest verified backup before it and the statement log, or only
+    shows the backup and the number of statements that would be used.
+    :param arguments: The parsed command line arguments.
+    """
+    try:
+        pointInTime = datetime.fromisoformat(arguments.time)
+    except ValueError:
+        sys.exit(f'{arguments.time} is not a date and time, eg - 2026-10-19 14:30')
+    try:
+        backup, statements = BackupHandler.PlanRestore(pointInTime, arguments.folder)
+        if not arguments.dry_run:
+            BackupHandler.RestoreToPointInTime(pointInTime, arguments.folder)
+    except ValueError as error:
+        sys.exit(str(error))
+    action = 'Would restore' if arguments.dry_run else 'Restored'
+    print(f"{action} {backup['file']} (taken {backup['time']}) and replay{'' if arguments.dry_run else 'ed'} "
+          f"{len(statements)} statements logged up to {pointInTime.isoformat(sep=' ')}")
+
+
+def EncryptCommand(arguments):
+    """
+    Turns on encryption for a user, asking for their password and security answer.
+    :param arguments: The parsed command line arguments.
+    """
+    if not DatabaseHandler.PullUsersData(arguments.username):
+        sys.exit(f'No user called {arguments.username}')
+    password = getpass.getpass(f'Password for {arguments.username}: ')
+    answer = getpass.getpass('Answer to the security question: ')
+    encrypted = DatabaseHandler.EnableEncryption(arguments.username, password, answer)
+    if encrypted is None:
+        sys.exit('The password or security answer is wrong')
+    print(f'Encrypted {encrypted} transactions of {arguments.username}')
+    print('Backups, exports, statements and log entries made before are still in plain text')
+
+
+def CheckCommand(arguments):
+    """
+    Checks the monthly rollup against the totals calculated from the transactions, and rebuilds it if asked to.
+    :param arguments: The parsed command line arguments.
+    """
+    mismatches = DatabaseHandler.CheckRollups()
+    for user_id, month, currency in mismatches[:20]:
+        print(f'Mismatch: user {user_id}, month {month}, {currency}')
+    print(f'{len(mismatches)} months of the rollup don\'t match the transactions')
+    if mismatches and arguments.repair:
+        DatabaseHandler.RebuildRollups()
+        print('Rebuilt the rollup')
+    elif mismatches:
+        sys.exit(1)
+
+
+def RecomputeCommand(arguments):
+    """
+    Rebuilds the derived data in the database and refreshes SQLite's statistics for the query planner.
+    :param arguments: The parsed command line arguments.
+    """
+    DatabaseHandler.CreateTables()  # Rebuilds the change log triggers
+    DatabaseHandler.RebuildRollups()
+    DatabaseHandler.RebuildSpendingStats()
+    DatabaseHandler.RebuildBudgetSpend()
+    ArchiveHandler.RebuildArchivedTotals()
+    DatabaseHandler.ExecuteScript('ANALYZE')
+    print('Recomputed derived data')
+
+
+def Main(argv: list = None):
+    """
+    Runs the command line.
+    :param argv: The command line arguments, sys.argv by default.
+    """
+    parser = argparse.ArgumentParser(description='SavvySaver reports and batch jobs.')
+    parser.add_argument('--database', default=DatabaseHandler.databaseFilePath, help='The database file to use.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import', help='Add the transactions in a CSV file.')
+    command.add_argument('username')
+    command.add_argument('file', help='CSV file with date, amount and (optional) description and currency columns.')
+    command.add_argument('--currency', default=DatabaseHandler.defaultCurrency,
+                         help='The currency of rows without one.')
+    command.add_argument('--window', type=int, default=Deduplication.nearDuplicateDays,
+                         help='How many days apart near duplicates can be.')
+    command.add_argument('--skip-near-duplicates', action='store_true',
+                         help='Skip the rows that are near duplicates instead of only reporting them.')
+    command.set_defaults(function=ImportCommand)
+
+    command = commands.add_parser('fx-import', help='Add the exchange rates in a CSV file.')
+    command.add_argument('file', help=f'CSV file with date, currency and rate (the value of one unit in '
+                                      f'{DatabaseHandler.defaultCurrency}) columns.')
+    command.set_defaults(function=FxImportCommand)
+
+    command = commands.add_parser('budget', help="Add a budget for a user's expenses in a month.")
+    command.add_argument('username')
+    command.add_argument('name', help='The description of the expenses it covers, eg - Groceries.')
+    command.add_argument('amount', type=float)
+    command.add_argument('end_date', help='The last day it covers (YY/MM/DD), it starts on the first of the month.')
+    command.add_argument('--currency', default=DatabaseHandler.defaultCurrency, help='The currency of the amount.')
+    command.set_defaults(function=BudgetCommand)
+
+    command = commands.add_parser('export', help="Save a snapshot of a user's data.")
+    command.add_argument('username')
+    command.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    command.add_argument('--folder', default='exports')
+    command.set_defaults(function=ExportCommand)
+
+    command = commands.add_parser('summary', help="Print a summary of a user's finances.")
+    command.add_argument('username')
+    command.add_argument('--months', type=int, default=12, help='How many months of net amounts to show.')
+    command.add_argument('--currency', default=DatabaseHandler.defaultCurrency, help='The currency to report in.')
+    command.set_defaults(function=SummaryCommand)
+
+    command = commands.add_parser('forecast', help="Project a user's balance forward.")
+    command.add_argument('username')
+    command.add_argument('--months', type=int, default=6, help='How many months to project.')
+    command.add_argument('--history', type=int, default=6, help='How many recent months to average.')
+    command.add_argument('--currency', default=DatabaseHandler.defaultCurrency, help='The currency to report in.')
+    command.set_defaults(function=ForecastCommand)
+
+    command = commands.add_parser('report', help='Write monthly statements as HTML and PDF files.')
+    command.add_argument('usernames', nargs='+', metavar='username')
+    command.add_argument('--from', dest='first_month', help='The first month (YY/MM), last month by default.')
+    command.add_argument('--to', dest='last_month', help='The last month (YY/MM), the first month by default.')
+    command.add_argument('--format', nargs='+', choices=['html', 'pdf'], default=['html', 'pdf'])
+    command.add_argument('--currency', default=DatabaseHandler.defaultCurrency, help='The currency to report in.')
+    command.add_argument('--folder', default='reports')
+    command.add_argument('--processes', type=int, default=None,
+                         help='How many processes draw the statements, one per CPU by default.')
+    command.set_defaults(function=ReportCommand)
+
+    command = commands.add_parser('archive', help='Move the transactions of closed years into archive files.')
+    command.add_argument('--before-year', type=int, default=None,
+                         help=f'The first year kept live, {ArchiveHandler.archiveAfterYears} years ago by default.')
+    command.set_defaults(function=ArchiveCommand)
+
+    command = commands.add_parser('restore', help='Restore the database to a point in time.')
+    command.add_argument('time', help='The date and time to restore to, eg - "2026-10-19 14:30".')
+    command.add_argument('--dry-run', action='store_true',
+                         help='Only show the backup and the number of statements that would be used.')
+    command.add_argument('--folder', default=BackupHandler.backupFolderPath, help='The folder the backups are in.')
+    command.set_defaults(function=RestoreCommand)
+
+    command = commands.add_parser('encrypt', help="Encrypt the amount and description of a user's transactions.")
+    command.add_argument('username')
+    command.set_defaults(function=EncryptCommand)
+
+    command = commands.add_parser('check', help='Check the monthly rollup against the transactions.')
+    command.add_argument('--repair', action='store_true', help='Rebuild the rollup if it does not match.')
+    command.set_defaults(function=CheckCommand)
+
+    command = commands.add_parser('recompute', help='Rebuild derived data.')
+    command.set_defaults(function=RecomputeCommand)
+
+    arguments = parser.parse_args(argv)
+    DatabaseHandler.Open(arguments.database)
+    arguments.function(arguments)
+
+
+if __name__ == '__main__':
+    Main()
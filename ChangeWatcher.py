@@ -0,0 +1,48 @@
+"""
+FILE NAME - ChangeWatcher.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Notices when a user's data has changed, whether it was changed by this copy of the app or another one
+    using the same database, so windows only reload and redraw what actually changed. Polling first compares SQLite's
+    data version and change counter, which costs almost nothing, and only when they have moved reads which tables
+    changed from the change log.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import DatabaseHandler
+
+
+class ChangeWatcher:
+    """
+    Watches the change log for changes to one user's data.
+    """
+
+    def __init__(self, user_id: int = -1):
+        """
+        Initialises the watcher, changes made before it was made aren't reported.
+        :param user_id: The ID of the user to watch.
+        """
+        self.user_id = user_id
+        self.dataVersion = DatabaseHandler.DataVersion()
+        self.seq = DatabaseHandler.LatestChangeSeq()
+
+    def Reset(self, user_id: int):
+        """
+        Starts watching a user from now on.
+        :param user_id: The ID of the user to watch.
+        """
+        self.__init__(user_id)
+
+    def Poll(self):
+        """
+        Checks for changes since the last poll.
+        :return: Set of the names of the tables the user's data changed in eg - {'transactions', 'goal'} -
+        """
+        dataVersion = DatabaseHandler.DataVersion()
+        if dataVersion == self.dataVersion:
+            return set()
+        self.dataVersion = dataVersion
+        changedTables = DatabaseHandler.PullChangedTables(self.seq, self.user_id)
+        if changedTables:
+            self.seq = max(changedTables.values())
+        return set(changedTables)
@@ -0,0 +1,109 @@
+"""
+FILE NAME - DataGenerator.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Fills the database with synthetic users, transactions, goals and budgets for benchmarking.
+    The same seed always generates the same data. Every user gets the password 'password' and the username
+    'user1', 'user2', ... Run it with - python DataGenerator.py --users 5 --transactions 1000000 -
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import argparse
+import numpy as np
+import pandas as pd
+import DatabaseHandler
+
+generatedPassword = 'password'
+# Descriptions with the typical amount of each, positive ones are incomes
+descriptionAmounts = {
+    'Salary': 2500.0, 'Freelance': 400.0, 'Refund': 30.0,
+    'Rent': -1200.0, 'Groceries': -90.0, 'Fuel': -60.0, 'Coffee': -5.0, 'Restaurant': -45.0,
+    'Electricity': -150.0, 'Phone': -40.0, 'Streaming': -15.0, 'Gym': -25.0, 'Clothes': -80.0,
+}
+goalNames = ['Car', 'Holiday', 'Laptop', 'Emergency Fund', 'House Deposit', 'Phone', 'Concert', 'Course']
+
+
+def RandomDates(generator: np.random.Generator, count: int, startDate: str, days: int):
+    """
+    Picks random dates in the app's YY/MM/DD format.
+    :param generator: The seeded random generator.
+    :param count: How many dates to pick.
+    :param startDate: The first date that can be picked, in YY/MM/DD format.
+    :param days: How many days after the start date can be picked.
+    :return: Array of date strings.
+    """
+    start = pd.Timestamp(pd.to_datetime(startDate, format='%y/%m/%d'))
+    offsets = pd.to_timedelta(generator.integers(0, days, count), unit='D')
+    return (start + offsets).strftime('%y/%m/%d').to_numpy()
+
+
+def GenerateData(userCount: int = 10, transactionsPerUser: int = 10000, goalsPerUser: int = 20,
+                 budgetsPerUser: int = 10, seed: int = 0, startDate: str = '20/01/01', days: int = 5 * 365):
+    """
+    Fills the database with synthetic users and their transactions, goals and budgets.
+    Each table is inserted with one batch per user, so millions of transactions only take seconds.
+    :param userCount: How many users to create.
+    :param transactionsPerUser: How many transactions each user gets.
+    :param goalsPerUser: How many goals each user gets.
+    :param budgetsPerUser: How many budgets each user gets.
+    :param seed: The seed of the random generator.
+    :param startDate: The first date data can have, in YY/MM/DD format.
+    :param days: How many days after the start date the data is spread over.
+    :return: List of the usernames that were created.
+    """
+    generator = np.random.default_rng(seed)
+    passwordHash = DatabaseHandler.hasher.hash(generatedPassword)  # Hashing is slow, so every user shares one hash
+    answerHash = DatabaseHandler.hasher.hash('answer')
+    descriptions = np.array(list(descriptionAmounts.keys()))
+    typicalAmounts = np.array(list(descriptionAmounts.values()))
+
+    firstUser = DatabaseHandler.FetchOne("SELECT COALESCE(MAX(id), 0) FROM users")[0] + 1
+    usernames = [f'user{firstUser + i}' for i in range(userCount)]
+    for username in usernames:
+        DatabaseHandler.Execute("INSERT INTO users (username, name, password, factorQ, factorA) VALUES (?, ?, ?, ?, ?)",
+                                (username, username.title(), passwordHash, 0, answerHash), log=False)
+        userId = DatabaseHandler.PullUsersData(username)[0][0]
+
+        # Incomes are rarer than expenses
+        weights = np.where(typicalAmounts > 0, 1.0, 4.0)
+        picks = generator.choice(len(descriptions), transactionsPerUser, p=weights / weights.sum())
+        amounts = np.round(typicalAmounts[picks] * generator.uniform(0.5, 1.5, transactionsPerUser), 2)
+        dates = RandomDates(generator, transactionsPerUser, startDate, days)
+        DatabaseHandler.ExecuteMany(
+            "INSERT INTO transactions (user_id, amount, date, description) VALUES (?, ?, ?, ?)",
+            list(zip([userId] * transactionsPerUser, amounts.tolist(), dates.tolist(), descriptions[picks].tolist())),
+            log=False)
+
+        goalDates = RandomDates(generator, goalsPerUser, startDate, days + 365)
+        goalAmounts = np.round(generator.uniform(100, 20000, goalsPerUser), 2)
+        DatabaseHandler.ExecuteMany(
+            "INSERT INTO goal (user_id, name, description, date, amount) VALUES (?, ?, ?, ?, ?)",
+            [(userId, goalNames[i % len(goalNames)], '', goalDates[i], goalAmounts[i].item())
+             for i in range(goalsPerUser)], log=False)
+
+        budgetDates = RandomDates(generator, budgetsPerUser, startDate, days + 365)
+        budgetAmounts = np.round(generator.uniform(50, 2000, budgetsPerUser), 2)
+        expenseNames = [name for name, amount in descriptionAmounts.items() if amount < 0]
+        DatabaseHandler.ExecuteMany(
+            "INSERT INTO budgets (user_id, name, amount, end_date) VALUES (?, ?, ?, ?)",
+            [(userId, expenseNames[i % len(expenseNames)], budgetAmounts[i].item(), budgetDates[i])
+             for i in range(budgetsPerUser)], log=False)
+    DatabaseHandler.RebuildSpendingStats()  # The transactions were inserted without being scored
+    DatabaseHandler.RebuildBudgetSpend()
+    return usernames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fill a database with synthetic data for benchmarking.')
+    parser.add_argument('--database', default='synthetic data.db', help='The database file to fill.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--transactions', type=int, default=10000, help='Transactions per user.')
+    parser.add_argument('--goals', type=int, default=20, help='Goals per user.')
+    parser.add_argument('--budgets', type=int, default=10, help='Budgets per user.')
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+
+    DatabaseHandler.Open(arguments.database)
+    created = GenerateData(arguments.users, arguments.transactions, arguments.goals, arguments.budgets,
+                           arguments.seed)
+    print(f'Created {len(created)} users with {arguments.transactions} transactions each in {arguments.database}')
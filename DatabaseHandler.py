@@ -6,50 +6,349 @@ DESCRIPTION -
 NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
     and classes pascal case on each word eg - ToListBoxFormat -
 """
+import os
+import calendar
+import time
+import random
+import atexit
 import sqlite3
+import json
+from datetime import datetime
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 import argon2.exceptions
 from argon2._password_hasher import PasswordHasher
+import Profiler
+import QueryStats
+import Encryption
+import Deduplication
+import AnomalyDetection
+import BudgetAlerts
 
 databaseFilePath = 'finance management.db'
 hasher = PasswordHasher(time_cost=10)
+statementCacheSize = 256  # How many prepared statements the shared connection keeps
+busyTimeoutMs = int(os.environ.get('BUDGET_BUSY_TIMEOUT_MS', 5000))  # How long to wait for another writer's lock
+writeRetries = 5  # How many more times a write transaction tries to start once the busy timeout has run out
+retryDelaySeconds = 0.05  # The delay before the first retry, it doubles each retry and is randomised by +-50%
+defaultCurrency = 'AUD'  # The currency of amounts saved without one, FX rates are the value of one unit in it
 
+# The connection shared by every query, with the process and database file it was opened for
+connection: sqlite3.Connection = None
+connectionKey: tuple = None
+transactionDepth = 0
 
-def ExecuteSQLScripts(returnRows: bool, *args: str, **kwargs):
+
+def GetConnection():
+    """
+    Gets the connection shared by every query, opening it the first time it's needed.
+    The connection stays open so SQLite keeps the statements it has prepared in its statement cache, and is opened
+    again if the database file changes or the process has been forked.
+    The database uses write-ahead logging, so other copies of the app can keep reading while one writes, and a
+    connection waits up to busyTimeoutMs for another's write lock instead of failing straight away.
+    :return: The shared connection.
+    """
+    global connection, connectionKey, transactionDepth
+    key = (os.getpid(), databaseFilePath)
+    if connection is None or connectionKey != key:
+        # isolation_level=None stops sqlite3 from starting transactions by itself, Transaction() starts them instead
+        connection = sqlite3.connect(databaseFilePath, timeout=busyTimeoutMs / 1000, isolation_level=None,
+                                     cached_statements=statementCacheSize)
+        connection.execute('PRAGMA journal_mode = WAL')  # Saved in the file, so every connection uses it
+        connectionKey = key
+        transactionDepth = 0
+    return connection
+
+
+def CloseConnection():
+    """Closes the shared connection, it will be opened again by the next query."""
+    global connection, connectionKey
+    if connection is not None and connectionKey[0] == os.getpid():
+        connection.close()
+    connection = None
+    connectionKey = None
+
+
+@contextmanager
+def Cursor():
     """
-    Executes SQL scripts on the database.
-    :param returnRows: Boolean indicating if the function should return rows from the query.
-    :param args: SQL query strings to execute.
-    :param kwargs: Optional keyword arguments for parameterized queries.
-    :return: List of rows if returnRows is True, otherwise None.
+    Context manager giving a cursor on the shared connection, which is closed when the block ends.
+    :return: The cursor.
     """
-    conn = sqlite3.connect(databaseFilePath)
-    c = conn.cursor()
+    c = GetConnection().cursor()
     try:
-        if len(kwargs) > 0:
-            for value in kwargs.values():
-                c.execute(args[0], value)
-        else:
-            for i in args:
-                c.execute(i)
-        conn.commit()
-        if returnRows:
-            rows = c.fetchall()
-            c.close()
-            conn.close()
-            return rows
-    except Exception as e:
+        yield c
+    finally:
         c.close()
-        conn.close()
-        raise e
-    c.close()
-    conn.close()
-    return None
 
 
-# Create tables
-ExecuteSQLScripts(False,
-                  '''
+def BeginWrite(conn: sqlite3.Connection):
+    """
+    Starts a write transaction, taking the write lock straight away instead of failing half way through.
+    If another connection still holds the lock once the busy timeout has run out it tries again after a random,
+    growing delay, so app instances that were waiting together don't all try again at the same moment.
+    :param conn: The connection to start the transaction on.
+    """
+    for attempt in range(writeRetries + 1):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) or attempt == writeRetries:
+                raise
+            time.sleep(retryDelaySeconds * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+@contextmanager
+def Transaction():
+    """
+    Context manager that runs every query inside it in one transaction.
+    It is committed when the block ends, or rolled back if an exception is raised. Transactions inside another
+    transaction use a savepoint, so only their own part is rolled back.
+    :return: The shared connection.
+    """
+    global transactionDepth
+    conn = GetConnection()
+    savepoint = f'level{transactionDepth}'
+    if transactionDepth == 0:
+        BeginWrite(conn)
+    else:
+        conn.execute(f'SAVEPOINT {savepoint}')
+    transactionDepth += 1
+    try:
+        yield conn
+    except BaseException:
+        transactionDepth -= 1
+        if transactionDepth == 0:
+            conn.execute('ROLLBACK')
+        else:
+            conn.execute(f'ROLLBACK TO {savepoint}')
+            conn.execute(f'RELEASE {savepoint}')
+        raise
+    transactionDepth -= 1
+    if transactionDepth == 0:
+        conn.execute('COMMIT')
+    else:
+        conn.execute(f'RELEASE {savepoint}')
+
+
+@Profiler.Timed('db')
+def Execute(query: str, params: tuple = (), log: bool = True) -> int:
+    """
+    Executes one write query.
+    :param query: SQL query string to execute.
+    :param params: The parameters of the query.
+    :param log: Whether the query is written to the statement log, derived data doesn't need to be.
+    :return: The number of rows changed.
+    """
+    startTime = time.perf_counter()
+    with Transaction(), Cursor() as c:
+        c.execute(query, params)
+        rowCount = c.rowcount
+        if log:
+            LogStatements(c, query, [params])
+    QueryStats.RecordQuery(query, params, time.perf_counter() - startTime, rowCount, GetConnection())
+    return rowCount
+
+
+@Profiler.Timed('db')
+def ExecuteMany(query: str, paramsList: list, log: bool = True) -> int:
+    """
+    Executes one write query for every set of parameters, all in one transaction.
+    :param query: SQL query string to execute.
+    :param paramsList: List of parameter tuples, the query is run once for each.
+    :param log: Whether the queries are written to the statement log, derived data doesn't need to be.
+    :return: The number of rows changed.
+    """
+    startTime = time.perf_counter()
+    with Transaction(), Cursor() as c:
+        c.executemany(query, paramsList)
+        rowCount = c.rowcount
+        if log:
+            LogStatements(c, query, paramsList)
+    QueryStats.RecordQuery(query, paramsList[0] if paramsList else (), time.perf_counter() - startTime, rowCount,
+                           GetConnection())
+    return rowCount
+
+
+@Profiler.Timed('db')
+def ExecuteScript(*queries: str):
+    """
+    Executes queries without parameters in one transaction, such as the scripts that create the tables.
+    They aren't written to the statement log.
+    :param queries: SQL query strings to execute.
+    """
+    with Transaction(), Cursor() as c:
+        for query in queries:
+            c.execute(query)
+
+
+@Profiler.Timed('db')
+def Fetch(query: str, params: tuple = ()) -> list:
+    """
+    Executes a read query.
+    :param query: SQL query string to execute.
+    :param params: The parameters of the query.
+    :return: List of rows.
+    """
+    startTime = time.perf_counter()
+    with Cursor() as c:
+        rows = c.execute(query, params).fetchall()
+    QueryStats.RecordQuery(query, params, time.perf_counter() - startTime, len(rows), GetConnection())
+    return rows
+
+
+@Profiler.Timed('db')
+def FetchOne(query: str, params: tuple = ()):
+    """
+    Executes a read query and gets its first row.
+    :param query: SQL query string to execute.
+    :param params: The parameters of the query.
+    :return: The first row, or None if there are no rows.
+    """
+    startTime = time.perf_counter()
+    with Cursor() as c:
+        row = c.execute(query, params).fetchone()
+    QueryStats.RecordQuery(query, params, time.perf_counter() - startTime, row is not None, GetConnection())
+    return row
+
+
+@Profiler.Timed('db')
+def ReadFrame(query: str, params: tuple = ()) -> pd.DataFrame:
+    """
+    Executes a read query into a DataFrame.
+    :param query: SQL query string to execute.
+    :param params: The parameters of the query.
+    :return: DataFrame containing the rows.
+    """
+    startTime = time.perf_counter()
+    df = pd.read_sql_query(query, GetConnection(), params=params)
+    QueryStats.RecordQuery(query, params, time.perf_counter() - startTime, len(df), GetConnection())
+    return df
+
+
+def LogStatements(cursor: sqlite3.Cursor, query: str, paramsList: list):
+    """
+    Appends a write query that was run once for each set of parameters to the statement log, so it can be
+    replayed on top of a backup. It uses the cursor of the write so the log entry is committed in the same
+    transaction.
+    :param cursor: The cursor that ran the write queries.
+    :param query: The SQL query that was run.
+    :param paramsList: List of parameter tuples the query was run with.
+    """
+    logTime = datetime.now().isoformat(timespec='microseconds')
+    statement = ' '.join(query.split())
+    cursor.executemany("INSERT INTO statement_log (time, statement, params) VALUES (?, ?, ?)",
+                       [(logTime, statement, json.dumps(params)) for params in paramsList])
+
+
+# The SQL that gets the first date of the bucket a date (YY/MM/DD) is in, by bucket name. Weeks start on Monday
+bucketExpressions = {
+    'day': 'date',
+    'week': "substr(strftime('%Y/%m/%d', '20' || replace(date, '/', '-'), '-6 days', 'weekday 1'), 3)",
+    'month': "substr(date, 1, 6) || '01'",
+    'year': "substr(date, 1, 3) || '01/01'",
+}
+firstDate, lastDate = '00/01/01', '99/12/31'  # The range of dates the YY/MM/DD format can hold
+
+# The data tables that are tracked by the change log
+changeLogTables = ('transactions', 'budgets', 'investments', 'goal', 'goal_contributions')
+derivedColumns = {'transactions': ('fingerprint', 'occurrence')}  # Columns worked out from the others, by table
+
+# Columns added to tables after they were first made, by table, so older database files are updated when opened
+addedColumns = {
+    # The salt and the data key wrapped by the password and by the security answer, of users with encryption on
+    'users': {'key_salt': 'TEXT', 'password_key': 'TEXT', 'answer_key': 'TEXT'},
+    # The fingerprint and occurrence of transactions find the ones already imported, see Deduplication
+    'transactions': {'currency': f"TEXT NOT NULL DEFAULT '{defaultCurrency}'", 'fingerprint': 'INTEGER',
+                     'occurrence': 'INTEGER'},
+    'budgets': {'currency': f"TEXT NOT NULL DEFAULT '{defaultCurrency}'"},
+    'goal': {'currency': f"TEXT NOT NULL DEFAULT '{defaultCurrency}'"},
+}
+
+
+def AddMissingColumns():
+    """Adds the columns in addedColumns to the tables that don't have them yet."""
+    for tableName, columns in addedColumns.items():
+        existingColumns = {row[1] for row in Fetch(f"PRAGMA table_info({tableName})")}
+        ExecuteScript(*[f'ALTER TABLE {tableName} ADD COLUMN {column} {definition}'
+                        for column, definition in columns.items() if column not in existingColumns])
+
+
+def ChangeLogTriggerScripts(tableName: str):
+    """
+    Builds the scripts for the triggers that copy every insert, update and delete on a table into the change log.
+    The row is saved as JSON, the new row for inserts and updates and the old row for deletes.
+    :param tableName: The name of the table to track.
+    :return: List of SQL scripts that (re)create the triggers.
+    """
+    columns = [row[1] for row in Fetch(f"PRAGMA table_info({tableName})")]
+    # Updates that only change derived columns aren't changes to the data, so they aren't logged
+    updatedColumns = ', '.join(column for column in columns if column not in derivedColumns.get(tableName, ()))
+    scripts = []
+    for operation, when, rowName in (('INSERT', 'AFTER INSERT', 'NEW'),
+                                     ('UPDATE', f'AFTER UPDATE OF {updatedColumns}', 'NEW'),
+                                     ('DELETE', 'AFTER DELETE', 'OLD')):
+        rowJson = ', '.join(f"'{column}', {rowName}.{column}" for column in columns)
+        triggerName = f'change_log_{tableName}_{operation.lower()}'
+        scripts.append(f'DROP TRIGGER IF EXISTS {triggerName}')
+        scripts.append(f'''
+CREATE TRIGGER {triggerName} {when} ON {tableName}
+BEGIN
+    INSERT INTO change_log (table_name, operation, row_id, user_id, row_data)
+    VALUES ('{tableName}', '{operation}', {rowName}.id, {rowName}.user_id, json_object({rowJson}));
+END
+''')
+    return scripts
+
+
+# The triggers that keep monthly_rollup up to date with every insert, update and delete on transactions.
+# Encrypted amounts are saved as text and are left out, so the rollup doesn't give away their totals
+rollupAdd = '''
+    INSERT INTO monthly_rollup (user_id, month, currency, income, expenses, net, count)
+    SELECT NEW.user_id, substr(NEW.date, 1, 5), NEW.currency, MAX(NEW.amount, 0), MIN(NEW.amount, 0), NEW.amount, 1
+    WHERE typeof(NEW.amount) != 'text'
+    ON CONFLICT (user_id, month, currency) DO UPDATE SET
+        income = income + excluded.income, expenses = expenses + excluded.expenses, net = net + excluded.net,
+        count = count + 1;
+'''
+rollupSubtract = '''
+    UPDATE monthly_rollup
+    SET income = income - MAX(OLD.amount, 0), expenses = expenses - MIN(OLD.amount, 0), net = net - OLD.amount,
+        count = count - 1
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 5) AND currency = OLD.currency
+        AND typeof(OLD.amount) != 'text';
+    DELETE FROM monthly_rollup
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 5) AND currency = OLD.currency AND count <= 0;
+'''
+rollupTriggerScripts = (
+    'DROP TRIGGER IF EXISTS monthly_rollup_insert',
+    f'CREATE TRIGGER monthly_rollup_insert AFTER INSERT ON transactions\nBEGIN{rollupAdd}END',
+    'DROP TRIGGER IF EXISTS monthly_rollup_update',
+    f'CREATE TRIGGER monthly_rollup_update AFTER UPDATE OF user_id, amount, date, currency '
+    f'ON transactions\nBEGIN{rollupSubtract}{rollupAdd}END',
+    'DROP TRIGGER IF EXISTS monthly_rollup_delete',
+    f'CREATE TRIGGER monthly_rollup_delete AFTER DELETE ON transactions\nBEGIN{rollupSubtract}END',
+)
+
+# The monthly totals of the transactions table, grouped the same way as monthly_rollup
+rollupQuery = '''
+SELECT user_id, substr(date, 1, 5), currency, TOTAL(MAX(amount, 0)), TOTAL(MIN(amount, 0)), TOTAL(amount), COUNT(*)
+FROM transactions
+WHERE typeof(amount) != 'text'
+GROUP BY user_id, substr(date, 1, 5), currency
+'''
+
+
+def CreateTables():
+    """
+    Creates the tables, indexes and triggers the app needs if they don't exist yet.
+    Columns added since a table was first made are added to it, and the triggers are rebuilt every time so they match
+    this version of the app and the change log copies every column, even after a column has been added.
+    """
+    tableNames = {row[0] for row in Fetch("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    ExecuteScript('''
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT NOT NULL UNIQUE,
@@ -98,9 +397,576 @@ CREATE TABLE IF NOT EXISTS goal (
     amount REAL,
     FOREIGN KEY (user_id) REFERENCES users (id)
 )
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS goal_contributions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    goal_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    date TEXT NOT NULL,
+    FOREIGN KEY (goal_id) REFERENCES goal (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+)
+''',
+                  '''
+CREATE INDEX IF NOT EXISTS goal_contributions_goal_amount ON goal_contributions (goal_id, amount)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS statement_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    time TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    params TEXT NOT NULL
+)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    time TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')),
+    table_name TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    user_id INTEGER,
+    row_data TEXT
+)
+''',
+                  '''
+CREATE INDEX IF NOT EXISTS change_log_user ON change_log (user_id, seq)
+''',
+                  '''
+CREATE TRIGGER IF NOT EXISTS change_log_no_update BEFORE UPDATE ON change_log
+BEGIN
+    SELECT RAISE(ABORT, 'change_log is append-only');
+END
+''',
+                  '''
+CREATE TRIGGER IF NOT EXISTS change_log_no_delete BEFORE DELETE ON change_log
+BEGIN
+    SELECT RAISE(ABORT, 'change_log is append-only');
+END
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS query_stats (
+    statement TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    rows INTEGER NOT NULL
+)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS slow_queries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    time TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    ms REAL NOT NULL,
+    plan TEXT NOT NULL
+)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS archived_totals (
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    income REAL NOT NULL,
+    expenses REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, date, currency)
+) WITHOUT ROWID
+''',
+                  # The fingerprints of the archived transactions, so importing a statement again skips them too
+                  '''
+CREATE TABLE IF NOT EXISTS archived_fingerprints (
+    fingerprint INTEGER NOT NULL,
+    occurrence INTEGER NOT NULL,
+    PRIMARY KEY (fingerprint, occurrence)
+) WITHOUT ROWID
+''',
+                  # When each year was archived, so restoring to a point in time doesn't replay across it
+                  '''
+CREATE TABLE IF NOT EXISTS archive_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    time TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    count INTEGER NOT NULL
+)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS monthly_rollup (
+    user_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    income REAL NOT NULL,
+    expenses REAL NOT NULL,
+    net REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, month, currency)
+) WITHOUT ROWID
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS spending_stats (
+    user_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (user_id, category, currency)
+) WITHOUT ROWID
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS spending_alerts (
+    transaction_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    z_score REAL NOT NULL,
+    quantile REAL NOT NULL,
+    mean REAL NOT NULL,
+    dismissed INTEGER NOT NULL DEFAULT 0
+)
+''',
+                  '''
+CREATE INDEX IF NOT EXISTS spending_alerts_user ON spending_alerts (user_id, dismissed)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS budget_spend (
+    budget_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    spent REAL NOT NULL,
+    level INTEGER NOT NULL
+)
+''',
+                  '''
+CREATE INDEX IF NOT EXISTS budget_spend_category ON budget_spend (user_id, category, currency)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS budget_alerts (
+    budget_id INTEGER NOT NULL,
+    threshold INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    transaction_id INTEGER,
+    dismissed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (budget_id, threshold)
+)
+''',
+                  '''
+CREATE INDEX IF NOT EXISTS budget_alerts_user ON budget_alerts (user_id, dismissed)
+''',
+                  '''
+CREATE TABLE IF NOT EXISTS fx_rates (
+    currency TEXT NOT NULL,
+    date TEXT NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (currency, date)
+) WITHOUT ROWID
 ''')
+    AddMissingColumns()
+    # Covers the range totals of Aggregate as well as the date range lookups, so they don't read the table's rows
+    ExecuteScript('DROP INDEX IF EXISTS transactions_user_date',
+                  'CREATE INDEX IF NOT EXISTS transactions_user_date_amount '
+                  'ON transactions (user_id, date, currency, amount)',
+                  'CREATE INDEX IF NOT EXISTS goal_user ON goal (user_id)',
+                  # Stops the same statement line being imported twice, rows without a fingerprint are all distinct
+                  'CREATE UNIQUE INDEX IF NOT EXISTS transactions_fingerprint '
+                  'ON transactions (fingerprint, occurrence)')
+    ExecuteScript(*[script for table in changeLogTables for script in ChangeLogTriggerScripts(table)])
+    ExecuteScript(*rollupTriggerScripts)
+    if 'monthly_rollup' not in tableNames:
+        RebuildRollups()  # Fills the rollup of a database made before it was added
+    if 'spending_stats' not in tableNames:
+        RebuildSpendingStats()  # Fills the statistics of a database made before they were added
+    if 'budget_spend' not in tableNames:
+        RebuildBudgetSpend()  # Fills the budgets' spending of a database made before it was added
+
+
+@Profiler.Timed('db')
+def RebuildRollups():
+    """Rebuilds monthly_rollup from the transactions, in one transaction."""
+    with Transaction():
+        Execute('DELETE FROM monthly_rollup', log=False)
+        Execute(f'INSERT INTO monthly_rollup (user_id, month, currency, income, expenses, net, count) {rollupQuery}',
+                log=False)
+
+
+@Profiler.Timed('db')
+def CheckRollups(tolerance: float = 0.005):
+    """
+    Checks monthly_rollup against the totals calculated from the transactions.
+    :param tolerance: How far apart the amounts can be before they don't match, for floating point error.
+    :return: List of the (user_id, month, currency) keys that don't match.
+    """
+    expected = {tuple(row[:3]): row[3:] for row in Fetch(rollupQuery)}
+    stored = {tuple(row[:3]): row[3:] for row in
+              Fetch('SELECT user_id, month, currency, income, expenses, net, count FROM monthly_rollup')}
+    mismatches = []
+    for key in expected.keys() | stored.keys():
+        expectedRow, storedRow = expected.get(key), stored.get(key)
+        if (expectedRow is None or storedRow is None or expectedRow[3] != storedRow[3]
+                or any(abs(a - b) > tolerance for a, b in zip(expectedRow[:3], storedRow[:3]))):
+            mismatches.append(key)
+    return sorted(mismatches)
+
+
+@Profiler.Timed('db')
+def UpdateSpendingStats(user_id, transactions: list):
+    """
+    Scores new transactions against the statistics of their category's expenses, saves an alert for the unusual
+    expenses and adds the expenses to the statistics. Only the statistics of the categories of the new transactions
+    are read, so the time taken doesn't grow with the user's history.
+    The statistics aren't kept for users with encryption on, as they would give their amounts away.
+    :param user_id: The ID of the user.
+    :param transactions: List of (id, amount, description, currency) tuples of the new transactions, in order.
+    :return: The number of alerts saved.
+    """
+    expenses = [(transactionId, -amount, description, currency) for transactionId, amount, description, currency in
+                transactions if amount < 0]
+    if not expenses:
+        return 0
+    keys = list(zip(Deduplication.NormaliseDescriptions([row[2] for row in expenses], keepNumbers=False).tolist(),
+                    [row[3] for row in expenses]))
+    saved = Fetch("SELECT category, currency, count, mean, m2, digest FROM spending_stats WHERE user_id = ? AND "
+                  "(category, currency) IN (SELECT value ->> 0, value ->> 1 FROM json_each(?))",
+                  (user_id, json.dumps(list(set(keys)))))
+    categories = {(category, currency): (AnomalyDetection.RunningStats(count, mean, m2),
+                                         AnomalyDetection.TDigest.FromJson(digest))
+                  for category, currency, count, mean, m2, digest in saved}
+    alerts = []
+    for (transactionId, size, _, _), key in zip(expenses, keys):
+        stats, digest = categories.setdefault(key, (AnomalyDetection.RunningStats(), AnomalyDetection.TDigest()))
+        zScore, quantile = AnomalyDetection.Score(stats, digest, size)
+        if AnomalyDetection.IsUnusual(stats.count, zScore, quantile):
+            alerts.append((transactionId, user_id, min(zScore, 1e9), quantile, stats.mean))
+        stats.Add(size)
+        digest.Add(size)
+    with Transaction():
+        ExecuteMany("INSERT OR REPLACE INTO spending_stats (user_id, category, currency, count, mean, m2, digest) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(user_id, category, currency, stats.count, stats.mean, stats.m2, digest.ToJson())
+                     for (category, currency), (stats, digest) in categories.items()], log=False)
+        ExecuteMany("INSERT OR REPLACE INTO spending_alerts (transaction_id, user_id, z_score, quantile, mean) "
+                    "VALUES (?, ?, ?, ?, ?)", alerts, log=False)
+    return len(alerts)
+
+
+@Profiler.Timed('db')
+def RebuildSpendingStats(lastId: int = None):
+    """
+    Rebuilds spending_stats from the expenses of every user without encryption, in one transaction. The alerts
+    already saved are kept.
+    :param lastId: The ID of the last transaction added up, None for all of them. The ones after it can be scored
+        with UpdateSpendingStats afterwards.
+    """
+    expenses = ReadFrame("SELECT user_id, -amount AS size, description, currency FROM transactions "
+                         "WHERE typeof(amount) != 'text' AND amount < 0 AND (? IS NULL OR id <= ?) ORDER BY id",
+                         (lastId, lastId))
+    expenses['category'] = Deduplication.NormaliseDescriptions(expenses['description'], keepNumbers=False)
+    rows = []
+    for (user_id, category, currency), sizes in expenses.groupby(['user_id', 'category', 'currency'])['size']:
+        # The sum of squared differences from the mean is the population variance times the count
+        m2 = float(sizes.var(ddof=0) * len(sizes))
+        rows.append((user_id, category, currency, len(sizes), float(sizes.mean()), m2,
+                     AnomalyDetection.TDigest.FromValues(sizes.tolist()).ToJson()))
+    with Transaction():
+        Execute('DELETE FROM spending_stats', log=False)
+        ExecuteMany("INSERT INTO spending_stats (user_id, category, currency, count, mean, m2, digest) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows, log=False)
+
+
+@Profiler.Timed('db')
+def PullSpendingAlerts(user_id, limit: int = -1):
+    """
+    Retrieves a user's unusual expenses that haven't been dismissed, newest first.
+    :param user_id: The ID of the user.
+    :param limit: The most alerts to read, -1 for all of them.
+    :return: DataFrame with the date, amount, description, currency, z_score, quantile, mean (the category's mean
+        expense before it) and transaction_id columns.
+    """
+    query = '''
+        SELECT transactions.date, transactions.amount, transactions.description, transactions.currency,
+               spending_alerts.z_score, spending_alerts.quantile, spending_alerts.mean, spending_alerts.transaction_id
+        FROM spending_alerts
+        INNER JOIN transactions ON transactions.id = spending_alerts.transaction_id
+        WHERE spending_alerts.user_id = ? AND NOT spending_alerts.dismissed
+        ORDER BY transactions.date DESC, transactions.id DESC
+        LIMIT ?
+    '''
+    return ReadFrame(query, (user_id, limit))
+
+
+@Profiler.Timed('db')
+def DismissSpendingAlerts(user_id):
+    """
+    Dismisses all of a user's alerts.
+    :param user_id: The ID of the user.
+    :return: The number of alerts dismissed.
+    """
+    return Execute("UPDATE spending_alerts SET dismissed = 1 WHERE user_id = ? AND NOT dismissed", (user_id,),
+                   log=False)
+
+
+@Profiler.Timed('db')
+def UpdateBudgetSpend(added: list, removed: list = ()):
+    """
+    Updates the spending of the budgets the changed transactions are in and runs the alert rules on them, saving an
+    alert for each threshold a budget's spending has gone past and taking away the alerts of the thresholds it has
+    dropped below. Only the budgets of the categories of the transactions are read, so the time taken doesn't grow
+    with the user's history. Encrypted amounts are left out, as the budgets of encrypted users aren't kept.
+    :param added: List of (id, user_id, amount, date, description, currency) tuples of the transactions added, or the
+        new rows of changed transactions, in order.
+    :param removed: The same of the transactions deleted, or the old rows of changed transactions.
+    :return: The number of alerts saved.
+    """
+    changes = []  # (transaction id, user id, category, currency, date, change to the spending) of each expense
+    for rows, sign in ((removed, -1), (added, 1)):
+        expenses = [row for row in rows if not isinstance(row[2], str) and row[2] < 0]
+        changes += [(row[0] if sign > 0 else None, row[1], category, row[5], row[3], -row[2] * sign)
+                    for row, category in zip(expenses, BudgetAlerts.Categories([row[4] for row in expenses]))]
+    if not changes:
+        return 0
+    keys = sorted({(user_id, category, currency) for _, user_id, category, currency, _, _ in changes})
+    saved = Fetch("SELECT budget_spend.budget_id, budget_spend.user_id, budget_spend.category, budget_spend.currency, "
+                  "budgets.amount, budgets.end_date, budget_spend.spent, budget_spend.level FROM budget_spend "
+                  "INNER JOIN budgets ON budgets.id = budget_spend.budget_id WHERE "
+                  "(budget_spend.user_id, budget_spend.category, budget_spend.currency) IN "
+                  "(SELECT value ->> 0, value ->> 1, value ->> 2 FROM json_each(?))", (json.dumps(keys),))
+    budgets = {}
+    for budgetId, user_id, category, currency, amount, endDate, spent, level in saved:
+        budgets.setdefault((user_id, category, currency), []).append(
+            {'id': budgetId, 'user_id': user_id, 'start': BudgetAlerts.PeriodStart(endDate), 'end': endDate,
+             'amount': amount, 'spent': spent, 'level': level, 'reachedBy': {}})
+    changed = {}
+    for transactionId, user_id, category, currency, date, change in changes:
+        for budget in budgets.get((user_id, category, currency), ()):
+            if budget['start'] <= date <= budget['end']:
+                budget['spent'] += change
+                changed[budget['id']] = budget
+                # The alert of each threshold names the transaction that first took the spending past it
+                for threshold in BudgetAlerts.Crossed(budget['level'],
+                                                      BudgetAlerts.Level(budget['spent'], budget['amount'])):
+                    budget['reachedBy'].setdefault(threshold, transactionId)
+    updates, alerts, cleared = [], [], []
+    for budget in changed.values():
+        level = BudgetAlerts.Level(budget['spent'], budget['amount'])
+        updates.append((budget['spent'], level, budget['id']))
+        alerts += [(budget['id'], threshold, budget['user_id'], budget['reachedBy'].get(threshold))
+                   for threshold in BudgetAlerts.Crossed(budget['level'], level)]
+        if level < budget['level']:
+            cleared.append((budget['id'], level))
+    with Transaction():
+        ExecuteMany("UPDATE budget_spend SET spent = ?, level = ? WHERE budget_id = ?", updates, log=False)
+        ExecuteMany("INSERT OR REPLACE INTO budget_alerts (budget_id, threshold, user_id, transaction_id) "
+                    "VALUES (?, ?, ?, ?)", alerts, log=False)
+        ExecuteMany("DELETE FROM budget_alerts WHERE budget_id = ? AND threshold > ?", cleared, log=False)
+    return len(alerts)
+
+
+@Profiler.Timed('db')
+def RebuildBudgetSpend(budgetIds: list = None):
+    """
+    Adds up the spending of budgets from the transactions, in one transaction: every budget of the users without
+    encryption, or only some budgets, eg - a new one. Alerts are saved for the thresholds the spending of budgets that
+    haven't ended has reached, so a first rebuild doesn't alert every old budget, and taken away for the thresholds it
+    hasn't reached. The alerts already saved are kept.
+    :param budgetIds: The IDs of the budgets, None for all of them.
+    """
+    idsJson = None if budgetIds is None else json.dumps(list(budgetIds))
+    budgets = ReadFrame('''
+        SELECT budgets.id, budgets.user_id, budgets.name, budgets.amount, budgets.end_date, budgets.currency
+        FROM budgets
+        INNER JOIN users ON users.id = budgets.user_id
+        WHERE users.key_salt IS NULL AND (? IS NULL OR budgets.id IN (SELECT value FROM json_each(?)))
+    ''', (idsJson, idsJson))
+    # The expenses in each budget's currency and dates, their category is checked below
+    expenses = ReadFrame('''
+        SELECT budgets.id, -transactions.amount AS size, transactions.description
+        FROM budgets
+        INNER JOIN transactions ON transactions.user_id = budgets.user_id AND transactions.currency = budgets.currency
+            AND transactions.date BETWEEN substr(budgets.end_date, 1, 6) || '01' AND budgets.end_date
+        WHERE typeof(transactions.amount) != 'text' AND transactions.amount < 0
+            AND (? IS NULL OR budgets.id IN (SELECT value FROM json_each(?)))
+    ''', (idsJson, idsJson))
+    budgets['category'] = BudgetAlerts.Categories(budgets['name'])
+    expenses = expenses.merge(budgets[['id', 'category']], on='id')
+    expenses = expenses[np.array(BudgetAlerts.Categories(expenses['description'])) == expenses['category'].to_numpy()]
+    budgets['spent'] = budgets['id'].map(expenses.groupby('id')['size'].sum()).fillna(0.0)
+    today = datetime.now().strftime('%y/%m/%d')
+    rows, alerts, levels = [], [], []
+    for budgetId, user_id, amount, endDate, currency, category, spent in zip(
+            budgets['id'].tolist(), budgets['user_id'].tolist(), budgets['amount'].tolist(),
+            budgets['end_date'].tolist(), budgets['currency'].tolist(), budgets['category'].tolist(),
+            budgets['spent'].tolist()):
+        level = BudgetAlerts.Level(spent, amount)
+        rows.append((budgetId, user_id, category, currency, spent, level))
+        levels.append((budgetId, level))
+        if endDate >= today:
+            alerts += [(budgetId, threshold, user_id) for threshold in BudgetAlerts.Crossed(0, level)]
+    with Transaction():
+        if budgetIds is None:
+            Execute('DELETE FROM budget_spend', log=False)
+        ExecuteMany("INSERT OR REPLACE INTO budget_spend (budget_id, user_id, category, currency, spent, level) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows, log=False)
+        ExecuteMany("INSERT OR IGNORE INTO budget_alerts (budget_id, threshold, user_id) VALUES (?, ?, ?)", alerts,
+                    log=False)
+        ExecuteMany("DELETE FROM budget_alerts WHERE budget_id = ? AND threshold > ?", levels, log=False)
+        Execute("DELETE FROM budget_alerts WHERE budget_id NOT IN (SELECT budget_id FROM budget_spend)", log=False)
+
+
+@Profiler.Timed('db')
+def PullBudgetAlerts(user_id):
+    """
+    Retrieves the budgets of a user that have alerts that haven't been dismissed, with the highest threshold their
+    spending has gone past, newest budgets first.
+    :param user_id: The ID of the user.
+    :return: DataFrame with the name, amount, end_date, currency, spent, threshold and budget_id columns.
+    """
+    query = '''
+        SELECT budgets.name, budgets.amount, budgets.end_date, budgets.currency, budget_spend.spent,
+               MAX(budget_alerts.threshold) AS threshold, budgets.id AS budget_id
+        FROM budget_alerts
+        INNER JOIN budgets ON budgets.id = budget_alerts.budget_id
+        INNER JOIN budget_spend ON budget_spend.budget_id = budget_alerts.budget_id
+        WHERE budget_alerts.user_id = ? AND NOT budget_alerts.dismissed
+        GROUP BY budgets.id
+        ORDER BY budgets.end_date DESC, budgets.id DESC
+    '''
+    return ReadFrame(query, (user_id,))
+
+
+@Profiler.Timed('db')
+def DismissBudgetAlerts(user_id):
+    """
+    Dismisses all of a user's budget alerts.
+    :param user_id: The ID of the user.
+    :return: The number of alerts dismissed.
+    """
+    return Execute("UPDATE budget_alerts SET dismissed = 1 WHERE user_id = ? AND NOT dismissed", (user_id,),
+                   log=False)
+
+
+def Open(path: str = None):
+    """
+    Opens a database file for every query after it, creating its tables or bringing them up to date with this version
+    of the app. Nothing is opened when this module is imported, so a program can choose its database first.
+    :param path: The database file, the current databaseFilePath by default.
+    """
+    global databaseFilePath
+    CloseConnection()
+    if path is not None:
+        databaseFilePath = path
+    CreateTables()
+
+
+def SaveQueryStats():
+    """
+    Adds the query statistics collected since the last save to the totals saved in the database, so they can be
+    read after the program has closed, eg - python QueryStats.py -
+    """
+    summaryRows, slowRows = QueryStats.TakeAll()
+    if not summaryRows and not slowRows:
+        return
+    try:
+        with Transaction(), Cursor() as c:
+            c.executemany('''
+                INSERT INTO query_stats (statement, count, total_ms, max_ms, rows) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (statement) DO UPDATE SET
+                    count = count + excluded.count,
+                    total_ms = total_ms + excluded.total_ms,
+                    max_ms = MAX(max_ms, excluded.max_ms),
+                    rows = rows + excluded.rows
+            ''', summaryRows)
+            c.executemany("INSERT INTO slow_queries (time, statement, ms, plan) VALUES (?, ?, ?, ?)",
+                          [(row['time'], row['statement'], row['ms'], row['plan']) for row in slowRows])
+    except sqlite3.Error as e:
+        print(f"Couldn't save query statistics: {e}")
+
+
+atexit.register(SaveQueryStats)
+
+
+@Profiler.Timed('db')
+def PullQueryStats(limit: int = 30):
+    """
+    Retrieves the query statistics saved in the database, together with the ones not saved yet.
+    :param limit: How many statements and slow queries to get.
+    :return: Tuple of a list of (statement, count, total ms, max ms, rows), slowest total first, and a list of
+        (time, statement, ms, plan), newest first.
+    """
+    SaveQueryStats()
+    summaryRows = Fetch("SELECT statement, count, total_ms, max_ms, rows FROM query_stats "
+                        "ORDER BY total_ms DESC LIMIT ?", (limit,))
+    slowRows = Fetch("SELECT time, statement, ms, plan FROM slow_queries ORDER BY id DESC LIMIT ?", (limit,))
+    return summaryRows, slowRows
+
+
+@Profiler.Timed('db')
+def LatestChangeSeq():
+    """
+    Gets the sequence number of the latest change to the data tables.
+    :return: The latest sequence number, or 0 if nothing has changed yet.
+    """
+    return FetchOne("SELECT COALESCE(MAX(seq), 0) FROM change_log")[0]
+
+
+@Profiler.Timed('db')
+def DataVersion():
+    """
+    Gets a value that changes whenever the database has been changed, by this connection or any other.
+    It only reads SQLite's counters, so it is cheap enough to poll.
+    :return: Tuple of the data version, which changes when another connection commits, and the number of rows this
+        connection has changed.
+    """
+    return FetchOne('PRAGMA data_version')[0], GetConnection().total_changes
+
+
+@Profiler.Timed('db')
+def PullChangedTables(seq: int, user_id: int):
+    """
+    Finds which data tables a user's rows have changed in after a sequence number.
+    :param seq: The sequence number of the last change seen.
+    :param user_id: The ID of the user.
+    :return: Dictionary of table name to the sequence number of its latest change.
+    """
+    query = '''
+        SELECT table_name, MAX(seq)
+        FROM change_log
+        WHERE user_id = ? AND seq > ?
+        GROUP BY table_name
+    '''
+    return dict(Fetch(query, (user_id, seq)))
+
+
+@Profiler.Timed('db')
+def PullChangesSince(seq: int, user_id: int = None):
+    """
+    Retrieves the changes made to the data tables after a sequence number, oldest first.
+    This lets a client sync incrementally instead of reloading everything, and doubles as the audit trail.
+    :param seq: The sequence number of the last change the client has seen.
+    :param user_id: Optional ID of a user to only get that user's changes.
+    :return: DataFrame containing the changes, with the changed row as JSON in row_data.
+    """
+    if user_id is None:
+        query = '''
+            SELECT seq, time, table_name, operation, row_id, user_id, row_data
+            FROM change_log
+            WHERE seq > ?
+            ORDER BY seq
+        '''
+        params = (seq,)
+    else:
+        query = '''
+            SELECT seq, time, table_name, operation, row_id, user_id, row_data
+            FROM change_log
+            WHERE user_id = ? AND seq > ?
+            ORDER BY seq
+        '''
+        params = (user_id, seq)
+    return ReadFrame(query, params)
 
 
+@Profiler.Timed('db')
 def CheckUser(username, password):
     """
     Checks if a user exists and verifies the password.
@@ -108,7 +974,7 @@ def CheckUser(username, password):
     :param password: The password of the user.
     :return: True if the user exists and the password is correct, otherwise False.
     """
-    rows = ExecuteSQLScripts(True, "SELECT * FROM users WHERE username = ?", value=(username,))
+    rows = Fetch("SELECT * FROM users WHERE username = ?", (username,))
     if not rows:
         return False
     try:
@@ -122,6 +988,7 @@ def CheckUser(username, password):
         return False
 
 
+@Profiler.Timed('db')
 def CheckTwoFactor(username, twoFactorQ, twoFactorA):
     """
     Checks the two-factor authentication question and answer for a user.
@@ -130,7 +997,7 @@ def CheckTwoFactor(username, twoFactorQ, twoFactorA):
     :param twoFactorA: The answer to the security question.
     :return: True if the question and answer are correct, otherwise False.
     """
-    rows = ExecuteSQLScripts(True, "SELECT factorQ, factorA FROM users WHERE username = ?", value=(username,))
+    rows = Fetch("SELECT factorQ, factorA FROM users WHERE username = ?", (username,))
     if not rows:
         return False
     stored_q = rows[0][0]
@@ -147,95 +1014,376 @@ def CheckTwoFactor(username, twoFactorQ, twoFactorA):
         return False
 
 
-def ChangePassword(username, new_password):
+@Profiler.Timed('db')
+def ChangePassword(username, new_password, twoFactorA=None):
     """
     Changes the password for a user.
+    If the user's data is encrypted their data key is unwrapped with their security answer and wrapped again with the
+    new password, so the answer is needed.
     :param username: The username of the user.
     :param new_password: The new password for the user.
+    :param twoFactorA: The answer to the user's security question, needed if their data is encrypted.
     :return: True if the password was changed successfully, otherwise False.
     """
     hashed_new_password = hasher.hash(new_password)
+    row = FetchOne("SELECT key_salt, answer_key FROM users WHERE username = ?", (username,))
+    passwordKey = None
+    if row is not None and row[0] is not None:
+        dataKey = Encryption.UnwrapKey(Encryption.DeriveKey((twoFactorA or '').lower().strip(), row[0], hasher),
+                                       row[1]) if twoFactorA is not None else None
+        if dataKey is None:
+            print(f"Couldn't unlock the encrypted data of {username} with the security answer")
+            return False
+        passwordKey = Encryption.WrapKey(Encryption.DeriveKey(new_password, row[0], hasher), dataKey)
     try:
-        ExecuteSQLScripts(False, "UPDATE users SET password = ? WHERE username = ?",
-                          value=(hashed_new_password, username))
+        Execute("UPDATE users SET password = ?, password_key = COALESCE(?, password_key) WHERE username = ?",
+                (hashed_new_password, passwordKey, username))
         return True
     except Exception as e:
         print(e)
         return False
 
 
+@Profiler.Timed('db')
+def IsEncrypted(user_id):
+    """
+    Checks if a user has encryption turned on.
+    :param user_id: The ID of the user.
+    :return: True if the amount and description of the user's transactions are encrypted.
+    """
+    row = FetchOne("SELECT key_salt FROM users WHERE id = ?", (user_id,))
+    return row is not None and row[0] is not None
+
+
+def UserKey(user_id):
+    """
+    Gets the data key used to encrypt a user's transactions.
+    :param user_id: The ID of the user.
+    :return: The data key, or None if the user doesn't have encryption turned on.
+    """
+    key = Encryption.sessionKeys.get(user_id)
+    if key is None and IsEncrypted(user_id):
+        raise ValueError(f'The data of user {user_id} is encrypted, sign in with their password to unlock it')
+    return key
+
+
+@Profiler.Timed('db')
+def UnlockUser(username, password):
+    """
+    Unwraps a user's data key with their password and keeps it for the session, so their encrypted transactions can
+    be read and written. Users without encryption don't need unlocking.
+    :param username: The username of the user.
+    :param password: The password of the user.
+    :return: True if the user's data can be used, otherwise False.
+    """
+    row = FetchOne("SELECT id, key_salt, password_key FROM users WHERE username = ?", (username,))
+    if row is None:
+        return False
+    user_id, salt, passwordKey = row
+    if salt is None:
+        return True
+    dataKey = Encryption.UnwrapKey(Encryption.DeriveKey(password, salt, hasher), passwordKey)
+    if dataKey is None:
+        return False
+    Encryption.sessionKeys[user_id] = dataKey
+    return True
+
+
+def LockUser(user_id):
+    """
+    Forgets a user's data key and decrypted transactions, eg - when they log out -
+    :param user_id: The ID of the user.
+    """
+    Encryption.sessionKeys.pop(user_id, None)
+    Encryption.decryptedTransactions.pop(user_id, None)
+
+
+@Profiler.Timed('db')
+def EnableEncryption(username, password, twoFactorA):
+    """
+    Turns on encryption for a user: makes their data key, saves it wrapped by their password and by their security
+    answer, and encrypts the amount and description of their live transactions, all in one transaction.
+    From then on the change and statement logs only get the encrypted values of their transactions. The logs are
+    append-only, so the values they saved before stay as they are, as do the archives, backups, exports and reports
+    made before.
+    :param username: The username of the user.
+    :param password: The password of the user.
+    :param twoFactorA: The answer to the user's security question.
+    :return: The number of transactions encrypted, or None if the password or answer was wrong.
+    """
+    row = FetchOne("SELECT id, factorA, key_salt FROM users WHERE username = ?", (username,))
+    if row is None or not CheckUser(username, password):
+        return None
+    user_id, hashedAnswer, salt = row
+    try:
+        hasher.verify(hashedAnswer, twoFactorA.lower().strip())
+    except argon2.exceptions.VerifyMismatchError:
+        return None
+    if salt is not None:
+        return 0 if UnlockUser(username, password) else None
+    salt = Encryption.NewSalt()
+    dataKey = Encryption.NewDataKey()
+    passwordKey = Encryption.WrapKey(Encryption.DeriveKey(password, salt, hasher), dataKey)
+    answerKey = Encryption.WrapKey(Encryption.DeriveKey(twoFactorA.lower().strip(), salt, hasher), dataKey)
+    with Transaction():
+        Execute("UPDATE users SET key_salt = ?, password_key = ?, answer_key = ? WHERE id = ?",
+                (salt, passwordKey, answerKey, user_id))
+        rows = Fetch("SELECT id, amount, description FROM transactions WHERE user_id = ? AND typeof(amount) != 'text'",
+                     (user_id,))
+        ids = [row[0] for row in rows]
+        amounts = Encryption.EncryptAmounts(dataKey, [row[1] for row in rows])
+        descriptions = Encryption.EncryptTexts(dataKey, [row[2] for row in rows])
+        # The fingerprints are remade keyed by the data key, as plain ones would give the values away
+        ExecuteMany("UPDATE transactions SET amount = ?, description = ?, fingerprint = NULL WHERE id = ?",
+                    list(zip(amounts, descriptions, ids)))
+        Execute("DELETE FROM spending_stats WHERE user_id = ?", (user_id,), log=False)
+        Execute("DELETE FROM spending_alerts WHERE user_id = ?", (user_id,), log=False)
+        Execute("DELETE FROM budget_spend WHERE user_id = ?", (user_id,), log=False)
+        Execute("DELETE FROM budget_alerts WHERE user_id = ?", (user_id,), log=False)
+    Encryption.sessionKeys[user_id] = dataKey
+    FillFingerprints(user_id)
+    return len(rows)
+
+
+@Profiler.Timed('db')
 def PullGoalsData(user_id):
     """
-    Retrieves goals data for a user.
+    Retrieves goals data for a user, with the total contributed to each goal.
     :param user_id: The ID of the user.
     :return: DataFrame containing the goal's data.
     """
-    conn = sqlite3.connect(databaseFilePath)
+    # The total of each goal is read from the (goal_id, amount) index alone, without reading the contributions
     query = '''
-        SELECT goal.name, goal.description, goal.date, goal.amount,goal.id
+        SELECT goal.name, goal.description, goal.date, goal.amount, goal.currency, goal.id,
+               (SELECT TOTAL(amount) FROM goal_contributions WHERE goal_id = goal.id) AS saved
         FROM users
         INNER JOIN goal ON users.id = goal.user_id
         WHERE users.id = ?
     '''
-    df = pd.read_sql_query(query, conn, params=(user_id,))
-    conn.close()
-    return df
+    return ReadFrame(query, (user_id,))
 
 
+@Profiler.Timed('db')
 def PullTransactionsData(user_id):
     """
     Retrieves transactions data for a user.
     :param user_id: The ID of the user.
     :return: DataFrame containing the transactions data.
     """
-    conn = sqlite3.connect(databaseFilePath)
     query = '''
-        SELECT transactions.amount, transactions.date, transactions.description, transactions.id
+        SELECT transactions.amount, transactions.date, transactions.description, transactions.currency, transactions.id
         FROM users
         INNER JOIN transactions ON users.id = transactions.user_id
         WHERE users.id = ?
     '''
-    df = pd.read_sql_query(query, conn, params=(user_id,))
-    conn.close()
-    return df
+    key = UserKey(user_id)
+    if key is None:
+        return ReadFrame(query, (user_id,))
+
+    # The decrypted transactions are kept for the session, so only the rows changed since they were read are read
+    # and decrypted again
+    seq = LatestChangeSeq()
+    cachedSeq, transactions = Encryption.decryptedTransactions.get(user_id, (None, None))
+    if cachedSeq == seq:
+        return transactions
+    if cachedSeq is None or cachedSeq > seq:  # The database has been restored since
+        transactions = Encryption.DecryptTransactions(key, ReadFrame(query, (user_id,)))
+    else:
+        changedIds = [row[0] for row in Fetch("SELECT DISTINCT row_id FROM change_log "
+                                              "WHERE user_id = ? AND seq > ? AND table_name = 'transactions'",
+                                              (user_id, cachedSeq))]
+        changed = ReadFrame(f"{query} AND transactions.id IN (SELECT value FROM json_each(?))",
+                            (user_id, json.dumps(changedIds)))
+        transactions = pd.concat([transactions[~transactions['id'].isin(changedIds)],
+                                  Encryption.DecryptTransactions(key, changed)], ignore_index=True)
+        transactions = transactions.sort_values(['date', 'id'], kind='stable', ignore_index=True)
+    Encryption.decryptedTransactions[user_id] = (seq, transactions)
+    return transactions
 
 
+def DecryptTransactions(user_id, transactions: pd.DataFrame):
+    """
+    Decrypts the encrypted rows of a frame of a user's transactions, eg - ones read from an archive -
+    :param user_id: The ID of the user.
+    :param transactions: Transactions with amount and description columns, as read from the database.
+    :return: The transactions with their amounts and descriptions decrypted.
+    """
+    key = UserKey(user_id)
+    return transactions if key is None else Encryption.DecryptTransactions(key, transactions)
+
+
+@Profiler.Timed('db')
+def PullArchivedTotals(user_id):
+    """
+    Retrieves the totals of a user's archived transactions.
+    :param user_id: The ID of the user.
+    :return: DataFrame with the date, currency, income, expenses and count of every archived date and currency.
+    """
+    query = '''
+        SELECT date, currency, income, expenses, count
+        FROM archived_totals
+        WHERE user_id = ?
+        ORDER BY date
+    '''
+    return ReadFrame(query, (user_id,))
+
+
+@Profiler.Timed('db')
+def PullMonthlyTotals(user_id):
+    """
+    Retrieves a user's income, expenses, net and count for every month and currency, from the rollup of the live
+    transactions and the totals of the archived ones.
+    :param user_id: The ID of the user.
+    :return: DataFrame with the month (YY/MM), currency, income, expenses, net and count columns, oldest first.
+    """
+    query = '''
+        SELECT month, currency, TOTAL(income) AS income, TOTAL(expenses) AS expenses, TOTAL(net) AS net,
+               SUM(count) AS count
+        FROM (
+            SELECT month, currency, income, expenses, net, count FROM monthly_rollup WHERE user_id = ?
+            UNION ALL
+            SELECT substr(date, 1, 5), currency, income, expenses, income + expenses, count
+            FROM archived_totals WHERE user_id = ?
+        )
+        GROUP BY month, currency
+        ORDER BY month
+    '''
+    return ReadFrame(query, (user_id, user_id))
+
+
+def WholeMonths(start: str, end: str):
+    """
+    Gets the months a date range covers from their first day to their last, which the monthly rollup has the totals of.
+    :param start: The first date (YY/MM/DD).
+    :param end: The last date (YY/MM/DD).
+    :return: Tuple of the first and last month (YY/MM), or None if the range doesn't cover a whole month.
+    """
+    (startYear, startMonth, startDay), (endYear, endMonth, endDay) = (map(int, date.split('/')) for date in (start, end))
+    if startDay > 1:
+        startYear, startMonth = startYear + startMonth // 12, startMonth % 12 + 1
+    if endDay < calendar.monthrange(2000 + endYear, endMonth)[1]:
+        endYear, endMonth = endYear - (endMonth == 1), (endMonth - 2) % 12 + 1
+    if (startYear, startMonth) > (endYear, endMonth):
+        return None
+    return f'{startYear:02d}/{startMonth:02d}', f'{endYear:02d}/{endMonth:02d}'
+
+
+@Profiler.Timed('db')
+def Aggregate(user_id, start: str = None, end: str = None, bucket: str = 'day'):
+    """
+    Totals a user's transactions in a date range by day, week, month or year, including the archived ones.
+    SQLite scans only the range, by the covering (user_id, date, currency, amount) index of the transactions and the
+    key of the archived totals, and groups it, so only one row per bucket and currency is read instead of the history.
+    Months and years read the months the range covers whole from the monthly rollup, so only the transactions of the
+    months at its ends are scanned.
+    Encrypted amounts can't be added up by SQLite, so they are left out, as they are from the monthly totals.
+    :param user_id: The ID of the user.
+    :param start: The first date (YY/MM/DD), None for the first the user has.
+    :param end: The last date (YY/MM/DD), None for the last the user has.
+    :param bucket: 'day', 'week', 'month' or 'year'.
+    :return: DataFrame with the bucket (the bucket's first date, YY/MM/DD), currency, income, expenses, net and count
+        columns, oldest first.
+    """
+    if bucket not in bucketExpressions:
+        raise ValueError(f'Unknown bucket: {bucket}')
+    start, end = start or firstDate, end or lastDate
+    months = WholeMonths(start, end) if bucket in ('month', 'year') else None
+    if months is None:
+        ranges = [('date BETWEEN ? AND ?', (start, end))]
+    else:
+        # No day is after the 31st, so the transactions after the last whole month are after its 31st
+        ranges = [('date >= ? AND date < ?', (start, f'{months[0]}/01')),
+                  ('date > ? AND date <= ?', (f'{months[1]}/31', end))]
+    parts = [f'''
+            SELECT date, currency, MAX(amount, 0) AS income, MIN(amount, 0) AS expenses, 1 AS count
+            FROM transactions
+            WHERE user_id = ? AND {condition} AND typeof(amount) != 'text'
+        ''' for condition, _ in ranges]
+    params = [param for _, rangeParams in ranges for param in (user_id, *rangeParams)]
+    if months is not None:
+        parts.append('''
+            SELECT month || '/01', currency, income, expenses, count
+            FROM monthly_rollup
+            WHERE user_id = ? AND month BETWEEN ? AND ?
+        ''')
+        params += [user_id, *months]
+    parts.append('''
+            SELECT date, currency, income, expenses, count
+            FROM archived_totals
+            WHERE user_id = ? AND date BETWEEN ? AND ?
+        ''')
+    params += [user_id, start, end]
+    query = f'''
+        SELECT {bucketExpressions[bucket]} AS bucket, currency, TOTAL(income) AS income, TOTAL(expenses) AS expenses,
+               TOTAL(income) + TOTAL(expenses) AS net, SUM(count) AS count
+        FROM ({'UNION ALL'.join(parts)})
+        GROUP BY bucket, currency
+        ORDER BY bucket, currency
+    '''
+    return ReadFrame(query, tuple(params))
+
+
+@Profiler.Timed('db')
+def OpeningBalances(user_id, date: str = None):
+    """
+    Totals a user's transactions before a date, for the balance at the start of a range. The months before the date's
+    month are read from the monthly rollup, so only the transactions of the date's own month are scanned.
+    Encrypted amounts are left out, as they are by Aggregate.
+    :param user_id: The ID of the user.
+    :param date: The date (YY/MM/DD), None for the start of the user's history.
+    :return: DataFrame with the currency and amount columns.
+    """
+    date = date or firstDate
+    query = '''
+        SELECT currency, TOTAL(amount) AS amount
+        FROM (
+            SELECT currency, net AS amount FROM monthly_rollup WHERE user_id = ? AND month < substr(?, 1, 5)
+            UNION ALL
+            SELECT currency, amount
+            FROM transactions
+            WHERE user_id = ? AND date >= substr(?, 1, 6) || '01' AND date < ? AND typeof(amount) != 'text'
+            UNION ALL
+            SELECT currency, income + expenses FROM archived_totals WHERE user_id = ? AND date < ?
+        )
+        GROUP BY currency
+    '''
+    return ReadFrame(query, (user_id, date, user_id, date, date, user_id, date))
+
+
+@Profiler.Timed('db')
 def PullBudgetsData(user_id):
     """
-    Retrieves budgets data for a user.
+    Retrieves budgets data for a user, with how much has been spent of each.
     :param user_id: The ID of the user.
-    :return: DataFrame containing the budget's data.
+    :return: DataFrame containing the budget's data, spent is NULL for users with encryption on.
     """
-    conn = sqlite3.connect(databaseFilePath)
     query = '''
-        SELECT budgets.name, budgets.amount, budgets.end_date, budgets.id
+        SELECT budgets.name, budgets.amount, budgets.end_date, budgets.currency, budgets.id, budget_spend.spent
         FROM users
         INNER JOIN budgets ON users.id = budgets.user_id
+        LEFT JOIN budget_spend ON budget_spend.budget_id = budgets.id
         WHERE users.id = ?
     '''
-    df = pd.read_sql_query(query, conn, params=(user_id,))
-    conn.close()
-    return df
+    return ReadFrame(query, (user_id,))
 
 
+@Profiler.Timed('db')
 def PullInvestmentsData(user_id):
     """
     Retrieves investments data for a user.
     :param user_id: The ID of the user.
     :return: DataFrame containing the investments data.
     """
-    conn = sqlite3.connect(databaseFilePath)
     query = '''
         SELECT investments.name, investments.date, investments.id
         FROM users
         INNER JOIN investments ON users.id = investments.user_id
         WHERE users.id = ?
     '''
-    df = pd.read_sql_query(query, conn, params=(user_id,))
-    conn.close()
-    return df
+    return ReadFrame(query, (user_id,))
 
 
+@Profiler.Timed('db')
 def PullUsersData(username):
     """
     Retrieves data for a specific user.
@@ -245,10 +1393,11 @@ def PullUsersData(username):
     query = '''
         SELECT * FROM users WHERE username = ?
     '''
-    data = ExecuteSQLScripts(True, query, value=(username,))
+    data = Fetch(query, (username,))
     return data
 
 
+@Profiler.Timed('db')
 def AddUser(username, name, password, factorQ, factorA):
     """
     Adds a new user to the database.
@@ -262,40 +1411,168 @@ def AddUser(username, name, password, factorQ, factorA):
     INSERT INTO users (username, name, password, factorQ, factorA)
     VALUES (?, ?, ?, ?, ?)
     '''
-    ExecuteSQLScripts(False, query,
-                      value=(username, name, hasher.hash(password), factorQ, hasher.hash(factorA.lower().strip())))
+    Execute(query, (username, name, hasher.hash(password), factorQ, hasher.hash(factorA.lower().strip())))
 
 
-def AddTransaction(user_id, amount, date, description):
+@Profiler.Timed('db')
+def AddTransaction(user_id, amount, date, description, currency=defaultCurrency):
     """
     Adds a new transaction for a user.
     :param user_id: The ID of the user.
-    :param amount: The amount of the transaction.
+    :param amount: The amount of the transaction, a number or a string of one, as the main page passes it eg - '-12.50'
     :param date: The date of the transaction.
     :param description: The description of the transaction.
+    :param currency: The currency code of the amount eg - 'USD' -
     """
+    amount = float(amount)  # Saved, fingerprinted and added to the statistics as a number, whatever it was typed as
+    # Transactions added one at a time are never duplicates, so they get the next free occurrence of their fingerprint,
+    # after the archived ones too so it doesn't match an archived transaction
     query = '''
-    INSERT INTO transactions (user_id, amount, date, description)
-    VALUES (?, ?, ?, ?)
+    INSERT INTO transactions (user_id, amount, date, description, currency, fingerprint, occurrence)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, (SELECT COALESCE(MAX(occurrence) + 1, 0) FROM (
+        SELECT occurrence FROM transactions WHERE fingerprint = ?6
+        UNION ALL SELECT occurrence FROM archived_fingerprints WHERE fingerprint = ?6
+    )))
     '''
-    ExecuteSQLScripts(False, query, value=(user_id, amount, date, description))
+    key = UserKey(user_id)
+    fingerprint = Deduplication.Fingerprints(user_id, [amount], [date], [description], [currency], key)[0]
+    if key is not None:
+        amount = Encryption.EncryptAmounts(key, [amount])[0]
+        description = Encryption.EncryptTexts(key, [description])[0]
+    with Transaction():
+        Execute(query, (user_id, amount, date, description, currency, fingerprint))
+        if key is None:
+            # The statement log is written after the insert, so last_insert_rowid() is its row's instead
+            transactionId = FetchOne('SELECT MAX(id) FROM transactions')[0]
+            UpdateSpendingStats(user_id, [(transactionId, amount, description, currency)])
+            UpdateBudgetSpend([(transactionId, user_id, amount, date, description, currency)])
 
 
-def AddBudget(user_id, name, amount, end_date):
+@Profiler.Timed('db')
+def AddTransactions(user_id, rows: list, currency=defaultCurrency):
+    """
+    Adds many transactions for a user in one transaction, eg - the lines of a bank statement - skipping the ones that
+    have already been saved, so importing a statement that overlaps an earlier one doesn't duplicate its transactions.
+    :param user_id: The ID of the user.
+    :param rows: List of (amount, date, description) or (amount, date, description, currency) tuples.
+    :param currency: The currency code of the rows that don't have one.
+    :return: The number of transactions added.
+    """
+    # Rows already saved are ignored by the unique fingerprint index, and archived ones by archived_fingerprints
+    query = '''
+    INSERT OR IGNORE INTO transactions (user_id, amount, date, description, currency, fingerprint, occurrence)
+    SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7
+    WHERE NOT EXISTS (SELECT 1 FROM archived_fingerprints WHERE fingerprint = ?6 AND occurrence = ?7)
+    '''
+    amounts, dates, descriptions, currencies = TransactionColumns(rows, currency)
+    key = UserKey(user_id)
+    FillFingerprints(user_id)
+    fingerprints = Deduplication.Fingerprints(user_id, amounts, dates, descriptions, currencies, key)
+    if key is not None:
+        amounts = Encryption.EncryptAmounts(key, amounts)
+        descriptions = Encryption.EncryptTexts(key, descriptions)
+    with Transaction():
+        lastId = FetchOne('SELECT COALESCE(MAX(id), 0) FROM transactions')[0]
+        added = ExecuteMany(query, list(zip([user_id] * len(rows), amounts, dates, descriptions, currencies,
+                                            fingerprints, Deduplication.Occurrences(fingerprints))))
+        if key is None and added:
+            # The rows not ignored as duplicates, in the order they were added
+            addedRows = Fetch("SELECT id, user_id, amount, date, description, currency FROM transactions "
+                              "WHERE id > ? AND user_id = ? ORDER BY id", (lastId, user_id))
+            UpdateSpendingStats(user_id, [(row[0], row[2], row[4], row[5]) for row in addedRows])
+            UpdateBudgetSpend(addedRows)
+    return added
+
+
+def TransactionColumns(rows: list, currency=defaultCurrency):
+    """
+    Splits transaction rows into their columns.
+    :param rows: List of (amount, date, description) or (amount, date, description, currency) tuples, the amounts
+        can be numbers or strings of them.
+    :param currency: The currency code of the rows that don't have one.
+    :return: Tuple of the lists of amounts (as floats), dates, descriptions and currencies.
+    """
+    return ([float(row[0]) for row in rows], [row[1] for row in rows], [row[2] for row in rows],
+            [row[3] if len(row) > 3 else currency for row in rows])
+
+
+@Profiler.Timed('db')
+def FillFingerprints(user_id):
+    """
+    Fingerprints a user's transactions that were saved before fingerprints were added, numbering the occurrences of
+    each fingerprint in the order the transactions were saved.
+    :param user_id: The ID of the user.
+    :return: The number of transactions fingerprinted.
+    """
+    ids = [row[0] for row in Fetch("SELECT id FROM transactions WHERE user_id = ? AND fingerprint IS NULL",
+                                   (user_id,))]
+    if not ids:
+        return 0
+    transactions = PullTransactionsData(user_id)
+    transactions = transactions[transactions['id'].isin(ids)].sort_values('id', kind='stable')
+    fingerprints = Deduplication.Fingerprints(user_id, transactions['amount'], transactions['date'],
+                                              transactions['description'], transactions['currency'], UserKey(user_id))
+    # Numbered after any occurrences already saved, in case a row with the same fingerprint was added since
+    with Transaction():
+        savedOccurrences = dict(Fetch("SELECT fingerprint, MAX(occurrence) + 1 FROM transactions "
+                                      "WHERE fingerprint IN (SELECT value FROM json_each(?)) GROUP BY fingerprint",
+                                      (json.dumps(fingerprints),)))
+        occurrences = [savedOccurrences.get(fingerprint, 0) + occurrence for fingerprint, occurrence in
+                       zip(fingerprints, Deduplication.Occurrences(fingerprints))]
+        return ExecuteMany("UPDATE transactions SET fingerprint = ?, occurrence = ? WHERE id = ?",
+                           list(zip(fingerprints, occurrences, transactions['id'].tolist())), log=False)
+
+
+@Profiler.Timed('db')
+def FindDuplicates(user_id, rows: list, currency=defaultCurrency, windowDays: int = Deduplication.nearDuplicateDays):
+    """
+    Finds which of a list of transactions have already been saved for a user, including the archived ones, or nearly
+    have. Near duplicates are only looked for in the live transactions.
+    :param user_id: The ID of the user.
+    :param rows: List of (amount, date, description) or (amount, date, description, currency) tuples.
+    :param currency: The currency code of the rows that don't have one.
+    :param windowDays: How many days apart near duplicates can be.
+    :return: Tuple of arrays, True for each row that is an exact duplicate and for each one that is a near duplicate
+        (the same amount and description within windowDays days of a saved transaction) but not an exact one.
+    """
+    amounts, dates, descriptions, currencies = TransactionColumns(rows, currency)
+    FillFingerprints(user_id)
+    fingerprints = Deduplication.Fingerprints(user_id, amounts, dates, descriptions, currencies, UserKey(user_id))
+    saved = set(Fetch("SELECT fingerprint, occurrence FROM transactions "
+                      "WHERE fingerprint IN (SELECT value FROM json_each(?1)) "
+                      "UNION SELECT fingerprint, occurrence FROM archived_fingerprints "
+                      "WHERE fingerprint IN (SELECT value FROM json_each(?1))", (json.dumps(fingerprints),)))
+    isExact = np.array([pair in saved for pair in zip(fingerprints, Deduplication.Occurrences(fingerprints))],
+                       dtype=bool)
+    transactions = PullTransactionsData(user_id)
+    new = pd.DataFrame({'amount': amounts, 'date': pd.to_datetime(dates, format='%y/%m/%d'),
+                        'description': descriptions})
+    savedRows = transactions.assign(date=pd.to_datetime(transactions['date'], format='%y/%m/%d'))
+    isNear = Deduplication.FindNearDuplicates(savedRows, new, windowDays) & ~isExact
+    return isExact, isNear
+
+
+@Profiler.Timed('db')
+def AddBudget(user_id, name, amount, end_date, currency=defaultCurrency):
     """
     Adds a new budget for a user.
     :param user_id: The ID of the user.
     :param name: The name of the budget.
     :param amount: The amount of the budget.
     :param end_date: The end date of the budget.
+    :param currency: The currency code of the amount.
     """
     query = '''
-    INSERT INTO budgets (user_id, name, amount, end_date)
-    VALUES (?, ?, ?, ?)
+    INSERT INTO budgets (user_id, name, amount, end_date, currency)
+    VALUES (?, ?, ?, ?, ?)
     '''
-    ExecuteSQLScripts(False, query, value=(user_id, name, amount, end_date))
+    with Transaction():
+        Execute(query, (user_id, name, amount, end_date, currency))
+        # Its spending so far is added up once, then kept up to date as transactions change
+        RebuildBudgetSpend([FetchOne('SELECT MAX(id) FROM budgets')[0]])
 
 
+@Profiler.Timed('db')
 def AddInvestment(user_id, name, date):
     """
     Adds a new investment for a user.
@@ -307,10 +1584,11 @@ def AddInvestment(user_id, name, date):
     INSERT INTO investments (user_id, name, date)
     VALUES (?, ?, ?)
     '''
-    ExecuteSQLScripts(False, query, value=(user_id, name, date))
+    Execute(query, (user_id, name, date))
 
 
-def AddGoal(user_id, name, description, date, amount):
+@Profiler.Timed('db')
+def AddGoal(user_id, name, description, date, amount, currency=defaultCurrency):
     """
     Adds a new goal for a user.
     :param user_id: The ID of the user.
@@ -318,33 +1596,190 @@ def AddGoal(user_id, name, description, date, amount):
     :param description: The description of the goal.
     :param date: The date of the goal.
     :param amount: The amount of the goal.
+    :param currency: The currency code of the amount.
     """
     query = '''
-    INSERT INTO goal (user_id, name, description, date, amount)
-    VALUES (?, ?, ?, ?, ?)
+    INSERT INTO goal (user_id, name, description, date, amount, currency)
+    VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    Execute(query, (user_id, name, description, date, amount, currency))
+
+
+@Profiler.Timed('db')
+def AddGoalContribution(user_id, goal_id, amount, date):
+    """
+    Adds an amount put towards (or taken from, if negative) a goal, in the goal's currency.
+    :param user_id: The ID of the user.
+    :param goal_id: The ID of the goal.
+    :param amount: The amount contributed.
+    :param date: The date of the contribution (YY/MM/DD).
+    """
+    Execute("INSERT INTO goal_contributions (goal_id, user_id, amount, date) VALUES (?, ?, ?, ?)",
+            (goal_id, user_id, amount, date))
+
+
+@Profiler.Timed('db')
+def PullGoalProgress(user_id):
+    """
+    Retrieves the total contributed to each of a user's goals, without reading the goals' other columns.
+    :param user_id: The ID of the user.
+    :return: DataFrame with the id and saved columns.
+    """
+    query = '''
+        SELECT goal.id, (SELECT TOTAL(amount) FROM goal_contributions WHERE goal_id = goal.id) AS saved
+        FROM goal
+        WHERE goal.user_id = ?
+    '''
+    return ReadFrame(query, (user_id,))
+
+
+@Profiler.Timed('db')
+def AddFxRates(rows: list):
+    """
+    Adds or replaces exchange rates.
+    :param rows: List of (currency, date, rate) tuples, where rate is the value of one unit of the currency in the
+        default currency on that date (YY/MM/DD).
+    :return: The number of rates saved.
+    """
+    query = '''
+    INSERT OR REPLACE INTO fx_rates (currency, date, rate)
+    VALUES (?, ?, ?)
     '''
-    ExecuteSQLScripts(False, query, value=(user_id, name, description, date, amount))
+    return ExecuteMany(query, rows)
 
 
+@Profiler.Timed('db')
+def PullFxRates():
+    """
+    Retrieves every exchange rate.
+    :return: DataFrame with the currency, date and rate columns, ordered by currency then date.
+    """
+    return ReadFrame("SELECT currency, date, rate FROM fx_rates ORDER BY currency, date")
+
+
+@Profiler.Timed('db')
+def PullCurrencies():
+    """
+    Retrieves the currencies amounts can be converted between.
+    :return: List of currency codes, the default currency first.
+    """
+    return [defaultCurrency] + [row[0] for row in Fetch("SELECT DISTINCT currency FROM fx_rates ORDER BY currency")
+                                if row[0] != defaultCurrency]
+
+
+@Profiler.Timed('db')
 def DeleteGoal(goal_id: int):
     """
     Deletes a goal from the database.
     :param goal_id: The ID of the goal to be deleted.
     """
     try:
-        ExecuteSQLScripts(False, "DELETE FROM goal WHERE id = ?", values=(goal_id,))
+        DeleteGoals([goal_id])
     except sqlite3.Error as e:
         print(f"Error deleting goal: {e}")
 
 
+@Profiler.Timed('db')
 def DeleteTransaction(transactionID: int):
     """
     Deletes a transaction from the database.
     :param transactionID: The ID of the transaction to be deleted.
     """
     try:
-        ExecuteSQLScripts(False, "DELETE FROM transactions WHERE id = ?", values=(transactionID,))
+        DeleteTransactions([transactionID])
     except sqlite3.Error as e:
         print(f"Error deleting transaction: {e}")
     except Exception as e:
         print(e)
+
+
+@Profiler.Timed('db')
+def DeleteTransactions(transactionIDs: list):
+    """
+    Deletes many transactions from the database in one transaction.
+    :param transactionIDs: The IDs of the transactions to be deleted.
+    :return: The number of transactions deleted.
+    """
+    with Transaction():
+        removed = PullTransactionRows(transactionIDs)
+        deleted = ExecuteMany("DELETE FROM transactions WHERE id = ?", [(i,) for i in transactionIDs])
+        UpdateBudgetSpend([], removed)
+    return deleted
+
+
+def PullTransactionRows(transactionIDs: list):
+    """
+    Retrieves the rows of transactions the budgets' spending is updated from.
+    :param transactionIDs: The IDs of the transactions.
+    :return: List of (id, user_id, amount, date, description, currency) tuples, in the order of their IDs.
+    """
+    return Fetch("SELECT id, user_id, amount, date, description, currency FROM transactions "
+                 "WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id", (json.dumps(list(transactionIDs)),))
+
+
+@Profiler.Timed('db')
+def DeleteGoals(goalIDs: list):
+    """
+    Deletes many goals and their contributions from the database in one transaction.
+    :param goalIDs: The IDs of the goals to be deleted.
+    :return: The number of goals deleted.
+    """
+    with Transaction():
+        ExecuteMany("DELETE FROM goal_contributions WHERE goal_id = ?", [(i,) for i in goalIDs])
+        return ExecuteMany("DELETE FROM goal WHERE id = ?", [(i,) for i in goalIDs])
+
+
+@Profiler.Timed('db')
+def UpdateTransactionsDescription(transactionIDs: list, description: str):
+    """
+    Recategorises many transactions by giving them the same description, in one transaction.
+    :param transactionIDs: The IDs of the transactions to change.
+    :param description: The new description of the transactions.
+    :return: The number of transactions changed.
+    """
+    # The description of each transaction of an encrypted user is encrypted with its own nonce
+    owners = dict(Fetch("SELECT id, user_id FROM transactions WHERE id IN (SELECT value FROM json_each(?))",
+                        (json.dumps(list(transactionIDs)),)))
+    keys = {user_id: UserKey(user_id) for user_id in set(owners.values())}
+    paramsList = [(description if keys.get(owners.get(i)) is None
+                   else Encryption.EncryptTexts(keys[owners[i]], [description])[0], i) for i in transactionIDs]
+    with Transaction():
+        removed = PullTransactionRows(transactionIDs)
+        changed = ExecuteMany("UPDATE transactions SET description = ? WHERE id = ?", paramsList)
+        UpdateBudgetSpend(PullTransactionRows(transactionIDs), removed)
+    return changed
+
+
+@Profiler.Timed('db')
+def ShiftTransactionDates(transactionIDs: list, days: int):
+    """
+    Moves the date of many transactions by a number of days, in one transaction.
+    :param transactionIDs: The IDs of the transactions to change.
+    :param days: How many days to move the dates by, negative moves them earlier.
+    :return: The number of transactions changed.
+    """
+    # The dates are saved as YY/MM/DD so they are turned into YYYY-MM-DD for SQLite's date functions and back again
+    query = """
+    UPDATE transactions SET date = substr(strftime('%Y/%m/%d', '20' || replace(date, '/', '-'), ?), 3)
+    WHERE id = ?
+    """
+    with Transaction():
+        removed = PullTransactionRows(transactionIDs)
+        changed = ExecuteMany(query, [(f'{days:+d} days', i) for i in transactionIDs])
+        UpdateBudgetSpend(PullTransactionRows(transactionIDs), removed)
+    return changed
+
+
+@Profiler.Timed('db')
+def ShiftGoalDates(goalIDs: list, days: int):
+    """
+    Moves the date of many goals by a number of days, in one transaction.
+    :param goalIDs: The IDs of the goals to change.
+    :param days: How many days to move the dates by, negative moves them earlier.
+    :return: The number of goals changed.
+    """
+    query = """
+    UPDATE goal SET date = substr(strftime('%Y/%m/%d', '20' || replace(date, '/', '-'), ?), 3)
+    WHERE id = ?
+    """
+    return ExecuteMany(query, [(f'{days:+d} days', i) for i in goalIDs])
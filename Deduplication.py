@@ -0,0 +1,97 @@
+"""
+FILE NAME - Deduplication.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Finds transactions that have already been saved, so importing a bank statement that overlaps one
+    imported before doesn't add its transactions twice.
+    Exact duplicates are found by a fingerprint, a 64 bit hash of the user, date, amount in cents, currency and
+    normalised description. A statement can have the same transaction more than once (two coffees on one day), so each
+    row also has an occurrence, its count among the rows of its import with the same fingerprint, and the database has
+    a unique index on (fingerprint, occurrence). The fingerprints of encrypted users are keyed by their data key, so
+    they don't give away the amounts or descriptions.
+    Near duplicates are rows with the same amount and description, ignoring numbers such as references, within a few
+    days of a saved row, eg - the same payment with a later posting date - They are found by sorting the saved rows by
+    a (group, day) key and binary searching each new row's window, which takes O(n log n) time instead of comparing
+    every pair.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import hashlib
+import numpy as np
+import pandas as pd
+
+nearDuplicateDays = 3  # How many days apart near duplicates can be
+
+
+def NormaliseDescriptions(descriptions, keepNumbers: bool = True):
+    """
+    Normalises descriptions so the same description written differently matches, eg - 'COFFEE  Club!' and 'coffee club'
+    :param descriptions: List or Series of descriptions, None is treated as empty.
+    :param keepNumbers: Whether numbers are kept, near duplicates leave them out as they are often references.
+    :return: Series of the normalised descriptions.
+    """
+    normalised = pd.Series(descriptions, dtype=object).fillna('').astype(str).str.lower()
+    normalised = normalised.str.replace(r'[^a-z0-9]+' if keepNumbers else r'[^a-z]+', ' ', regex=True)
+    return normalised.str.strip()
+
+
+def Cents(amounts):
+    """
+    Turns amounts into whole cents, so amounts that differ by floating point error are equal.
+    :param amounts: List or array of amounts.
+    :return: Array of cents.
+    """
+    return np.round(np.asarray(amounts, dtype=float) * 100).astype(np.int64)
+
+
+def Fingerprints(user_id: int, amounts, dates, descriptions, currencies, key: bytes = None):
+    """
+    Fingerprints transactions.
+    :param user_id: The ID of the user.
+    :param amounts: List of the amounts.
+    :param dates: List of the dates (YY/MM/DD).
+    :param descriptions: List of the descriptions.
+    :param currencies: List of the currency codes.
+    :param key: The user's data key if they have encryption on, the fingerprints are then keyed by it.
+    :return: List of the fingerprints as signed 64 bit integers, so SQLite saves them as integers.
+    """
+    hashKey = key or b''
+    return [int.from_bytes(hashlib.blake2b(f'{user_id}|{date}|{cents}|{currency}|{description}'.encode(),
+                                           digest_size=8, key=hashKey).digest(), 'big', signed=True)
+            for date, cents, currency, description in zip(dates, Cents(amounts).tolist(), currencies,
+                                                          NormaliseDescriptions(descriptions).tolist())]
+
+
+def Occurrences(fingerprints: list):
+    """
+    Numbers the rows of an import that have the same fingerprint, 0 for the first, 1 for the second and so on.
+    :param fingerprints: List of fingerprints.
+    :return: List of occurrences.
+    """
+    fingerprints = pd.Series(fingerprints, dtype=np.int64)
+    return fingerprints.groupby(fingerprints, sort=False).cumcount().tolist()
+
+
+def FindNearDuplicates(saved: pd.DataFrame, new: pd.DataFrame, windowDays: int = nearDuplicateDays):
+    """
+    Finds the new rows that have a saved row with the same amount and description (ignoring numbers) within
+    windowDays days of them.
+    :param saved: The saved transactions, with amount, date (datetime) and description columns.
+    :param new: The new transactions, with the same columns.
+    :return: Array of True for each new row that is a near duplicate.
+    """
+    if saved.empty or new.empty:
+        return np.zeros(len(new), dtype=bool)
+    both = pd.DataFrame({'cents': Cents(pd.concat([saved['amount'], new['amount']], ignore_index=True)),
+                         'description': NormaliseDescriptions(pd.concat([saved['description'], new['description']],
+                                                                        ignore_index=True), keepNumbers=False)})
+    groups = both.groupby(['cents', 'description'], sort=False).ngroup().to_numpy(dtype=np.int64)
+    days = pd.concat([saved['date'], new['date']], ignore_index=True).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    days -= days.min()
+    # Each group gets its own range of keys wide enough that windows never reach into the next group
+    keys = groups * (days.max() + 2 * windowDays + 1) + days
+    savedKeys = np.sort(keys[:len(saved)])
+    newKeys = keys[len(saved):]
+    first = np.searchsorted(savedKeys, newKeys - windowDays, side='left')
+    last = np.searchsorted(savedKeys, newKeys + windowDays, side='right')
+    return last > first
@@ -0,0 +1,211 @@
+"""
+FILE NAME - Encryption.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Encrypts the amount and description of transactions for users that have turned encryption on, so they
+    aren't kept in the database file as plain text. Each user has a random data key, which is saved wrapped (encrypted)
+    by a key derived from their password and again by a key derived from their security answer, so resetting a
+    forgotten password doesn't lose the data. Keys are derived with argon2 using the same parameters as the password
+    hashes.
+    Values are encrypted with AES in counter mode, each with its own random nonce, and saved as text - 'enc:' followed
+    by the hex of the nonce and cipher text - so SQLite never mistakes them for numbers and they can be copied into
+    the JSON of the change log. The key stream of every value being loaded is made with one AES call and XORed with
+    numpy, so decrypting a whole table costs about the same as decrypting one value many times over.
+    DatabaseHandler keeps each unlocked user's decrypted transactions for the session with the change log sequence
+    number they were read at, so reloading them only reads and decrypts the rows that have changed since.
+    Counter mode hides the values but doesn't detect tampering, the wrapped data keys are authenticated with AES-GCM.
+    Needs the cryptography package, which is only imported by the users that have encryption turned on.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import numpy as np
+import pandas as pd
+from argon2.low_level import hash_secret_raw
+
+keyLength = 32  # AES-256
+saltLength = 16
+nonceLength = 12  # The rest of each 16 byte counter block is the block number
+encryptedPrefix = 'enc:'
+
+sessionKeys = {}  # User ID to the data key of the users unlocked this session
+decryptedTransactions = {}  # User ID to the change log sequence number and their decrypted transactions at it
+
+
+def NewSalt():
+    """
+    Makes a random salt for deriving a user's keys.
+    :return: The salt as hex.
+    """
+    return os.urandom(saltLength).hex()
+
+
+def NewDataKey():
+    """
+    Makes a random data key.
+    :return: The key.
+    """
+    return os.urandom(keyLength)
+
+
+def DeriveKey(secret: str, salt: str, hasher):
+    """
+    Derives a key from a password or security answer with argon2.
+    :param secret: The password or answer.
+    :param salt: The user's salt as hex.
+    :param hasher: The PasswordHasher whose time, memory and parallelism parameters are used.
+    :return: The derived key.
+    """
+    return hash_secret_raw(secret.encode(), bytes.fromhex(salt), time_cost=hasher.time_cost,
+                           memory_cost=hasher.memory_cost, parallelism=hasher.parallelism, hash_len=keyLength,
+                           type=hasher.type)
+
+
+def WrapKey(wrappingKey: bytes, dataKey: bytes):
+    """
+    Encrypts a data key with a key derived from a password or answer.
+    :param wrappingKey: The derived key.
+    :param dataKey: The data key.
+    :return: The wrapped key as hex.
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    nonce = os.urandom(nonceLength)
+    return (nonce + AESGCM(wrappingKey).encrypt(nonce, dataKey, None)).hex()
+
+
+def UnwrapKey(wrappingKey: bytes, wrappedKey: str):
+    """
+    Decrypts a wrapped data key.
+    :param wrappingKey: The key derived from the password or answer it was wrapped with.
+    :param wrappedKey: The wrapped key as hex.
+    :return: The data key, or None if the password or answer was wrong.
+    """
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    wrapped = bytes.fromhex(wrappedKey)
+    try:
+        return AESGCM(wrappingKey).decrypt(wrapped[:nonceLength], wrapped[nonceLength:], None)
+    except InvalidTag:
+        return None
+
+
+def KeyStream(key: bytes, nonces: np.ndarray, lengths: np.ndarray):
+    """
+    Makes the counter mode key stream of many values with one AES call.
+    :param key: The data key.
+    :param nonces: Array of the nonce of each value, one row of nonceLength bytes per value.
+    :param lengths: Array of the length of each value in bytes.
+    :return: Array of the key stream bytes of every value, one after the other.
+    """
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    blockCounts = (lengths + 15) // 16
+    blockStarts = np.cumsum(blockCounts) - blockCounts
+    # Every counter block is the value's nonce followed by the block's number in the value, big endian
+    counterBlocks = np.empty((int(blockCounts.sum()), 16), dtype=np.uint8)
+    counterBlocks[:, :nonceLength] = np.repeat(nonces, blockCounts, axis=0)
+    blockNumbers = np.arange(len(counterBlocks), dtype='>u4') - np.repeat(blockStarts, blockCounts).astype('>u4')
+    counterBlocks[:, nonceLength:] = blockNumbers.view(np.uint8).reshape(-1, 4)
+    encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+    blockStream = np.frombuffer(encryptor.update(counterBlocks.tobytes()), dtype=np.uint8)
+    # Only the first length bytes of each value's blocks are used
+    byteStarts = np.cumsum(lengths) - lengths
+    return blockStream[np.repeat(blockStarts * 16 - byteStarts, lengths) + np.arange(int(lengths.sum()))]
+
+
+def EncryptBytes(key: bytes, data: bytes, lengths: np.ndarray):
+    """
+    Encrypts many values, each with a new random nonce.
+    :param key: The data key.
+    :param data: The bytes of every value, one after the other.
+    :param lengths: Array of the length of each value in bytes.
+    :return: List of the encrypted values as text.
+    """
+    nonces = os.urandom(nonceLength * len(lengths))
+    cipherText = (np.frombuffer(data, dtype=np.uint8) ^
+                  KeyStream(key, np.frombuffer(nonces, dtype=np.uint8).reshape(-1, nonceLength), lengths)).tobytes()
+    ends = np.cumsum(lengths).tolist()
+    nonceEnds = range(nonceLength, len(nonces) + 1, nonceLength)
+    return [f'{encryptedPrefix}{nonces[nonceEnd - nonceLength:nonceEnd].hex()}{cipherText[end - length:end].hex()}'
+            for nonceEnd, length, end in zip(nonceEnds, lengths.tolist(), ends)]
+
+
+def DecryptBytes(key: bytes, values: list):
+    """
+    Decrypts many values.
+    :param key: The data key.
+    :param values: List of the encrypted values as text.
+    :return: Tuple of the bytes of every decrypted value, one after the other, and an array of their lengths.
+    """
+    # The hex of every value is joined and turned into bytes at once, then split into nonces and cipher texts
+    prefixLength = len(encryptedPrefix)
+    raw = np.frombuffer(bytes.fromhex(''.join([value[prefixLength:] for value in values])), dtype=np.uint8)
+    totalLengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    totalLengths = (totalLengths - prefixLength) // 2
+    lengths = totalLengths - nonceLength
+    starts = np.cumsum(totalLengths) - totalLengths
+    nonces = raw[starts[:, None] + np.arange(nonceLength)]
+    cipherStarts = np.repeat(starts + nonceLength - (np.cumsum(lengths) - lengths), lengths)
+    cipherText = raw[cipherStarts + np.arange(int(lengths.sum()))]
+    return (cipherText ^ KeyStream(key, nonces, lengths)).tobytes(), lengths
+
+
+def EncryptAmounts(key: bytes, amounts):
+    """
+    Encrypts amounts.
+    :param key: The data key.
+    :param amounts: List or array of amounts.
+    :return: List of the encrypted amounts as text.
+    """
+    data = np.asarray(amounts, dtype='<f8')
+    return EncryptBytes(key, data.tobytes(), np.full(len(data), 8, dtype=np.int64))
+
+
+def DecryptAmounts(key: bytes, values: list):
+    """
+    Decrypts amounts.
+    :param key: The data key.
+    :param values: List of the encrypted amounts as text.
+    :return: Array of the amounts.
+    """
+    data, _ = DecryptBytes(key, values)
+    return np.frombuffer(data, dtype='<f8')
+
+
+def EncryptTexts(key: bytes, texts: list):
+    """
+    Encrypts texts, None is encrypted as an empty text.
+    :param key: The data key.
+    :param texts: List of texts.
+    :return: List of the encrypted texts as text.
+    """
+    encoded = [(text or '').encode() for text in texts]
+    return EncryptBytes(key, b''.join(encoded), np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+
+
+def DecryptTexts(key: bytes, values: list):
+    """
+    Decrypts texts.
+    :param key: The data key.
+    :param values: List of the encrypted texts as text.
+    :return: List of the texts.
+    """
+    data, lengths = DecryptBytes(key, values)
+    ends = np.cumsum(lengths).tolist()
+    return [data[end - length:end].decode() for length, end in zip(lengths.tolist(), ends)]
+
+
+def DecryptTransactions(key: bytes, transactions: pd.DataFrame):
+    """
+    Decrypts the amount and description of the encrypted rows of a frame of transactions.
+    :param key: The data key.
+    :param transactions: Transactions with amount and description columns, as read from the database.
+    :return: The transactions with every amount as a float and every description as plain text.
+    """
+    if pd.api.types.is_numeric_dtype(transactions['amount']):
+        return transactions  # No row is encrypted, SQLite only gives back text for the encrypted amounts
+    amounts = transactions['amount'].to_numpy(dtype=object, copy=True)
+    descriptions = transactions['description'].to_numpy(dtype=object, copy=True)
+    rows = np.flatnonzero([isinstance(amount, str) for amount in amounts])
+    amounts[rows] = DecryptAmounts(key, amounts[rows].tolist())
+    descriptions[rows] = DecryptTexts(key, descriptions[rows].tolist())
+    return transactions.assign(amount=amounts.astype(float), description=descriptions)
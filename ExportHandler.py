@@ -0,0 +1,93 @@
+"""
+FILE NAME - ExportHandler.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Exports a snapshot of a user's full history (transactions, goals and budgets) to compressed columnar
+    files, either Parquet or Arrow IPC, and loads them back. Arrow IPC snapshots are memory mapped when read so a
+    large history can be reloaded without copying it. Both formats need pyarrow to be installed.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+from datetime import datetime
+import pandas as pd
+import DatabaseHandler
+import ArchiveHandler
+
+exportFolderPath = 'exports'
+# The tables that are written into every snapshot and the function used to pull each of them
+exportTables = {
+    'transactions': ArchiveHandler.PullTransactionsRange,  # Includes the archived years
+    'goals': DatabaseHandler.PullGoalsData,
+    'budgets': DatabaseHandler.PullBudgetsData,
+}
+# File extension and default compression of each format.
+# Arrow IPC is left uncompressed by default because only uncompressed buffers can be memory mapped without a copy
+fileFormats = {
+    'parquet': ('.parquet', 'zstd'),
+    'arrow': ('.arrow', 'uncompressed'),
+}
+
+
+def ExportUserData(user_id: int, fileFormat: str = 'parquet', folder: str = exportFolderPath,
+                   compression: str = None):
+    """
+    Writes a snapshot of a user's transactions, goals and budgets to columnar files.
+    Each snapshot gets its own timestamped folder so older snapshots are kept as backups.
+    :param user_id: The ID of the user.
+    :param fileFormat: Either 'parquet' or 'arrow' (Arrow IPC).
+    :param folder: The folder the snapshots are saved in.
+    :param compression: The compression codec to use, if None the default of the format is used.
+    :return: The path of the snapshot folder.
+    """
+    if fileFormat not in fileFormats:
+        raise ValueError(f'Unknown export format: {fileFormat}')
+    extension, defaultCompression = fileFormats[fileFormat]
+    if compression is None:
+        compression = defaultCompression
+
+    snapshotFolder = os.path.join(folder, f'user_{user_id}', datetime.now().strftime('%Y%m%d-%H%M%S-%f'))
+    os.makedirs(snapshotFolder, exist_ok=True)
+    for tableName, PullData in exportTables.items():
+        df = PullData(user_id)
+        path = os.path.join(snapshotFolder, tableName + extension)
+        if fileFormat == 'parquet':
+            df.to_parquet(path, compression=compression, index=False)
+        else:
+            df.to_feather(path, compression=compression)
+    return snapshotFolder
+
+
+def LatestSnapshot(user_id: int, folder: str = exportFolderPath):
+    """
+    Finds the most recent snapshot of a user.
+    :param user_id: The ID of the user.
+    :param folder: The folder the snapshots are saved in.
+    :return: The path of the newest snapshot folder, or None if the user has no snapshots.
+    """
+    userFolder = os.path.join(folder, f'user_{user_id}')
+    if not os.path.isdir(userFolder):
+        return None
+    snapshots = sorted(os.listdir(userFolder))  # The folder names are timestamps so they sort by age
+    if not snapshots:
+        return None
+    return os.path.join(userFolder, snapshots[-1])
+
+
+def LoadExportedData(snapshotFolder: str, tableName: str):
+    """
+    Loads one table of a snapshot back into a DataFrame.
+    Arrow IPC files are memory mapped, so uncompressed numeric columns are used in place instead of being copied.
+    :param snapshotFolder: The path of the snapshot folder.
+    :param tableName: The table to load eg - 'transactions' -
+    :return: DataFrame containing the table's data.
+    """
+    parquetPath = os.path.join(snapshotFolder, tableName + fileFormats['parquet'][0])
+    if os.path.exists(parquetPath):
+        return pd.read_parquet(parquetPath)
+
+    import pyarrow  # Only needed here, and is an optional dependency
+    arrowPath = os.path.join(snapshotFolder, tableName + fileFormats['arrow'][0])
+    with pyarrow.memory_map(arrowPath, 'r') as source:
+        table = pyarrow.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,354 @@
+"""
+FILE NAME - FinanceService.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - The calculations behind the app's views, kept apart from the GUI so the same code is used by MainPage,
+    the command line and the benchmarks. Every function is pure and vectorised over the User's frames:
+        transactions - amount, date, description, currency and id columns
+        goals - name, description, date, amount, currency and id columns
+        archivedTotals - date, currency, income, expenses and count columns, one row per archived date
+        monthlyTotals - month (YY/MM), currency, income, expenses, net and count columns, one row per month
+        fxRates - currency, date and rate columns, the rate being the value of one unit in the default currency
+    Dates can be datetimes, as the User's frames have, or the app's YY/MM/DD strings, as read from the database.
+    Functions marked Cached keep their results when called with a cacheKey, which should change whenever the frames
+    do (the User's data versions do). Cached results are shared, so they must not be changed by the caller.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import functools
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import Profiler
+from DatabaseHandler import defaultCurrency
+
+maxCacheEntries = 64
+cache = OrderedDict()  # (function name, cacheKey, arguments) to result, least recently used first
+# The symbols amounts are shown with, other currencies are shown with their three letter code
+currencySymbols = {defaultCurrency: '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥'}
+
+
+def Cached(function):
+    """
+    Decorator that caches a function's results by its cacheKey keyword argument and its other positional arguments.
+    Other frames are passed as keyword arguments and aren't part of the key, so the cacheKey must change with them.
+    Calls without a cacheKey are always calculated.
+    :param function: The function to cache, its first argument is the frame it calculates from.
+    :return: The cached function.
+    """
+
+    @functools.wraps(function)
+    def Wrapper(frame: pd.DataFrame, *args, cacheKey=None, **frames):
+        if cacheKey is None:
+            return function(frame, *args, **frames)
+        key = (function.__name__, cacheKey, args)
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        result = function(frame, *args, **frames)
+        cache[key] = result
+        if len(cache) > maxCacheEntries:
+            cache.popitem(last=False)
+        return result
+
+    return Wrapper
+
+
+def ClearCache():
+    """Removes every cached result."""
+    cache.clear()
+
+
+def ParseDates(dates: pd.Series):
+    """
+    Turns the app's YY/MM/DD date strings into datetimes.
+    :param dates: Series of date strings, or of datetimes, which are returned as they are.
+    :return: Series of datetimes.
+    """
+    if pd.api.types.is_datetime64_dtype(dates):
+        return dates
+    # There are far fewer distinct dates than rows, so each distinct date is only parsed once
+    codes, uniqueDates = pd.factorize(dates)
+    parsed = pd.to_datetime(uniqueDates, format='%y/%m/%d')
+    return pd.Series(parsed[codes], index=dates.index, name=dates.name)
+
+
+def FormatDates(dates: pd.Series):
+    """
+    Turns datetimes into the app's YY/MM/DD date strings, for showing them.
+    :param dates: Series of datetimes.
+    :return: Array of date strings.
+    """
+    codes, uniqueDates = pd.factorize(dates)
+    return uniqueDates.strftime('%y/%m/%d').to_numpy(dtype=object)[codes]
+
+
+def FormatMoney(amount: float, currency: str):
+    """
+    Formats an amount with its currency symbol, or its code if it has no symbol.
+    :param amount: The amount.
+    :param currency: The currency code of the amount.
+    :return: The formatted amount eg - $12.50 or 12.50 USD -
+    """
+    if currency in currencySymbols:
+        return f'{currencySymbols[currency]}{amount:.2f}'
+    return f'{amount:.2f} {currency}'
+
+
+@Cached
+@Profiler.Timed('pandas')
+def WithArchivedTotals(transactions: pd.DataFrame, archivedTotals: pd.DataFrame = None):
+    """
+    Adds the totals of the archived transactions to the live ones, as one income and one expense row for each archived
+    date and currency, so balances, the balance plot and the monthly nets include the archived years exactly.
+    :param transactions: The user's live transactions.
+    :param archivedTotals: The totals of the user's archived transactions, passed by keyword.
+    :return: The live transactions followed by the archived total rows, which have an id of -1.
+    """
+    if archivedTotals is None or archivedTotals.empty:
+        return transactions
+    totalRows = [pd.DataFrame({'amount': archivedTotals[column], 'date': archivedTotals['date'],
+                               'description': 'Archived', 'currency': archivedTotals['currency'], 'id': -1})
+                 for column in ('income', 'expenses')]
+    totalRows = [frame[frame['amount'] != 0] for frame in totalRows]
+    return pd.concat([transactions] + totalRows, ignore_index=True)
+
+
+@Profiler.Timed('pandas')
+def RatesOn(fxRates: pd.DataFrame, currencies: pd.Series, dates: pd.Series):
+    """
+    Finds the exchange rate of each currency on each date, using the latest rate on or before the date (or the
+    earliest rate for dates before a currency's first rate).
+    :param fxRates: The exchange rates.
+    :param currencies: Series of currency codes.
+    :param dates: Series of datetimes, the same length as currencies.
+    :return: Array of the value of one unit of each currency in the default currency.
+    """
+    rates = np.ones(len(currencies))
+    isForeign = (currencies != defaultCurrency).to_numpy()
+    if not isForeign.any():
+        return rates
+    # merge_asof needs both sides sorted by date, the position column puts the rates back in the original order
+    wanted = pd.DataFrame({'date': dates.to_numpy()[isForeign], 'currency': currencies.to_numpy()[isForeign],
+                           'position': np.flatnonzero(isForeign)}).sort_values('date', kind='stable')
+    known = fxRates.assign(date=ParseDates(fxRates['date'])).sort_values('date', kind='stable')
+    found = pd.merge_asof(wanted, known, on='date', by='currency', direction='backward')
+    missing = found['rate'].isna().to_numpy()
+    if missing.any():
+        found.loc[missing, 'rate'] = pd.merge_asof(wanted[missing], known, on='date', by='currency',
+                                                   direction='forward')['rate'].to_numpy()
+    if found['rate'].isna().any():
+        unknown = sorted(found.loc[found['rate'].isna(), 'currency'].unique())
+        raise ValueError(f"No exchange rates for {', '.join(unknown)}")
+    rates[found['position'].to_numpy()] = found['rate'].to_numpy()
+    return rates
+
+
+@Cached
+@Profiler.Timed('pandas')
+def ConvertCurrency(frame: pd.DataFrame, reportingCurrency: str, dateColumn: str = 'date',
+                    fxRates: pd.DataFrame = None):
+    """
+    Converts the amounts of a frame to one currency, at the rate on each row's date.
+    Frames that are already all in the reporting currency are returned as they are.
+    :param frame: A frame with amount, currency and date columns, eg - the user's transactions -
+    :param reportingCurrency: The currency code to convert to.
+    :param dateColumn: The column with the dates to take the rates from.
+    :param fxRates: The exchange rates, passed by keyword.
+    :return: The frame with its amounts in the reporting currency.
+    """
+    if frame.empty or (frame['currency'].to_numpy() == reportingCurrency).all():
+        return frame
+    dates = ParseDates(frame[dateColumn])
+    toDefault = RatesOn(fxRates, frame['currency'], dates)
+    toReporting = RatesOn(fxRates, pd.Series(reportingCurrency, index=frame.index), dates)
+    return frame.assign(amount=frame['amount'].to_numpy() * toDefault / toReporting, currency=reportingCurrency)
+
+
+@Cached
+@Profiler.Timed('pandas')
+def SplitTransactions(transactions: pd.DataFrame, incomeSortColumn: str = None, expenseSortColumn: str = None):
+    """
+    Splits the transactions into incomes and expenses, each sorted by a column.
+    :param transactions: The user's transactions.
+    :param incomeSortColumn: The column to sort the incomes by, or None to keep them in order.
+    :param expenseSortColumn: The column to sort the expenses by, or None to keep them in order.
+    :return: Tuple of the income DataFrame and the expense DataFrame.
+    """
+    amounts = transactions['amount'].to_numpy()
+    incomeDf = transactions[amounts > 0]
+    expenseDf = transactions[amounts < 0]
+    if incomeSortColumn is not None:
+        incomeDf = incomeDf.sort_values(by=[incomeSortColumn], kind='stable')
+    if expenseSortColumn is not None:
+        expenseDf = expenseDf.sort_values(by=[expenseSortColumn], kind='stable')
+    return incomeDf, expenseDf
+
+
+@Cached
+@Profiler.Timed('pandas')
+def CashFlowTotals(transactions: pd.DataFrame):
+    """
+    Totals the incomes and expenses.
+    :param transactions: The user's transactions.
+    :return: Tuple of the total income, the total expenses (negative) and the net cash.
+    """
+    amounts = transactions['amount'].to_numpy(dtype=float)
+    totalIncome = float(amounts[amounts > 0].sum())
+    totalExpenses = float(amounts[amounts < 0].sum())
+    return totalIncome, totalExpenses, totalIncome + totalExpenses
+
+
+@Cached
+@Profiler.Timed('pandas')
+def UpcomingGoals(goals: pd.DataFrame, today):
+    """
+    Finds the goals that are today or later.
+    :param goals: The user's goals.
+    :param today: Today's date.
+    :return: DataFrame of the upcoming goals with their date as a datetime, closest first.
+    """
+    if goals.empty:
+        return goals
+    dated = goals.assign(date=ParseDates(goals['date']))
+    return dated[dated['date'] >= pd.Timestamp(today)].sort_values('date', kind='stable')
+
+
+@Cached
+@Profiler.Timed('pandas')
+def NextGoalDate(goals: pd.DataFrame, today):
+    """
+    Finds the date of the closest goal that is today or later.
+    :param goals: The user's goals.
+    :param today: Today's date.
+    :return: The date of the next goal, or None if there are no goals left.
+    """
+    if goals.empty:
+        return None
+    dates = ParseDates(goals['date'])
+    upcoming = dates[dates >= pd.Timestamp(today)]
+    if upcoming.empty:
+        return None
+    return upcoming.min().date()
+
+
+@Cached
+@Profiler.Timed('pandas')
+def CumulativeBalance(transactions: pd.DataFrame):
+    """
+    Calculates the balance at the end of every date that has transactions.
+    :param transactions: The user's transactions.
+    :return: DataFrame with the date, the amount of that date and the cumulative_total up to it, oldest first.
+    """
+    # Group the amounts by date (which also sorts them) and sum them, then keep a running total
+    totalOverTime = transactions['amount'].groupby(ParseDates(transactions['date'])).sum()
+    return pd.DataFrame({'date': totalOverTime.index, 'amount': totalOverTime.to_numpy(),
+                         'cumulative_total': np.cumsum(totalOverTime.to_numpy())})
+
+
+def BucketStarts(dates: pd.Series, bucket: str):
+    """
+    Gets the first date of the day, week (from Monday), month or year each date is in, as DatabaseHandler.Aggregate
+    groups them.
+    :param dates: Series of datetimes.
+    :param bucket: 'day', 'week', 'month' or 'year'.
+    :return: Series of datetimes.
+    """
+    if bucket == 'day':
+        return dates.dt.normalize()
+    if bucket == 'week':
+        return dates.dt.normalize() - pd.to_timedelta(dates.dt.weekday, unit='D')
+    if bucket in ('month', 'year'):
+        return dates.dt.to_period('M' if bucket == 'month' else 'Y').dt.start_time
+    raise ValueError(f'Unknown bucket: {bucket}')
+
+
+def BalanceFrame(totals: pd.Series, openingBalance: float = 0.0):
+    """
+    Keeps a running balance over the totals of each bucket.
+    :param totals: Series of the net amount of each bucket, indexed by its first date, oldest first.
+    :param openingBalance: The balance before the first bucket.
+    :return: DataFrame with the date, the amount of that bucket and the cumulative_total up to it, oldest first.
+    """
+    return pd.DataFrame({'date': totals.index, 'amount': totals.to_numpy(),
+                         'cumulative_total': openingBalance + np.cumsum(totals.to_numpy())})
+
+
+@Cached
+@Profiler.Timed('pandas')
+def BucketBalance(transactions: pd.DataFrame, start: str = None, end: str = None, bucket: str = 'day'):
+    """
+    Calculates the balance at the end of every day, week, month or year in a date range that has transactions,
+    starting from the balance before the range.
+    :param transactions: The user's transactions.
+    :param start: The first date (YY/MM/DD), None for the first the user has.
+    :param end: The last date (YY/MM/DD), None for the last the user has.
+    :param bucket: 'day', 'week', 'month' or 'year'.
+    :return: DataFrame with the date (the bucket's first date), the amount of that bucket and the cumulative_total up
+        to it, oldest first.
+    """
+    dates = ParseDates(transactions['date'])
+    before = dates < pd.to_datetime(start, format='%y/%m/%d') if start else np.zeros(len(dates), dtype=bool)
+    inRange = ~before
+    if end:
+        inRange &= dates <= pd.to_datetime(end, format='%y/%m/%d')
+    totals = transactions['amount'][inRange].groupby(BucketStarts(dates[inRange], bucket)).sum()
+    return BalanceFrame(totals, float(transactions['amount'][before].sum()))
+
+
+@Cached
+@Profiler.Timed('pandas')
+def MonthlyNet(transactions: pd.DataFrame):
+    """
+    Sums the transactions of each month.
+    :param transactions: The user's transactions.
+    :return: Series of the net amount of each month, indexed by the month, oldest first.
+    """
+    months = ParseDates(transactions['date']).dt.to_period('M')
+    return transactions['amount'].groupby(months).sum().sort_index()
+
+
+@Cached
+@Profiler.Timed('pandas')
+def RollupTotals(monthlyTotals: pd.DataFrame):
+    """
+    Totals the incomes and expenses from the monthly totals, which takes time in the number of months instead of the
+    number of transactions. The monthly totals must all be in one currency.
+    :param monthlyTotals: The user's monthly totals.
+    :return: Tuple of the total income, the total expenses (negative) and the net cash.
+    """
+    totalIncome = float(monthlyTotals['income'].sum()) if not monthlyTotals.empty else 0.0
+    totalExpenses = float(monthlyTotals['expenses'].sum()) if not monthlyTotals.empty else 0.0
+    return totalIncome, totalExpenses, totalIncome + totalExpenses
+
+
+@Cached
+@Profiler.Timed('pandas')
+def RollupMonthlyNet(monthlyTotals: pd.DataFrame):
+    """
+    Gets the net amount of each month from the monthly totals, which must all be in one currency.
+    :param monthlyTotals: The user's monthly totals.
+    :return: Series of the net amount of each month, indexed by the month, oldest first.
+    """
+    if monthlyTotals.empty:
+        return pd.Series(dtype=float, index=pd.PeriodIndex([], freq='M'))
+    months = pd.to_datetime(monthlyTotals['month'], format='%y/%m').dt.to_period('M')
+    return monthlyTotals['net'].groupby(months).sum().sort_index()
+
+
+@Cached
+@Profiler.Timed('pandas')
+def Forecast(monthlyNet: pd.Series, months: int, history: int, thisMonth: pd.Period):
+    """
+    Projects the balance forward using the average net of the recent months.
+    :param monthlyNet: The net amount of each month, oldest first.
+    :param months: How many months to project.
+    :param history: How many recent months to average.
+    :param thisMonth: The current month, the projection starts the month after it.
+    :return: Tuple of the balance now, the average monthly net and a Series of the projected balance by month.
+    """
+    balance = float(monthlyNet.sum())
+    averageNet = float(monthlyNet.tail(history).mean()) if not monthlyNet.empty else 0.0
+    steps = np.arange(1, months + 1)
+    projection = pd.Series(balance + averageNet * steps, index=[thisMonth + int(i) for i in steps])
+    return balance, averageNet, projection
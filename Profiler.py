@@ -0,0 +1,144 @@
+"""
+FILE NAME - Profiler.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Low overhead instrumentation for finding where time goes. Functions are timed with the Timed decorator
+    and blocks of code with a Span. Nothing is recorded unless profiling is turned on, either at runtime with Enable
+    or at start up with the environment variable BUDGET_PROFILE=1. The timings can be read as a summary per name, or
+    saved as a trace file in the Chrome trace format that can be opened in chrome://tracing or Perfetto.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import json
+import time
+import threading
+import functools
+
+enabled = os.environ.get('BUDGET_PROFILE') == '1'
+maxEvents = 200000  # The oldest events are dropped after this many, the summary keeps counting
+traceFilePath = 'trace.json'
+
+events = []  # Chrome trace events, in the order the spans finished
+summary = {}  # Name to [count, total nanoseconds, max nanoseconds]
+lock = threading.Lock()
+processId = os.getpid()
+
+
+def Enable(on: bool = True):
+    """
+    Turns profiling on or off.
+    :param on: True to start recording, False to stop.
+    """
+    global enabled
+    enabled = on
+
+
+def Reset():
+    """Clears everything that has been recorded."""
+    with lock:
+        events.clear()
+        summary.clear()
+
+
+def Record(name: str, category: str, startNs: int, endNs: int):
+    """
+    Records one finished span.
+    :param name: The name of the span.
+    :param category: The category of the span eg - 'db' -
+    :param startNs: When the span started, from time.perf_counter_ns.
+    :param endNs: When the span ended, from time.perf_counter_ns.
+    """
+    duration = endNs - startNs
+    with lock:
+        if len(events) >= maxEvents:
+            del events[:maxEvents // 10]
+        events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': startNs / 1000, 'dur': duration / 1000,
+                       'pid': processId, 'tid': threading.get_ident()})
+        stats = summary.get(name)
+        if stats is None:
+            summary[name] = [1, duration, duration]
+        else:
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+
+class Span:
+    """
+    A context manager that times the block of code inside it.
+    eg - with Profiler.Span('Sort transactions', 'pandas'): -
+    """
+
+    def __init__(self, name: str, category: str = 'app'):
+        """
+        Initialises the span.
+        :param name: The name of the span.
+        :param category: The category of the span.
+        """
+        self.name = name
+        self.category = category
+        self.startNs = 0
+
+    def __enter__(self):
+        """Starts timing if profiling is on."""
+        if enabled:
+            self.startNs = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exception):
+        """Records the span if it was timed."""
+        if self.startNs:
+            Record(self.name, self.category, self.startNs, time.perf_counter_ns())
+            self.startNs = 0
+        return False
+
+
+def Timed(category: str = 'app', name: str = None):
+    """
+    Decorator that times every call of a function.
+    When profiling is off it only costs one check of the enabled flag.
+    :param category: The category of the spans eg - 'db' -
+    :param name: The name of the spans, the module and name of the function by default.
+    :return: The decorator.
+    """
+
+    def Decorator(function):
+        spanName = name or f'{function.__module__}.{function.__qualname__}'
+
+        @functools.wraps(function)
+        def Wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            startNs = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                Record(spanName, category, startNs, time.perf_counter_ns())
+
+        return Wrapper
+
+    return Decorator
+
+
+def Summary():
+    """
+    Gets the totals of every span name, slowest total first.
+    :return: List of (name, count, total milliseconds, max milliseconds).
+    """
+    with lock:
+        rows = [(name, count, total / 1e6, maximum / 1e6) for name, (count, total, maximum) in summary.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def SaveTrace(path: str = traceFilePath):
+    """
+    Saves the recorded spans as a trace file in the Chrome trace format.
+    :param path: The path of the trace file.
+    :return: The path of the trace file.
+    """
+    with lock:
+        trace = {'traceEvents': list(events), 'displayTimeUnit': 'ms'}
+    with open(path, 'w') as file:
+        json.dump(trace, file)
+    return path
@@ -0,0 +1,145 @@
+"""
+FILE NAME - QueryStats.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Collects statistics for every query DatabaseHandler runs, grouped by the normalised statement (the
+    query with its literals replaced by ? and its whitespace collapsed): how many times it ran, its total and max
+    latency and how many rows it returned or changed. Queries slower than the threshold are kept with their
+    EXPLAIN QUERY PLAN, which shows when a query scans a whole table because an index is missing.
+    DatabaseHandler saves the statistics into the database when the program exits, and they can be printed with
+    - python QueryStats.py -
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import re
+import sqlite3
+import threading
+import functools
+from datetime import datetime
+
+slowQueryMs = 50.0  # Queries slower than this are kept with their query plan
+maxSlowQueries = 100
+
+stats = {}  # Normalised statement to [count, total ms, max ms, rows]
+slowQueries = []  # Dictionaries of time, statement, ms and plan, newest last
+lock = threading.Lock()
+
+literalPattern = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+listPattern = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@functools.lru_cache(maxsize=1024)
+def NormalizeStatement(query: str):
+    """
+    Normalises a query so the same statement with different literals is counted together.
+    :param query: The SQL query.
+    :return: The query with literals replaced by ?, lists of values by (...) and whitespace collapsed.
+    """
+    statement = ' '.join(query.split())
+    statement = literalPattern.sub('?', statement)
+    return listPattern.sub('(...)', statement)
+
+
+def QueryPlan(connection: sqlite3.Connection, query: str, params: tuple):
+    """
+    Gets the query plan SQLite uses for a query, without running it.
+    :param connection: The connection to ask.
+    :param query: The SQL query.
+    :param params: The parameters of the query.
+    :return: The query plan, one step per line.
+    """
+    try:
+        rows = connection.execute('EXPLAIN QUERY PLAN ' + query, params).fetchall()
+    except sqlite3.Error as e:
+        return f'No plan: {e}'
+    return '\n'.join(row[3] for row in rows)
+
+
+def RecordQuery(query: str, params: tuple, seconds: float, rows: int, connection: sqlite3.Connection):
+    """
+    Records one run of a query, and its query plan if it was slow.
+    :param query: The SQL query.
+    :param params: The parameters of the query, used to get the query plan.
+    :param seconds: How long the query took.
+    :param rows: How many rows the query returned or changed.
+    :param connection: The connection the query ran on, used to get the query plan.
+    """
+    statement = NormalizeStatement(query)
+    ms = seconds * 1000
+    with lock:
+        entry = stats.get(statement)
+        if entry is None:
+            stats[statement] = [1, ms, ms, max(rows, 0)]
+        else:
+            entry[0] += 1
+            entry[1] += ms
+            entry[2] = max(entry[2], ms)
+            entry[3] += max(rows, 0)
+    if ms >= slowQueryMs:
+        slowQuery = {'time': datetime.now().isoformat(timespec='seconds'), 'statement': statement,
+                     'ms': round(ms, 3), 'plan': QueryPlan(connection, query, params)}
+        with lock:
+            slowQueries.append(slowQuery)
+            del slowQueries[:-maxSlowQueries]
+
+
+def Summary():
+    """
+    Gets the statistics of every statement, slowest total first.
+    :return: List of (statement, count, total ms, max ms, rows).
+    """
+    with lock:
+        rows = [(statement, *entry) for statement, entry in stats.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def RecentSlowQueries(count: int):
+    """
+    Gets the newest slow queries, copied so they can be read while queries on other threads are recorded.
+    :param count: How many slow queries to get.
+    :return: List of dictionaries of time, statement, ms and plan, newest last.
+    """
+    with lock:
+        return slowQueries[-count:] if count > 0 else []
+
+
+def TakeAll():
+    """
+    Gets the statistics and slow queries recorded so far and clears them, so they are only saved once.
+    :return: Tuple of the summary list and the slow query list.
+    """
+    with lock:
+        rows = [(statement, *entry) for statement, entry in stats.items()]
+        slow = list(slowQueries)
+        stats.clear()
+        slowQueries.clear()
+    return rows, slow
+
+
+def PrintReport(summaryRows: list, slowRows: list):
+    """
+    Prints the statistics and slow queries as a report.
+    :param summaryRows: List of (statement, count, total ms, max ms, rows).
+    :param slowRows: List of (time, statement, ms, plan).
+    """
+    print(f"{'Count':>8}{'Total ms':>12}{'Max ms':>10}{'Avg ms':>10}{'Rows':>10}  Statement")
+    for statement, count, total, maximum, rows in summaryRows:
+        print(f'{count:>8}{total:>12.1f}{maximum:>10.1f}{total / count:>10.2f}{rows:>10}  {statement[:120]}')
+    if slowRows:
+        print('\nSlow queries, with their query plan')
+    for slowTime, statement, ms, plan in slowRows:
+        print(f'{slowTime}  {ms:.1f} ms  {statement[:120]}')
+        for line in plan.splitlines():
+            print(f'    {line}')
+
+
+if __name__ == '__main__':
+    import argparse
+    import DatabaseHandler
+
+    parser = argparse.ArgumentParser(description='Print the query statistics saved in the database.')
+    parser.add_argument('--database', default=DatabaseHandler.databaseFilePath)
+    parser.add_argument('--limit', type=int, default=30, help='How many statements and slow queries to show.')
+    arguments = parser.parse_args()
+    DatabaseHandler.Open(arguments.database)
+    PrintReport(*DatabaseHandler.PullQueryStats(arguments.limit))
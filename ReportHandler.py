@@ -0,0 +1,116 @@
+"""
+FILE NAME - ReportHandler.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Makes monthly statements for users: the opening and closing balance, income and expenses, the
+    transactions and charts of the balance and the spending by category of each month, in one reporting currency.
+    The data of every statement is read in this process, where the database connection and the keys of unlocked
+    encrypted users are, and the statements are then drawn by ReportRenderer in a pool of processes, as drawing the
+    charts and PDFs takes most of the time. Charts are cached by a hash of their data, so making the statements of a
+    month again only draws the charts whose data has changed.
+    Statements are written in plain text, including those of users with encryption on.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import ArchiveHandler
+import FinanceService
+import ReportRenderer
+import UserModel
+import Profiler
+
+reportFolderPath = 'reports'
+chartCacheFolderName = 'chart cache'
+reportFormats = ('html', 'pdf')
+
+
+def MonthRange(firstMonth: str, lastMonth: str = None):
+    """
+    Gets the months from one month to another.
+    :param firstMonth: The first month (YY/MM).
+    :param lastMonth: The last month (YY/MM), the first month if None.
+    :return: List of the months as pandas Periods.
+    """
+    first = pd.Period(pd.to_datetime(firstMonth, format='%y/%m'), freq='M')
+    last = pd.Period(pd.to_datetime(lastMonth, format='%y/%m'), freq='M') if lastMonth else first
+    return list(pd.period_range(first, last, freq='M'))
+
+
+@Profiler.Timed('report')
+def BuildStatements(user: UserModel.User, months: list, reportingCurrency: str):
+    """
+    Reads the data of a user's statements. The transactions of all the months are read at once, including the
+    archived ones, and the opening balances come from the user's monthly totals.
+    :param user: The loaded user.
+    :param months: List of the months as pandas Periods, in order.
+    :param reportingCurrency: The currency code the statements are in.
+    :return: List of statements, dictionaries of the values ReportRenderer draws.
+    """
+    firstDate, lastDate = (months[0].start_time.strftime('%y/%m/%d'), months[-1].end_time.strftime('%y/%m/%d'))
+    transactions = UserModel.TypedFrame(ArchiveHandler.PullTransactionsRange(user.id, firstDate, lastDate),
+                                        UserModel.transactionSchema)
+    transactions = FinanceService.ConvertCurrency(transactions, reportingCurrency, fxRates=user.fxRates)
+    monthlyNet = user.MonthlyNet(reportingCurrency)[0]
+    transactionMonths = transactions['date'].dt.to_period('M')
+    statements = []
+    for month in months:
+        rows = transactions[transactionMonths == month]
+        amounts = rows['amount'].to_numpy()
+        opening = float(monthlyNet[monthlyNet.index < month].sum())
+        daily = rows['amount'].groupby(rows['date']).sum()
+        spending = (-rows['amount'][amounts < 0]).groupby(rows['description'][amounts < 0].astype(str)).sum()
+        spending = spending.sort_values(ascending=False, kind='stable')
+        if len(spending) > ReportRenderer.categoriesShown:
+            other = spending.iloc[ReportRenderer.categoriesShown - 1:].sum()
+            spending = pd.concat([spending.iloc[:ReportRenderer.categoriesShown - 1], pd.Series({'Other': other})])
+        income, expenses = float(amounts[amounts > 0].sum()), float(amounts[amounts < 0].sum())
+        statements.append({
+            'userId': user.id,
+            'name': user.name,
+            'month': month.strftime('%Y-%m'),
+            'currency': reportingCurrency,
+            'opening': opening,
+            'income': income,
+            'expenses': expenses,
+            'closing': opening + income + expenses,
+            'transactions': pd.DataFrame({'date': FinanceService.FormatDates(rows['date']),
+                                          'description': rows['description'].astype(str).tolist(),
+                                          'amount': amounts}),
+            'dates': daily.index.to_numpy(),
+            'balances': opening + daily.cumsum().to_numpy(),
+            'categories': spending.index.to_numpy(dtype=object),
+            'categoryTotals': spending.to_numpy(),
+        })
+    return statements
+
+
+@Profiler.Timed('report')
+def GenerateStatements(users: list, months: list, reportingCurrency: str, formats: tuple = reportFormats,
+                       folder: str = reportFolderPath, processes: int = None):
+    """
+    Makes the statements of many users and months, drawing them in a pool of processes.
+    :param users: List of the loaded users, encrypted ones must have been unlocked.
+    :param months: List of the months as pandas Periods, in order.
+    :param reportingCurrency: The currency code the statements are in.
+    :param formats: The formats to write, 'html' and or 'pdf'.
+    :param folder: The folder the statements are written in, each user gets a folder of their own.
+    :param processes: How many processes draw the statements, by default one per CPU. With 1, or only one statement,
+        they are drawn in this process.
+    :return: Tuple of the list of paths written and the number of charts drawn (the rest came from the cache).
+    """
+    for fileFormat in formats:
+        if fileFormat not in reportFormats:
+            raise ValueError(f'Unknown report format: {fileFormat}')
+    statements = [statement for user in users for statement in BuildStatements(user, months, reportingCurrency)]
+    folders = [os.path.join(folder, f"user_{statement['userId']}") for statement in statements]
+    arguments = (statements, folders, itertools.repeat(os.path.join(folder, chartCacheFolderName)),
+                 itertools.repeat(tuple(formats)))
+    if processes == 1 or len(statements) <= 1:
+        results = list(map(ReportRenderer.RenderStatement, *arguments))
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(ReportRenderer.RenderStatement, *arguments))
+    return [path for paths, _ in results for path in paths], sum(drawn for _, drawn in results)
@@ -0,0 +1,232 @@
+"""
+FILE NAME - ReportRenderer.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Draws monthly statements, made by ReportHandler, as HTML and PDF files. It doesn't use the database, so
+    the process pool ReportHandler renders with can import it without opening a connection.
+    Charts are drawn on matplotlib Figures, which use the Agg backend when saved, so no Tk window is needed and each
+    process can draw on its own. Every chart is saved as a PNG named by a hash of the data it plots, so a month whose
+    data hasn't changed reuses its charts instead of drawing them again. HTML statements embed their charts, so each
+    file can be opened or sent on its own. PDFs use the fonts every PDF reader has (pdfFonts), as laying out and
+    embedding a font of our own for every character of the transaction pages took about twenty times longer.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import html
+import base64
+import hashlib
+import numpy as np
+import matplotlib.image
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+
+chartStyleVersion = 1  # Change when the charts are drawn differently, so the cached charts are drawn again
+chartSize = (6.4, 3.0)  # Inches
+chartDpi = 100
+pageSize = (8.27, 11.69)  # A4 in inches
+rowsPerPage = 50  # Transaction rows on each PDF page
+categoriesShown = 8  # The categories with the most spending are charted, the rest are added up as 'Other'
+pdfFonts = {'pdf.use14corefonts': True, 'font.family': 'sans-serif', 'font.sans-serif': ['Helvetica'],
+            'font.monospace': ['Courier'], 'font.weight': 'medium'}
+
+
+def ChartKey(kind: str, *columns):
+    """
+    Hashes the data a chart plots, so a chart only has to be drawn once for the same data.
+    :param kind: The name of the chart.
+    :param columns: Arrays or lists of the values plotted.
+    :return: The hash as hex.
+    """
+    key = hashlib.blake2b(f'{kind}|{chartStyleVersion}'.encode(), digest_size=16)
+    for column in columns:
+        values = np.asarray(column)
+        key.update(values.tobytes() if values.dtype != object else '\x00'.join(map(str, values)).encode())
+        key.update(b'|')
+    return key.hexdigest()
+
+
+def CachedChart(cacheFolder: str, kind: str, Draw, *columns):
+    """
+    Gets the PNG of a chart from the cache, drawing and saving it first if its data hasn't been drawn before.
+    :param cacheFolder: The folder the charts are cached in.
+    :param kind: The name of the chart.
+    :param Draw: Function that draws the chart on a Figure, given the Figure and the columns.
+    :param columns: The values the chart plots.
+    :return: Tuple of the path of the PNG and whether it was drawn.
+    """
+    path = os.path.join(cacheFolder, f'{kind} {ChartKey(kind, *columns)}.png')
+    if os.path.exists(path):
+        return path, False
+    figure = Figure(figsize=chartSize, dpi=chartDpi, layout='tight')
+    Draw(figure, *columns)
+    # Saved under a name of its own and then renamed, so another process never reads a half written chart
+    temporaryPath = f'{path}.{os.getpid()}.tmp'
+    figure.savefig(temporaryPath, format='png')
+    os.replace(temporaryPath, path)
+    return path, True
+
+
+def DrawBalanceChart(figure: Figure, dates, balances, currency):
+    """
+    Draws the balance at the end of each day of the month.
+    :param figure: The Figure to draw on.
+    :param dates: Array of the dates that have transactions.
+    :param balances: Array of the balance at the end of each date.
+    :param currency: Array with the currency code the balances are in.
+    """
+    ax = figure.subplots()
+    ax.step(dates, balances, where='post', color='tab:blue')
+    ax.set_title('Balance', fontsize=10)
+    ax.set_ylabel(str(currency[0]), fontsize=8)
+    ax.tick_params(labelsize=7)
+    figure.autofmt_xdate()
+
+
+def DrawSpendingChart(figure: Figure, categories, totals, currency):
+    """
+    Draws the total spent in each category.
+    :param figure: The Figure to draw on.
+    :param categories: Array of the categories, the largest first.
+    :param totals: Array of the total spent in each category (positive).
+    :param currency: Array with the currency code the totals are in.
+    """
+    ax = figure.subplots()
+    ax.barh(categories[::-1], totals[::-1], color='tab:red')
+    ax.set_title('Spending by category', fontsize=10)
+    ax.set_xlabel(str(currency[0]), fontsize=8)
+    ax.tick_params(labelsize=7)
+
+
+def StatementCharts(statement: dict, cacheFolder: str):
+    """
+    Gets the charts of a statement, drawing the ones that aren't cached.
+    :param statement: The statement, as made by ReportHandler.BuildStatements.
+    :param cacheFolder: The folder the charts are cached in.
+    :return: Tuple of a dictionary of chart name to PNG path and the number of charts drawn.
+    """
+    currency = np.array([statement['currency']])
+    charts, drawn = {}, 0
+    if len(statement['dates']):
+        charts['balance'], wasDrawn = CachedChart(cacheFolder, 'balance', DrawBalanceChart, statement['dates'],
+                                                  statement['balances'], currency)
+        drawn += wasDrawn
+    if len(statement['categories']):
+        charts['spending'], wasDrawn = CachedChart(cacheFolder, 'spending', DrawSpendingChart,
+                                                   statement['categories'], statement['categoryTotals'], currency)
+        drawn += wasDrawn
+    return charts, drawn
+
+
+def SummaryLines(statement: dict):
+    """
+    Gets the summary of a statement as lines of text.
+    :param statement: The statement.
+    :return: List of (label, amount) tuples.
+    """
+    return [('Opening balance', statement['opening']), ('Income', statement['income']),
+            ('Expenses', statement['expenses']), ('Closing balance', statement['closing'])]
+
+
+def WriteHtml(statement: dict, charts: dict, path: str):
+    """
+    Writes a statement as an HTML file with its charts embedded.
+    :param statement: The statement.
+    :param charts: Dictionary of chart name to PNG path.
+    :param path: The path of the HTML file.
+    """
+    currency = html.escape(statement['currency'])
+    summaryRows = ''.join(f'<tr><th>{label}</th><td>{amount:,.2f} {currency}</td></tr>'
+                          for label, amount in SummaryLines(statement))
+    images = []
+    for chartPath in charts.values():
+        with open(chartPath, 'rb') as file:
+            images.append(f'<img src="data:image/png;base64,{base64.b64encode(file.read()).decode()}">')
+    transactions = statement['transactions']
+    transactionRows = ''.join(f'<tr><td>{date}</td><td>{html.escape(description)}</td>'
+                              f'<td class="amount">{amount:,.2f}</td></tr>'
+                              for date, description, amount in zip(transactions['date'].tolist(),
+                                                                   transactions['description'].tolist(),
+                                                                   transactions['amount'].tolist()))
+    title = html.escape(f"{statement['name']} - statement for {statement['month']}")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(f'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ padding: 0.2em 0.8em; text-align: left; border-bottom: 1px solid #ddd; }}
+td.amount {{ text-align: right; }}
+img {{ max-width: 100%; display: block; margin-bottom: 1em; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<table>{summaryRows}</table>
+{''.join(images)}
+<h2>Transactions ({currency})</h2>
+<table>
+<tr><th>Date</th><th>Description</th><th>Amount</th></tr>
+{transactionRows}
+</table>
+</body>
+</html>
+''')
+
+
+def WritePdf(statement: dict, charts: dict, path: str):
+    """
+    Writes a statement as a PDF, the summary and charts on the first page and the transactions on the pages after.
+    :param statement: The statement.
+    :param charts: Dictionary of chart name to PNG path.
+    :param path: The path of the PDF file.
+    """
+    with matplotlib.rc_context(pdfFonts), PdfPages(path) as pdf:
+        page = Figure(figsize=pageSize)
+        page.text(0.08, 0.95, f"{statement['name']} - statement for {statement['month']}", fontsize=16)
+        for i, (label, amount) in enumerate(SummaryLines(statement)):
+            page.text(0.08, 0.91 - i * 0.022, f"{label:<18}{amount:>16,.2f} {statement['currency']}",
+                      family='monospace', fontsize=10)
+        # Each chart gets a band of the page below the summary
+        for i, chartPath in enumerate(charts.values()):
+            ax = page.add_axes((0.05, 0.45 - i * 0.37, 0.9, 0.34))
+            ax.imshow(matplotlib.image.imread(chartPath))
+            ax.set_axis_off()
+        pdf.savefig(page)
+
+        transactions = statement['transactions']
+        lines = [f'{date:<10}{description[:50]:<52}{amount:>14,.2f}' for date, description, amount in
+                 zip(transactions['date'].tolist(), transactions['description'].tolist(),
+                     transactions['amount'].tolist())]
+        for start in range(0, len(lines), rowsPerPage):
+            page = Figure(figsize=pageSize)
+            page.text(0.08, 0.95, f"Transactions ({statement['currency']})", fontsize=12)
+            page.text(0.08, 0.92, '\n'.join(lines[start:start + rowsPerPage]), family='monospace', fontsize=8,
+                      verticalalignment='top', linespacing=1.6)
+            pdf.savefig(page)
+
+
+def RenderStatement(statement: dict, folder: str, cacheFolder: str, formats: tuple):
+    """
+    Writes a statement in each format. This is what each process of the pool runs.
+    :param statement: The statement.
+    :param folder: The folder the statement files are written in.
+    :param cacheFolder: The folder the charts are cached in.
+    :param formats: The formats to write, 'html' and or 'pdf'.
+    :return: Tuple of the list of paths written and the number of charts drawn.
+    """
+    os.makedirs(folder, exist_ok=True)
+    os.makedirs(cacheFolder, exist_ok=True)
+    charts, drawn = StatementCharts(statement, cacheFolder)
+    paths = []
+    for fileFormat in formats:
+        path = os.path.join(folder, f"statement {statement['month']}.{fileFormat}")
+        if fileFormat == 'html':
+            WriteHtml(statement, charts, path)
+        else:
+            WritePdf(statement, charts, path)
+        paths.append(path)
+    return paths, drawn
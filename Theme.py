@@ -0,0 +1,73 @@
+"""
+FILE NAME - Theme.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - The colours of the widgets customtkinter doesn't draw itself, the ttk Treeviews and the matplotlib
+    plots, in light and dark mode. Both palettes are worked out once from the customtkinter theme when the main page is
+    made, so switching the appearance mode only applies colours that are already known: the Treeviews all share the
+    'Treeview' style, so one change to it restyles every table without touching their rows, and each plot only has its
+    colours set and is redrawn the next time Tk is idle, instead of straight away.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import tkinter
+import tkinter.ttk
+import customtkinter
+
+modes = ('Light', 'Dark')  # The order of the colours in a customtkinter theme
+
+
+def ToHex(widget: tkinter.Misc, colour: str):
+    """
+    Turns a Tk colour, eg - 'gray86' - into hex, which matplotlib understands as well.
+    :param widget: Any widget, Tk knows the colour names.
+    :param colour: The colour name or hex.
+    :return: The colour as #rrggbb.
+    """
+    return '#' + ''.join(f'{value // 257:02x}' for value in widget.winfo_rgb(colour))
+
+
+def BuildPalettes(widget: tkinter.Misc):
+    """
+    Works out the colours of both appearance modes from the customtkinter theme.
+    :param widget: Any widget, used to read the colours.
+    :return: Dictionary of mode ('Light' or 'Dark') to a dictionary of colour name to hex.
+    """
+    theme = customtkinter.ThemeManager.theme
+    # Name to the customtkinter widget and setting it comes from
+    sources = {'background': ('CTkFrame', 'fg_color'), 'text': ('CTkLabel', 'text_color'),
+               'selected': ('CTkButton', 'fg_color'), 'plotBackground': ('CTkEntry', 'fg_color'),
+               'plotEdge': ('CTkEntry', 'border_color')}
+    palettes = {mode: {} for mode in modes}
+    for name, (widgetName, setting) in sources.items():
+        for mode, colour in zip(modes, theme[widgetName][setting]):
+            palettes[mode][name] = ToHex(widget, colour)
+    return palettes
+
+
+def ApplyTreeviewStyle(style: tkinter.ttk.Style, palette: dict):
+    """
+    Colours every Treeview through their shared style.
+    :param style: The ttk Style.
+    :param palette: The colours of the mode.
+    """
+    style.configure('Treeview', background=palette['background'], foreground=palette['text'],
+                    fieldbackground=palette['background'], borderwidth=0)
+    style.map('Treeview', background=[('selected', palette['background'])],
+              foreground=[('selected', palette['selected'])])
+
+
+def ApplyPlotTheme(figure, ax, palette: dict):
+    """
+    Colours a matplotlib plot. It isn't redrawn, the caller decides when.
+    :param figure: The Figure.
+    :param ax: The Axes of the plot.
+    :param palette: The colours of the mode.
+    """
+    figure.set_facecolor(palette['background'])
+    ax.set_facecolor(palette['plotBackground'])
+    for spine in ax.spines.values():
+        spine.set_edgecolor(palette['plotEdge'])
+    ax.tick_params(which='both', colors=palette['text'])
+    for text in (ax.title, ax.xaxis.label, ax.yaxis.label):
+        text.set_color(palette['text'])
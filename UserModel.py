@@ -0,0 +1,241 @@
+"""
+FILE NAME - UserModel.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - The user model shared by the GUI and the command line. It only needs pandas, DatabaseHandler and
+    FinanceService, so it can be used without loading customtkinter or matplotlib.
+    Every frame is given the columns and dtypes of its schema when it is loaded, instead of the ones read_sql_query
+    guesses: dates are datetime64, amounts float64 and the descriptions and currencies of transactions, which repeat a
+    lot, are categorical. The frames are shared with the views and FinanceService's cache, so they must not be changed.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import itertools
+import pandas as pd
+import DatabaseHandler
+import FinanceService
+import Profiler
+
+# Every load of a frame gets a new version number, so cached calculations made from an older frame aren't reused
+versionCounter = itertools.count(1)
+
+# The columns of each frame and their dtypes
+transactionSchema = {'amount': 'float64', 'date': 'datetime64[ns]', 'description': 'category', 'currency': 'category',
+                     'id': 'int64'}
+goalSchema = {'name': 'str', 'description': 'str', 'date': 'datetime64[ns]', 'amount': 'float64', 'currency': 'str',
+              'id': 'int64', 'saved': 'float64'}
+budgetSchema = {'name': 'str', 'amount': 'float64', 'end_date': 'datetime64[ns]', 'currency': 'str', 'id': 'int64',
+                'spent': 'float64'}
+investmentSchema = {'name': 'str', 'date': 'datetime64[ns]', 'id': 'int64'}
+archivedTotalSchema = {'date': 'datetime64[ns]', 'currency': 'str', 'income': 'float64', 'expenses': 'float64',
+                       'count': 'int64'}
+monthlyTotalSchema = {'month': 'str', 'currency': 'str', 'income': 'float64', 'expenses': 'float64', 'net': 'float64',
+                      'count': 'int64'}
+fxRateSchema = {'currency': 'str', 'date': 'datetime64[ns]', 'rate': 'float64'}
+alertSchema = {'date': 'datetime64[ns]', 'amount': 'float64', 'description': 'str', 'currency': 'str',
+               'z_score': 'float64', 'quantile': 'float64', 'mean': 'float64', 'transaction_id': 'int64'}
+budgetAlertSchema = {'name': 'str', 'amount': 'float64', 'end_date': 'datetime64[ns]', 'currency': 'str',
+                     'spent': 'float64', 'threshold': 'int64', 'budget_id': 'int64'}
+
+
+emptyFrames = {}  # The empty frame of each schema, by its items, as making one costs about as much as a small read
+
+
+def EmptyFrame(schema: dict):
+    """
+    Makes an empty frame with the columns and dtypes of a schema.
+    :param schema: Dictionary of column name to dtype.
+    :return: The empty DataFrame.
+    """
+    key = tuple(schema.items())
+    if key not in emptyFrames:
+        emptyFrames[key] = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in schema.items()})
+    return emptyFrames[key].copy(deep=False)
+
+
+def TypedFrame(frame: pd.DataFrame, schema: dict):
+    """
+    Gives a frame read from the database the dtypes of a schema.
+    Dates are parsed from the app's YY/MM/DD format and missing descriptions become empty.
+    Each conversion has a fixed cost that is most of the time of loading a small frame, so empty frames are made from
+    the schema and only the columns read_sql_query didn't already give the right dtype are converted.
+    :param frame: The frame as read from the database.
+    :param schema: Dictionary of column name to dtype.
+    :return: A new DataFrame with the schema's columns and dtypes.
+    """
+    if frame.empty:
+        return EmptyFrame(schema)
+    columns = {}
+    for column, dtype in schema.items():
+        values = frame[column]
+        if dtype.startswith('datetime64'):
+            values = FinanceService.ParseDates(values)
+        elif column == 'description' and values.hasnans:
+            values = values.fillna('')
+        columns[column] = values if values.dtype == dtype else values.astype(dtype)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+class User:
+    """
+    A class for a user with their associated financial data.
+    """
+
+    def __init__(self):
+        """Initializes a User object with default values and empty DataFrames."""
+        self.EmptyData()
+
+    def EmptyData(self):
+        """Resets all user data to default values and empty DataFrames."""
+        self.id: int = -1
+        self.name: str = ''
+        self.encrypted: bool = False
+        self.goals: pd.DataFrame = EmptyFrame(goalSchema)
+        self.transactions: pd.DataFrame = EmptyFrame(transactionSchema)
+        self.archivedTotals: pd.DataFrame = EmptyFrame(archivedTotalSchema)
+        self.monthlyTotals: pd.DataFrame = EmptyFrame(monthlyTotalSchema)
+        self.investments: pd.DataFrame = EmptyFrame(investmentSchema)
+        self.budgets: pd.DataFrame = EmptyFrame(budgetSchema)
+        self.fxRates: pd.DataFrame = EmptyFrame(fxRateSchema)
+        self.alerts: pd.DataFrame = EmptyFrame(alertSchema)
+        self.budgetAlerts: pd.DataFrame = EmptyFrame(budgetAlertSchema)
+        self.goalsVersion: int = next(versionCounter)
+        self.transactionsVersion: int = next(versionCounter)
+        self.fxRatesVersion: int = next(versionCounter)
+
+    @Profiler.Timed('model')
+    def LoadData(self, username: str):
+        """
+        Loads all user data based on the provided username.
+        :param username: The username of the user to load data for.
+        """
+        self.LoadUserData(username)
+        self.LoadGoalData()
+        self.LoadTransactionData()
+        self.LoadInvestmentData()
+        self.LoadBudgetData()
+        self.LoadFxRateData()
+
+    @Profiler.Timed('model')
+    def LoadUserData(self, username: str):
+        """
+        Loads basic user data from the database.
+        :param username: The username of the user to load data for.
+        """
+        self.id, username, self.name = DatabaseHandler.PullUsersData(username)[0][:3]
+        self.encrypted = DatabaseHandler.IsEncrypted(self.id)
+
+    @Profiler.Timed('model')
+    def LoadGoalData(self):
+        """Loads the user's financial goals from the database."""
+        self.goals = TypedFrame(DatabaseHandler.PullGoalsData(self.id), goalSchema)
+        self.goalsVersion = next(versionCounter)
+
+    @Profiler.Timed('model')
+    def LoadGoalProgress(self):
+        """
+        Loads only the total contributed to each of the user's goals, for when contributions have changed but the goals
+        haven't. The goals keep their order.
+        """
+        progress = DatabaseHandler.PullGoalProgress(self.id)
+        saved = self.goals['id'].map(pd.Series(progress['saved'].to_numpy(), index=progress['id'].to_numpy()))
+        self.goals = self.goals.assign(saved=saved.fillna(0.0).astype(goalSchema['saved']))
+        self.goalsVersion = next(versionCounter)
+
+    @Profiler.Timed('model')
+    def LoadTransactionData(self):
+        """Loads the user's live transactions, the totals of their archived ones and their monthly totals."""
+        self.transactions = TypedFrame(DatabaseHandler.PullTransactionsData(self.id), transactionSchema)
+        self.archivedTotals = TypedFrame(DatabaseHandler.PullArchivedTotals(self.id), archivedTotalSchema)
+        self.monthlyTotals = TypedFrame(DatabaseHandler.PullMonthlyTotals(self.id), monthlyTotalSchema)
+        self.transactionsVersion = next(versionCounter)
+        self.LoadAlertData()  # Alerts are only saved when transactions change
+
+    @Profiler.Timed('model')
+    def LoadAlertData(self):
+        """Loads the user's unusual expenses and budget alerts that haven't been dismissed."""
+        self.alerts = TypedFrame(DatabaseHandler.PullSpendingAlerts(self.id), alertSchema)
+        self.budgetAlerts = TypedFrame(DatabaseHandler.PullBudgetAlerts(self.id), budgetAlertSchema)
+
+    @Profiler.Timed('model')
+    def LoadInvestmentData(self):
+        """Loads the user's investments from the database."""
+        self.investments = TypedFrame(DatabaseHandler.PullInvestmentsData(self.id), investmentSchema)
+
+    @Profiler.Timed('model')
+    def LoadBudgetData(self):
+        """Loads the user's budgets and their alerts from the database."""
+        self.budgets = TypedFrame(DatabaseHandler.PullBudgetsData(self.id), budgetSchema)
+        self.budgetAlerts = TypedFrame(DatabaseHandler.PullBudgetAlerts(self.id), budgetAlertSchema)
+
+    @Profiler.Timed('model')
+    def LoadFxRateData(self):
+        """Loads the exchange rates from the database."""
+        self.fxRates = TypedFrame(DatabaseHandler.PullFxRates(), fxRateSchema)
+        self.fxRatesVersion = next(versionCounter)
+
+    def ReportingTransactions(self, reportingCurrency: str):
+        """
+        Gets the user's transactions, with the totals of their archived ones, converted to one currency.
+        :param reportingCurrency: The currency code to convert to.
+        :return: Tuple of the converted transactions and the cacheKey to use for calculations made from them.
+        """
+        history = FinanceService.WithArchivedTotals(self.transactions, cacheKey=self.transactionsVersion,
+                                                    archivedTotals=self.archivedTotals)
+        cacheKey = (self.transactionsVersion, self.fxRatesVersion, reportingCurrency)
+        return FinanceService.ConvertCurrency(history, reportingCurrency, cacheKey=cacheKey,
+                                              fxRates=self.fxRates), cacheKey
+
+    def IsInCurrency(self, currency: str):
+        """
+        Checks if every transaction of the user is in one currency, so totals can be read from the monthly totals.
+        The monthly totals leave out encrypted transactions, so they are never used for a user with encryption on.
+        :param currency: The currency code.
+        :return: True if every transaction is in the currency.
+        """
+        return not self.encrypted and bool((self.monthlyTotals['currency'] == currency).all())
+
+    def CashFlowTotals(self, reportingCurrency: str):
+        """
+        Totals the user's incomes and expenses in one currency, from the monthly totals when no conversion is needed.
+        :param reportingCurrency: The currency code to total in.
+        :return: Tuple of the total income, the total expenses (negative) and the net cash.
+        """
+        if self.IsInCurrency(reportingCurrency):
+            return FinanceService.RollupTotals(self.monthlyTotals, cacheKey=self.transactionsVersion)
+        transactions, cacheKey = self.ReportingTransactions(reportingCurrency)
+        return FinanceService.CashFlowTotals(transactions, cacheKey=cacheKey)
+
+    def MonthlyNet(self, reportingCurrency: str):
+        """
+        Gets the user's net amount of each month in one currency, from the monthly totals when no conversion is needed.
+        :param reportingCurrency: The currency code to total in.
+        :return: Tuple of a Series of the net amount of each month, oldest first, and the cacheKey it was made with.
+        """
+        if self.IsInCurrency(reportingCurrency):
+            cacheKey = (self.transactionsVersion, reportingCurrency)
+            return FinanceService.RollupMonthlyNet(self.monthlyTotals, cacheKey=cacheKey), cacheKey
+        transactions, cacheKey = self.ReportingTransactions(reportingCurrency)
+        return FinanceService.MonthlyNet(transactions, cacheKey=cacheKey), cacheKey
+
+    def BalanceOverTime(self, reportingCurrency: str, start: str = None, end: str = None, bucket: str = 'day'):
+        """
+        Gets the user's balance at the end of every day, week, month or year in a date range, in one currency. When no
+        conversion is needed the database totals the range itself, so the history isn't read into pandas.
+        :param reportingCurrency: The currency code to total in.
+        :param start: The first date (YY/MM/DD), None for the first the user has.
+        :param end: The last date (YY/MM/DD), None for the last the user has.
+        :param bucket: 'day', 'week', 'month' or 'year'.
+        :return: DataFrame with the date (the bucket's first date), the amount of that bucket and the cumulative_total
+            up to it, oldest first.
+        """
+        if self.IsInCurrency(reportingCurrency):
+            totals = DatabaseHandler.Aggregate(self.id, start, end, bucket)
+            totals = totals[totals['currency'] == reportingCurrency]
+            opening = DatabaseHandler.OpeningBalances(self.id, start) if start else None
+            openingBalance = 0.0 if opening is None else float(
+                opening.loc[opening['currency'] == reportingCurrency, 'amount'].sum())
+            net = pd.Series(totals['net'].to_numpy(dtype=float), index=FinanceService.ParseDates(totals['bucket']))
+            return FinanceService.BalanceFrame(net, openingBalance)
+        transactions, cacheKey = self.ReportingTransactions(reportingCurrency)
+        return FinanceService.BucketBalance(transactions, start, end, bucket, cacheKey=cacheKey)
@@ -0,0 +1,50 @@
+"""
+FILE NAME - conftest.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - The fixtures shared by the tests. Every test gets a new database in its own temporary folder, so
+    finance management.db is never changed, and passwords are hashed with the cheapest settings so signing in doesn't
+    take most of a second.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+import sys
+import pytest
+from argon2 import PasswordHasher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DatabaseHandler  # noqa: E402
+import Encryption  # noqa: E402
+import FinanceService  # noqa: E402
+
+testPassword = 'password'
+testAnswer = 'answer'
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """
+    Opens a new database in a temporary folder.
+    :return: The path of the database.
+    """
+    monkeypatch.chdir(tmp_path)  # Backups and archives are written next to the database
+    monkeypatch.setattr(DatabaseHandler, 'hasher', PasswordHasher(time_cost=1, memory_cost=8, parallelism=1))
+    DatabaseHandler.Open(str(tmp_path / 'test.db'))
+    FinanceService.ClearCache()
+    yield DatabaseHandler.databaseFilePath
+    DatabaseHandler.CloseConnection()
+    # Users in the next test's database get the same IDs
+    Encryption.sessionKeys.clear()
+    Encryption.decryptedTransactions.clear()
+
+
+@pytest.fixture
+def userId(database):
+    """
+    Adds a user called 'tester' with the password 'password'.
+    :return: The ID of the user.
+    """
+    DatabaseHandler.AddUser('tester', 'Tester', testPassword, 0, testAnswer)
+    return DatabaseHandler.PullUsersData('tester')[0][0]
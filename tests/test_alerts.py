@@ -0,0 +1,36 @@
+"""
+FILE NAME - test_alerts.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests the alerts for unusual expenses, which are scored against the running statistics of their category.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import DatabaseHandler
+
+# Twenty ordinary coffees, between 4 and 6 dollars
+coffees = [(-4.0 - i % 3, f'24/03/{i + 1:02d}', 'Coffee') for i in range(20)]
+
+
+def test_unusual_expense_is_alerted(userId):
+    DatabaseHandler.AddTransactions(userId, coffees)
+    assert DatabaseHandler.PullSpendingAlerts(userId).empty
+
+    DatabaseHandler.AddTransaction(userId, -5.5, '24/03/21', 'Coffee 42')  # Ordinary, the number isn't the category
+    DatabaseHandler.AddTransaction(userId, -90.0, '24/03/22', 'Coffee')
+    DatabaseHandler.AddTransaction(userId, -90.0, '24/03/22', 'Groceries')  # A new category isn't unusual yet
+    alerts = DatabaseHandler.PullSpendingAlerts(userId)
+    assert alerts[['amount', 'description']].values.tolist() == [[-90.0, 'Coffee']]
+    assert alerts['z_score'].iloc[0] > 3
+    assert DatabaseHandler.FetchOne("SELECT count FROM spending_stats WHERE category = 'coffee'") == (22,)
+
+
+def test_alerts_are_dismissed_and_rebuilt_from_the_transactions(userId):
+    DatabaseHandler.AddTransactions(userId, coffees + [(-90.0, '24/03/22', 'Coffee')])
+    assert len(DatabaseHandler.PullSpendingAlerts(userId)) == 1
+
+    assert DatabaseHandler.DismissSpendingAlerts(userId) == 1
+    assert DatabaseHandler.PullSpendingAlerts(userId).empty
+
+    DatabaseHandler.RebuildSpendingStats()
+    assert DatabaseHandler.FetchOne('SELECT count FROM spending_stats WHERE user_id = ?', (userId,)) == (21,)
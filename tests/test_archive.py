@@ -0,0 +1,120 @@
+"""
+FILE NAME - test_archive.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests archiving closed years, including archiving a year again after its rows were left both live and in
+    the archive, importing a statement from an archived year again and restoring the archives from backups.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+from datetime import datetime
+import pytest
+import ArchiveHandler
+import BackupHandler
+import DatabaseHandler
+
+statement = [(-10.0, '20/03/01', 'Coffee'), (-10.0, '20/03/01', 'Coffee'), (250.0, '20/06/15', 'Pay'),
+             (-40.0, '23/01/05', 'Groceries')]
+
+
+def ArchivedTotals(userId):
+    """
+    Gets a user's archived income, expenses and count.
+    :param userId: The ID of the user.
+    :return: Tuple of the income, expenses and count.
+    """
+    return DatabaseHandler.FetchOne('SELECT TOTAL(income), TOTAL(expenses), TOTAL(count) FROM archived_totals '
+                                    'WHERE user_id = ?', (userId,))
+
+
+def test_archive_moves_closed_years(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+
+    assert ArchiveHandler.ArchiveClosedPeriods(2022) == {2020: 3}
+
+    assert ArchiveHandler.ArchivedYears() == [2020]
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions') == (1,)
+    assert ArchivedTotals(userId) == (250.0, -20.0, 3)
+    assert ArchiveHandler.PullTransactionsRange(userId)['amount'].tolist() == [-10.0, -10.0, 250.0, -40.0]
+    assert ArchiveHandler.RebuildArchivedTotals() == 3
+    assert ArchivedTotals(userId) == (250.0, -20.0, 3)
+
+
+def test_importing_an_archived_statement_again_skips_it(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+    ArchiveHandler.ArchiveClosedPeriods(2022)
+
+    isExact, _ = DatabaseHandler.FindDuplicates(userId, statement)
+    assert isExact.tolist() == [True, True, True, True]
+    assert DatabaseHandler.AddTransactions(userId, statement + [(-10.0, '20/03/01', 'Coffee')]) == 1
+
+
+def test_adding_a_transaction_after_archiving_skips_the_archived_occurrences(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+    ArchiveHandler.ArchiveClosedPeriods(2022)
+
+    DatabaseHandler.AddTransaction(userId, -10.0, '20/03/01', 'Coffee')
+
+    assert DatabaseHandler.FetchOne("SELECT occurrence FROM transactions WHERE date = '20/03/01'") == (2,)
+    assert DatabaseHandler.AddTransactions(userId, statement) == 0
+
+
+def test_archive_takes_expenses_off_budgets(userId):
+    DatabaseHandler.AddBudget(userId, 'Coffee', 25.0, '20/03/31')
+    DatabaseHandler.AddTransactions(userId, statement)
+    assert DatabaseHandler.FetchOne('SELECT spent FROM budget_spend') == (20.0,)
+
+    ArchiveHandler.ArchiveClosedPeriods(2022)
+
+    assert DatabaseHandler.FetchOne('SELECT spent FROM budget_spend') == (0.0,)
+    DatabaseHandler.RebuildBudgetSpend()
+    assert DatabaseHandler.FetchOne('SELECT spent FROM budget_spend') == (0.0,)
+
+
+def test_archive_again_after_rows_were_left_live(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+    ArchiveHandler.ArchiveClosedPeriods(2022)
+
+    # Copy the rows back as if it crashed after writing the archive
+    with ArchiveHandler.AttachedArchive(2020):
+        DatabaseHandler.Execute('INSERT INTO main.transactions SELECT * FROM archive.transactions', log=False)
+    DatabaseHandler.Execute('DELETE FROM archived_totals', log=False)
+    DatabaseHandler.Execute('DELETE FROM archived_fingerprints', log=False)
+
+    assert ArchiveHandler.ArchiveClosedPeriods(2022) == {2020: 3}
+    assert ArchivedTotals(userId) == (250.0, -20.0, 3)
+    assert len(ArchiveHandler.PullTransactionsRange(userId)) == 4
+
+
+def test_restore_restores_the_archives_of_the_backup(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+    BackupHandler.BackupDatabase()
+    pointInTime = datetime.now()
+    ArchiveHandler.ArchiveClosedPeriods(2022)
+
+    # The backup was taken before archiving, so restoring past it would lose the archiving
+    with pytest.raises(ValueError):
+        BackupHandler.RestoreToPointInTime(datetime.now())
+
+    BackupHandler.RestoreToPointInTime(pointInTime)
+    assert not os.path.exists(ArchiveHandler.ArchiveFilePath(2020))
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions') == (4,)
+    assert ArchivedTotals(userId) == (0.0, 0.0, 0.0)
+
+
+def test_restore_after_archiving_from_a_later_backup(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+    ArchiveHandler.ArchiveClosedPeriods(2022)
+    backup = BackupHandler.BackupDatabase()
+    assert list(backup['archives']) == ['2020']
+    DatabaseHandler.AddTransaction(userId, -3.0, '24/01/02', 'Bus')
+    pointInTime = datetime.now()
+    os.remove(ArchiveHandler.ArchiveFilePath(2020))
+
+    BackupHandler.RestoreToPointInTime(pointInTime)
+
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions') == (2,)
+    assert ArchivedTotals(userId) == (250.0, -20.0, 3)
+    assert len(ArchiveHandler.PullTransactionsRange(userId)) == 5
+    assert DatabaseHandler.AddTransactions(userId, statement) == 0
@@ -0,0 +1,54 @@
+"""
+FILE NAME - test_backup.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests backups and restoring the database to a point in time, including the tables that aren't logged.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+from datetime import datetime
+import BackupHandler
+import DatabaseHandler
+
+
+def test_restore_replays_the_log_and_rebuilds_spending_stats(userId):
+    DatabaseHandler.AddTransaction(userId, -5.0, '24/03/01', 'Coffee')
+    backup = BackupHandler.BackupDatabase()
+    assert BackupHandler.VerifyBackup(backup)
+    DatabaseHandler.AddTransactions(userId, [(-4.0 - i % 3, f'24/03/{i + 2:02d}', 'Coffee') for i in range(20)])
+    DatabaseHandler.AddTransaction(userId, -90.0, '24/03/25', 'Coffee')
+    pointInTime = datetime.now()
+    DatabaseHandler.AddTransaction(userId, -7.0, '24/03/26', 'Coffee')  # After the point in time, so not restored
+
+    assert BackupHandler.RestoreToPointInTime(pointInTime)['file'] == backup['file']
+
+    total, count = DatabaseHandler.FetchOne('SELECT -SUM(amount), COUNT(*) FROM transactions')
+    assert (total, count) == (5.0 + sum(4.0 + i % 3 for i in range(20)) + 90.0, 22)
+    assert DatabaseHandler.FetchOne('SELECT count FROM spending_stats WHERE user_id = ?', (userId,)) == (22,)
+    assert DatabaseHandler.CheckRollups() == []
+    # The unusual expense replayed from the log is alerted again
+    assert DatabaseHandler.PullSpendingAlerts(userId)['amount'].tolist() == [-90.0]
+
+
+def test_restore_rebuilds_budget_spending_and_alerts(userId):
+    DatabaseHandler.AddBudget(userId, 'Groceries', 100.0, '99/12/31')
+    DatabaseHandler.AddTransaction(userId, -5.0, '99/12/01', 'Groceries')
+    BackupHandler.BackupDatabase()
+    DatabaseHandler.AddTransactions(userId, [(-31.0, f'99/12/{i + 2:02d}', 'Groceries') for i in range(3)])
+    pointInTime = datetime.now()
+
+    BackupHandler.RestoreToPointInTime(pointInTime)
+
+    assert DatabaseHandler.FetchOne('SELECT spent FROM budget_spend') == (98.0,)
+    assert DatabaseHandler.PullBudgetAlerts(userId)['threshold'].tolist() == [80]
+
+
+def test_backup_problem_names_what_is_wrong(userId):
+    backup = BackupHandler.BackupDatabase()
+    assert BackupHandler.BackupProblem(backup) is None
+    with open(os.path.join(BackupHandler.backupFolderPath, backup['file']), 'ab') as file:
+        file.write(b'\0')
+
+    assert BackupHandler.BackupProblem(backup) == f"{backup['file']}'s checksum doesn't match"
+    assert not BackupHandler.VerifyBackup(backup)
@@ -0,0 +1,66 @@
+"""
+FILE NAME - test_benchmarks.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - The data paths of the end to end benchmark (see Benchmarks.py) as pytest-benchmark cases, for a user
+    made by DataGenerator. Like Benchmarks.TimeIt each case is run a few times and the fastest run counts. They are
+    skipped when pytest-benchmark isn't installed. Save a run with --benchmark-autosave and compare with a saved one
+    with --benchmark-compare.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import pytest
+import DatabaseHandler
+import DataGenerator
+import FinanceService
+import UserModel
+
+pytest.importorskip('pytest_benchmark')
+
+benchmarkSize = 10000  # Transactions of the generated user
+rounds = 3
+
+# The FinanceService cases, by name, given the loaded user
+financeServiceCases = {
+    'SplitTransactions': lambda user: FinanceService.SplitTransactions(user.transactions, 'date', 'amount'),
+    'CumulativeBalance': lambda user: FinanceService.CumulativeBalance(user.transactions),
+    'CashFlowTotals': lambda user: FinanceService.CashFlowTotals(user.transactions),
+    'RollupTotals': lambda user: FinanceService.RollupTotals(user.monthlyTotals),
+}
+
+
+@pytest.fixture
+def generatedUser(database):
+    """
+    Fills the database with one user's generated transactions, goals and budgets, and loads them.
+    :return: Tuple of the username and the loaded User.
+    """
+    username = DataGenerator.GenerateData(1, benchmarkSize, goalsPerUser=benchmarkSize // 100)[0]
+    user = UserModel.User()
+    user.LoadData(username)
+    return username, user
+
+
+def test_load_data(benchmark, generatedUser):
+    username, user = generatedUser
+    benchmark.pedantic(user.LoadData, (username,), rounds=rounds)
+    assert len(user.transactions) == benchmarkSize
+
+
+@pytest.mark.parametrize('name', list(financeServiceCases))
+def test_finance_service(benchmark, generatedUser, name):
+    _, user = generatedUser
+    # Called without a cacheKey, so it is worked out every round
+    benchmark.pedantic(financeServiceCases[name], (user,), rounds=rounds)
+
+
+@pytest.mark.parametrize('bucket', ['day', 'month'])
+def test_aggregate(benchmark, generatedUser, bucket):
+    _, user = generatedUser
+    totals = benchmark.pedantic(DatabaseHandler.Aggregate, (user.id,), {'bucket': bucket}, rounds=rounds)
+    assert len(totals) > 0
+
+
+def test_balance_over_time(benchmark, generatedUser):
+    _, user = generatedUser
+    benchmark.pedantic(user.BalanceOverTime, (DatabaseHandler.defaultCurrency,), {'bucket': 'month'}, rounds=rounds)
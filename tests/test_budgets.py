@@ -0,0 +1,39 @@
+"""
+FILE NAME - test_budgets.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests adding budgets and the alerts when their spending goes past 80% and 100% of their amount.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import BudgetCli
+import DatabaseHandler
+
+
+def test_budget_command_adds_a_budget_with_its_spending(database, userId):
+    DatabaseHandler.AddTransaction(userId, -30.0, '99/12/02', 'Groceries')
+    BudgetCli.Main(['--database', database, 'budget', 'tester', 'Groceries', '100', '99/12/31'])
+
+    budgets = DatabaseHandler.PullBudgetsData(userId)
+    assert budgets[['name', 'amount', 'end_date', 'spent']].values.tolist() == [['Groceries', 100.0, '99/12/31', 30.0]]
+
+
+def test_alerts_follow_spending_past_each_threshold(userId):
+    DatabaseHandler.AddBudget(userId, 'Groceries', 100.0, '99/12/31')
+    DatabaseHandler.AddTransaction(userId, -50.0, '99/12/02', 'Groceries 1234')
+    DatabaseHandler.AddTransaction(userId, -50.0, '99/11/30', 'Groceries')  # Before the budget's month
+    assert DatabaseHandler.PullBudgetAlerts(userId).empty
+
+    DatabaseHandler.AddTransaction(userId, -35.0, '99/12/10', 'Groceries')
+    assert DatabaseHandler.PullBudgetAlerts(userId)['threshold'].tolist() == [80]
+    DatabaseHandler.AddTransaction(userId, -15.0, '99/12/11', 'Groceries')
+    alerts = DatabaseHandler.PullBudgetAlerts(userId)
+    assert alerts[['threshold', 'spent']].values.tolist() == [[100, 100.0]]
+
+    # Deleting an expense drops the spending back below 100%, so only the 80% alert is left
+    lastId = DatabaseHandler.FetchOne('SELECT MAX(id) FROM transactions')[0]
+    DatabaseHandler.DeleteTransactions([lastId])
+    assert DatabaseHandler.PullBudgetAlerts(userId)['threshold'].tolist() == [80]
+
+    DatabaseHandler.DismissBudgetAlerts(userId)
+    assert DatabaseHandler.PullBudgetAlerts(userId).empty
@@ -0,0 +1,69 @@
+"""
+FILE NAME - test_cli.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests the output of the command line's reports and restores.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import os
+from datetime import datetime
+import BackupHandler
+import BudgetCli
+import DatabaseHandler
+
+
+def test_summary_shows_amounts_in_the_reporting_currency(database, userId, capsys):
+    DatabaseHandler.AddTransactions(userId, [(100.0, '24/03/01', 'Pay'), (-40.0, '24/03/02', 'Groceries')],
+                                    currency='USD')
+    DatabaseHandler.AddTransaction(userId, -12.5, '24/03/03', 'Lunch', 'EUR')
+    DatabaseHandler.AddFxRates([('USD', '24/03/01', 1.5), ('EUR', '24/03/01', 1.6)])
+
+    BudgetCli.Main(['--database', database, 'summary', 'tester', '--currency', 'USD'])
+    output = capsys.readouterr().out
+    assert 'Income: 100.00 USD  Expenses: -53.33 USD  Balance: 46.67 USD' in output
+    assert '$' not in output
+
+    BudgetCli.Main(['--database', database, 'summary', 'tester', '--currency', 'EUR'])
+    assert 'Income: €93.75  Expenses: €-50.00  Balance: €43.75' in capsys.readouterr().out
+
+
+def test_forecast_shows_amounts_in_the_reporting_currency(database, userId, capsys):
+    DatabaseHandler.AddTransactions(userId, [(300.0, '24/01/01', 'Pay'), (-100.0, '24/02/01', 'Rent')],
+                                    currency='USD')
+
+    BudgetCli.Main(['--database', database, 'forecast', 'tester', '--currency', 'USD', '--months', '2'])
+    output = capsys.readouterr().out
+    assert 'Balance now: 200.00 USD' in output
+    assert '$' not in output
+
+
+def test_restore_dry_run_shows_the_plan_without_restoring(database, userId, capsys):
+    DatabaseHandler.AddTransaction(userId, -5.0, '24/03/01', 'Coffee')
+    backup = BackupHandler.BackupDatabase()
+    DatabaseHandler.AddTransaction(userId, -6.0, '24/03/02', 'Coffee')
+    pointInTime = datetime.now()
+    DatabaseHandler.AddTransaction(userId, -7.0, '24/03/03', 'Coffee')
+    statementCount = len(BackupHandler.PlanRestore(pointInTime)[1])
+    assert statementCount > 0
+
+    BudgetCli.Main(['--database', database, 'restore', pointInTime.isoformat(), '--dry-run'])
+    assert f"Would restore {backup['file']}" in capsys.readouterr().out
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions') == (3,)
+
+    BudgetCli.Main(['--database', database, 'restore', pointInTime.isoformat()])
+    output = capsys.readouterr().out
+    assert f"Restored {backup['file']}" in output and f'replayed {statementCount} statements' in output
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions') == (2,)
+
+
+def test_restore_gives_the_reason_a_backup_is_skipped(database, userId, capsys):
+    DatabaseHandler.AddTransaction(userId, -5.0, '24/03/01', 'Coffee')
+    older = BackupHandler.BackupDatabase()
+    newer = BackupHandler.BackupDatabase()
+    os.remove(os.path.join(BackupHandler.backupFolderPath, newer['file']))
+
+    BudgetCli.Main(['--database', database, 'restore', datetime.now().isoformat(), '--dry-run'])
+    output = capsys.readouterr().out
+    assert f"Skipping backup {newer['file']}: {newer['file']} is missing" in output
+    assert f"Would restore {older['file']}" in output
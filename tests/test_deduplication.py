@@ -0,0 +1,46 @@
+"""
+FILE NAME - test_deduplication.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests that importing a statement again skips the transactions already saved, and finding exact and near
+    duplicates.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import DatabaseHandler
+
+statement = [(-4.5, '24/03/01', 'Coffee'), (-4.5, '24/03/01', 'Coffee'), (-60.0, '24/03/02', 'Groceries 1234')]
+
+
+def test_overlapping_statement_only_adds_new_transactions(userId):
+    assert DatabaseHandler.AddTransactions(userId, statement) == 3
+    # The same statement with one more line, described with different case and punctuation
+    overlapping = [(-4.5, '24/03/01', 'COFFEE'), (-4.5, '24/03/01', 'coffee.'), (-60.0, '24/03/02', 'Groceries 1234'),
+                   (-4.5, '24/03/01', 'Coffee')]
+    assert DatabaseHandler.AddTransactions(userId, overlapping) == 1
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions') == (4,)
+
+
+def test_transactions_added_one_at_a_time_are_never_duplicates(userId):
+    DatabaseHandler.AddTransaction(userId, -4.5, '24/03/01', 'Coffee')
+    DatabaseHandler.AddTransaction(userId, -4.5, '24/03/01', 'Coffee')
+    # Both are saved, so a statement with the two coffees adds neither
+    assert DatabaseHandler.AddTransactions(userId, statement[:2]) == 0
+
+
+def test_find_exact_and_near_duplicates(userId):
+    DatabaseHandler.AddTransactions(userId, statement)
+    rows = [(-4.5, '24/03/01', 'Coffee'), (-60.0, '24/03/04', 'Groceries 9876'), (-60.0, '24/04/20', 'Groceries'),
+            (-8.0, '24/03/01', 'Coffee')]
+
+    isExact, isNear = DatabaseHandler.FindDuplicates(userId, rows)
+
+    assert isExact.tolist() == [True, False, False, False]
+    assert isNear.tolist() == [False, True, False, False]
+
+
+def test_rows_saved_before_fingerprints_are_fingerprinted_on_the_next_import(userId):
+    DatabaseHandler.Execute('INSERT INTO transactions (user_id, amount, date, description) VALUES (?, ?, ?, ?)',
+                            (userId, -60.0, '24/03/02', 'Groceries 1234'))
+    assert DatabaseHandler.AddTransactions(userId, statement) == 2
+    assert DatabaseHandler.FetchOne('SELECT COUNT(*) FROM transactions WHERE fingerprint IS NULL') == (0,)
@@ -0,0 +1,59 @@
+"""
+FILE NAME - test_encryption.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests turning on encryption for a user: their transactions read back the same, and only encrypted values
+    are logged from then on.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import sqlite3
+from datetime import datetime
+import pytest
+import BackupHandler
+import DatabaseHandler
+from conftest import testPassword, testAnswer
+
+
+def test_encrypted_transactions_read_back_the_same(userId):
+    DatabaseHandler.AddTransactions(userId, [(-12.5, '24/03/05', 'Groceries'), (100.0, '24/03/06', 'Pay')])
+
+    assert DatabaseHandler.EnableEncryption('tester', testPassword, testAnswer) == 2
+    DatabaseHandler.AddTransaction(userId, -3.25, '24/03/07', 'Coffee')
+
+    assert DatabaseHandler.FetchOne("SELECT COUNT(*) FROM transactions WHERE typeof(amount) != 'text'") == (0,)
+    DatabaseHandler.LockUser(userId)
+    assert DatabaseHandler.UnlockUser('tester', testPassword)
+    transactions = DatabaseHandler.PullTransactionsData(userId).sort_values('id')
+    assert transactions['amount'].tolist() == [-12.5, 100.0, -3.25]
+    assert transactions['description'].tolist() == ['Groceries', 'Pay', 'Coffee']
+    # Fingerprints are remade keyed by the data key, so the same statement is still skipped
+    assert DatabaseHandler.AddTransactions(userId, [(-12.5, '24/03/05', 'Groceries')]) == 0
+
+
+def test_only_encrypted_values_are_logged_after_encryption(userId):
+    BackupHandler.BackupDatabase()
+    DatabaseHandler.AddTransaction(userId, -41.0, '24/03/01', 'Plain shop')
+    lastSeqs = DatabaseHandler.FetchOne('SELECT (SELECT MAX(seq) FROM change_log), (SELECT MAX(seq) FROM statement_log)')
+    oldEntries = DatabaseHandler.Fetch('SELECT row_data FROM change_log UNION ALL SELECT params FROM statement_log')
+
+    DatabaseHandler.EnableEncryption('tester', testPassword, testAnswer)
+    DatabaseHandler.AddTransaction(userId, -12.5, '24/03/05', 'Secret cafe')
+    transactionId = DatabaseHandler.FetchOne('SELECT MAX(id) FROM transactions')[0]
+    DatabaseHandler.UpdateTransactionsDescription([transactionId], 'Secret bar')
+
+    # The logs are append-only, so what they saved before is left as it was
+    assert DatabaseHandler.Fetch('SELECT row_data FROM change_log WHERE seq <= ? UNION ALL '
+                                 'SELECT params FROM statement_log WHERE seq <= ?', lastSeqs) == oldEntries
+    with pytest.raises(sqlite3.IntegrityError):
+        DatabaseHandler.Execute('UPDATE change_log SET row_data = NULL', log=False)
+    for text, in DatabaseHandler.Fetch('SELECT row_data FROM change_log WHERE seq > ? UNION ALL '
+                                       'SELECT params FROM statement_log WHERE seq > ?', lastSeqs):
+        assert 'Plain' not in (text or '') and 'Secret' not in (text or '')
+        assert '-41.0' not in (text or '') and '-12.5' not in (text or '')
+
+    # Replaying the log on the backup ends with the same transactions
+    BackupHandler.RestoreToPointInTime(datetime.now())
+    transactions = DatabaseHandler.PullTransactionsData(userId).sort_values('id')
+    assert transactions['amount'].tolist() == [-41.0, -12.5]
+    assert transactions['description'].tolist() == ['Plain shop', 'Secret bar']
@@ -0,0 +1,56 @@
+"""
+FILE NAME - test_rollups.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests that the monthly rollup follows every insert, update and delete of transactions, and the totals
+    read from it.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import DatabaseHandler
+
+
+def MonthlyTotals(userId):
+    """
+    Gets a user's monthly totals.
+    :param userId: The ID of the user.
+    :return: List of [month, currency, income, expenses, net, count] lists, oldest first.
+    """
+    return DatabaseHandler.PullMonthlyTotals(userId).values.tolist()
+
+
+def test_rollup_follows_inserts_updates_and_deletes(userId):
+    DatabaseHandler.AddTransactions(userId, [(1000.0, '24/01/15', 'Pay'), (-200.0, '24/01/20', 'Rent'),
+                                             (-50.0, '24/02/03', 'Groceries'), (20.0, '24/02/04', 'Refund', 'USD')])
+    assert MonthlyTotals(userId) == [['24/01', 'AUD', 1000.0, -200.0, 800.0, 2], ['24/02', 'AUD', 0.0, -50.0, -50.0, 1],
+                                     ['24/02', 'USD', 20.0, 0.0, 20.0, 1]]
+
+    rentId, groceriesId = [row[0] for row in DatabaseHandler.Fetch(
+        "SELECT id FROM transactions WHERE description IN ('Rent', 'Groceries') ORDER BY id")]
+    DatabaseHandler.ShiftTransactionDates([rentId], 15)  # Into February
+    DatabaseHandler.DeleteTransactions([groceriesId])
+    assert MonthlyTotals(userId) == [['24/01', 'AUD', 1000.0, 0.0, 1000.0, 1], ['24/02', 'AUD', 0.0, -200.0, -200.0, 1],
+                                     ['24/02', 'USD', 20.0, 0.0, 20.0, 1]]
+    assert DatabaseHandler.CheckRollups() == []
+
+
+def test_check_finds_and_rebuild_fixes_a_wrong_rollup(userId):
+    DatabaseHandler.AddTransactions(userId, [(1000.0, '24/01/15', 'Pay'), (-200.0, '24/02/20', 'Rent')])
+    DatabaseHandler.Execute("UPDATE monthly_rollup SET net = 0 WHERE month = '24/01'", log=False)
+    assert DatabaseHandler.CheckRollups() == [(userId, '24/01', 'AUD')]
+
+    DatabaseHandler.RebuildRollups()
+    assert DatabaseHandler.CheckRollups() == []
+
+
+def test_aggregate_and_opening_balance(userId):
+    DatabaseHandler.AddTransactions(userId, [(1000.0, '24/01/15', 'Pay'), (-200.0, '24/01/20', 'Rent'),
+                                             (-50.0, '24/02/03', 'Groceries'), (-25.0, '24/02/03', 'Lunch'),
+                                             (-10.0, '24/03/31', 'Coffee')])
+
+    months = DatabaseHandler.Aggregate(userId, '24/01/16', '24/03/31', 'month')
+    assert months[['bucket', 'net', 'count']].values.tolist() == [['24/01/01', -200.0, 1], ['24/02/01', -75.0, 2],
+                                                                 ['24/03/01', -10.0, 1]]
+    days = DatabaseHandler.Aggregate(userId, '24/02/01', '24/02/29', 'day')
+    assert days[['bucket', 'expenses']].values.tolist() == [['24/02/03', -75.0]]
+    assert DatabaseHandler.OpeningBalances(userId, '24/02/03').values.tolist() == [['AUD', 800.0]]
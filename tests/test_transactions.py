@@ -0,0 +1,42 @@
+"""
+FILE NAME - test_transactions.py
+PROGRAMMER - Angel Parra
+DATE - 19/10/2026
+DESCRIPTION - Tests adding transactions, the way the main page and the command line add them.
+NAMING CONVENTIONS - all variables use camel case eg - helloWorld - and all functions
+    and classes pascal case on each word eg - ToListBoxFormat -
+"""
+import importlib.util
+import os
+import DatabaseHandler
+
+
+def LoadBudgetManager():
+    """
+    Imports Budget Manager.py, which can't be imported by name because of the space in its file name.
+    :return: The imported module.
+    """
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Budget Manager.py')
+    spec = importlib.util.spec_from_file_location('BudgetManager', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_add_transaction_typed_in_main_page(userId):
+    # The main page passes the amount as the string SplitCurrency gives it
+    amount, currency = LoadBudgetManager().SplitCurrency('-12.50')
+    DatabaseHandler.AddTransaction(userId, amount, '24/03/05', 'Groceries', currency)
+    DatabaseHandler.AddTransaction(userId, '-40', '24/03/06', 'Groceries', currency)
+
+    assert DatabaseHandler.Fetch('SELECT amount, typeof(amount) FROM transactions ORDER BY id') == [
+        (-12.5, 'real'), (-40.0, 'real')]
+    assert DatabaseHandler.FetchOne('SELECT count, mean FROM spending_stats WHERE user_id = ?', (userId,)) == (2, 26.25)
+
+
+def test_add_transactions_with_string_amounts(userId):
+    rows = [('-12.50', '24/03/05', 'Groceries'), ('100', '24/03/06', 'Pay')]
+    assert DatabaseHandler.AddTransactions(userId, rows) == 2
+    # The same rows typed as numbers are the same transactions, so they are skipped as duplicates
+    assert DatabaseHandler.AddTransactions(userId, [(-12.5, '24/03/05', 'Groceries'), (100.0, '24/03/06', 'Pay')]) == 0
+    assert DatabaseHandler.FetchOne('SELECT count FROM spending_stats WHERE user_id = ?', (userId,)) == (1,)